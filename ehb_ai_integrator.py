@@ -7,10 +7,14 @@ and integrates it into our EHB system structure.
 
 import os
 import json
-import requests
+import time
+import asyncio
+import hashlib
+import datetime
+import argparse
 import logging
-from openai import OpenAI
 from pathlib import Path
+from ehb_llm_backends import BACKENDS, CALL_TRACE, MAX_CONCURRENCY, create_backend, estimate_tokens
 
 # Set up logging
 logging.basicConfig(
@@ -20,17 +24,308 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ehb_ai_integrator')
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Completion cache location, how long an entry is reused, and the total size kept on disk
+COMPLETION_CACHE_DIR = os.path.join("ehb_company_info", ".completion_cache")
+COMPLETION_CACHE_TTL = 7 * 24 * 60 * 60
+COMPLETION_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Streamed completions: longest total time, and longest wait for the next chunk, in seconds
+STREAM_TIMEOUT = 600
+STREAM_IDLE_TIMEOUT = 120
+
+# Per-call metrics of every run, one JSON object per line, in the output directory
+CALL_METRICS_FILENAME = "ai_call_metrics.jsonl"
+
+def _write_atomic(path, text):
+    """Replace path with text in one step, so readers never see a half-written file"""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class CompletionStreamWriter:
+    """Appends a streamed completion to <path>.partial as the chunks arrive
+    
+    finish() returns the assembled ChatCompletion and removes the partial file (the caller
+    writes the final file); fail() keeps it so a timed-out or broken stream still leaves the
+    output received so far. Time to first token and tokens per second are logged.
+    """
+    
+    def __init__(self, path, timeout=STREAM_TIMEOUT):
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(f"{self.path.name}.partial")
+        self.file = open(self.partial_path, "w")
+        self.timeout = timeout
+        self.start = time.perf_counter()
+        self.first_token = None
+        self.parts = []
+        self.chunks = 0
+        self.completion = {"id": "", "created": 0, "model": "", "finish_reason": "stop", "usage": None}
+    
+    def add(self, chunk):
+        """Record one ChatCompletionChunk; raises TimeoutError once the stream has run too long"""
+        self.completion["id"] = chunk.id or self.completion["id"]
+        self.completion["created"] = chunk.created or self.completion["created"]
+        self.completion["model"] = chunk.model or self.completion["model"]
+        if chunk.usage:
+            self.completion["usage"] = chunk.usage.model_dump(mode="json")
+        
+        for choice in chunk.choices:
+            if choice.finish_reason:
+                self.completion["finish_reason"] = choice.finish_reason
+            if choice.delta.content:
+                if self.first_token is None:
+                    self.first_token = time.perf_counter()
+                self.parts.append(choice.delta.content)
+                self.chunks += 1
+                self.file.write(choice.delta.content)
+                self.file.flush()
+        
+        if time.perf_counter() - self.start > self.timeout:
+            raise TimeoutError(f"Streaming {self.path.name} took longer than {self.timeout}s")
+    
+    def finish(self):
+        """Close the stream's output and return it as a ChatCompletion"""
+        self.file.close()
+        self.partial_path.unlink(missing_ok=True)
+        
+        end = time.perf_counter()
+        usage = self.completion["usage"]
+        tokens = usage["completion_tokens"] if usage else self.chunks
+        if self.first_token is not None:
+            rate = tokens / (end - self.first_token) if end > self.first_token else 0.0
+            logger.info(f"Streamed {self.path.name}: first token after {self.first_token - self.start:.2f}s, "
+                        f"{tokens} tokens in {end - self.start:.2f}s ({rate:.1f} tokens/s)")
+        
+        from openai.types.chat import ChatCompletion
+        return ChatCompletion.model_validate({
+            "id": self.completion["id"],
+            "object": "chat.completion",
+            "created": self.completion["created"],
+            "model": self.completion["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(self.parts)},
+                "finish_reason": self.completion["finish_reason"]
+            }],
+            "usage": usage
+        })
+    
+    def fail(self, error):
+        """Close the partial output after an error, keeping it on disk"""
+        self.file.close()
+        logger.warning(f"Streaming {self.path.name} failed after {time.perf_counter() - self.start:.2f}s ({error}); "
+                       f"the output received so far is in {self.partial_path}")
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a request would overrun the run's token budget, or the run runs out of time"""
+
+class CallMetrics:
+    """Wall time, time to first byte, token usage and retries of each completion call in a run
+    
+    Every call is appended to path as a JSON line. Cached and coalesced responses (shared
+    with an identical request in flight) are recorded too, but only calls that reached the
+    backend count against token_budget; requests the budgets refused are recorded with
+    status "budget".
+    
+    begin() reserves a request's estimated prompt tokens until it is recorded, so calls
+    running at the same time cannot together overrun token_budget. time_budget sets a
+    deadline for the whole run: the trace from begin() carries it, and a call still
+    running or waiting (to retry, or on the rate limiter) at the deadline is stopped.
+    """
+    
+    def __init__(self, path=None, token_budget=None, time_budget=None):
+        self.path = Path(path) if path else None
+        self.token_budget = token_budget
+        self.time_budget = time_budget
+        self.start()
+    
+    def start(self):
+        """Begin a new run: clear the calls and restart the time budget"""
+        self.run_id = datetime.datetime.now().isoformat(timespec="seconds")
+        self.started = time.perf_counter()
+        self.calls = []
+        self.reserved_tokens = 0
+    
+    def tokens_used(self):
+        return sum(call["prompt_tokens"] + call["completion_tokens"] for call in self.calls
+                   if not call["cached"] and not call["coalesced"])
+    
+    def deadline(self):
+        """time.perf_counter() value at which the run's time budget ends (None without one)"""
+        return None if self.time_budget is None else self.started + self.time_budget
+    
+    def remaining(self):
+        """Seconds left in the time budget (None without one)"""
+        return None if self.time_budget is None else self.deadline() - time.perf_counter()
+    
+    def check_budget(self, step, tokens=0):
+        """Raise BudgetExceededError if step may not (go on to) send a request of about tokens more tokens"""
+        if self.token_budget is not None:
+            used = self.tokens_used()
+            if used + self.reserved_tokens + tokens > self.token_budget:
+                raise BudgetExceededError(f"Token budget of {self.token_budget} would be exceeded by {step} "
+                                          f"({used} used, {self.reserved_tokens} reserved by calls in flight, "
+                                          f"about {tokens} more needed)")
+        elapsed = time.perf_counter() - self.started
+        if self.time_budget is not None and elapsed >= self.time_budget:
+            raise BudgetExceededError(f"Time budget of {self.time_budget}s used up during {step} ({elapsed:.1f}s)")
+    
+    def begin(self, step, request):
+        """Check the budgets for a request about to be sent and reserve its tokens; returns its CALL_TRACE dict
+        
+        A refused request is recorded with status "budget" before BudgetExceededError propagates.
+        """
+        tokens = estimate_tokens(request)
+        try:
+            self.check_budget(step, tokens)
+        except BudgetExceededError as e:
+            self.record(step, request, error=e, refused=True)
+            raise
+        self.reserved_tokens += tokens
+        return {
+            "start": time.perf_counter(),
+            "reserved": tokens,
+            "deadline": self.deadline(),
+            "check_budget": lambda: self.check_budget(step)
+        }
+    
+    def record(self, step, request, response=None, trace=None, cached=False, error=None, refused=False):
+        """Record one call; trace is the CALL_TRACE dict of a request sent to the backend, and
+        refused marks a request the budgets kept from being sent"""
+        if trace:
+            self.reserved_tokens -= trace.pop("reserved", 0)
+        usage = response.usage if response is not None else None
+        now = time.perf_counter()
+        call = {
+            "run_id": self.run_id,
+            "step": step,
+            "model": request.get("model"),
+            "cached": cached,
+            "coalesced": bool(trace and trace.get("coalesced")),
+            "status": "budget" if refused else "error" if error else "ok",
+            "wall_s": round(now - trace["start"], 3) if trace else 0.0,
+            "ttfb_s": round(trace["first_byte"] - trace["start"], 3) if trace and "first_byte" in trace else None,
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "completion_tokens": usage.completion_tokens if usage else 0,
+            "retries": max(trace.get("attempts", 1) - 1, 0) if trace else 0,
+            "error": (str(error) or type(error).__name__) if error else None
+        }
+        self.calls.append(call)
+        
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(call) + "\n")
+        return call
+    
+    def table(self):
+        """The calls of the run as a text table, slowest first, with totals"""
+        header = f"{'step':<20} {'status':<8} {'wall s':>8} {'ttfb s':>8} {'prompt':>8} {'compl.':>8} {'retries':>7}"
+        lines = [header, "-" * len(header)]
+        for call in sorted(self.calls, key=lambda call: call["wall_s"], reverse=True):
+            status = "cached" if call["cached"] else "shared" if call["coalesced"] else call["status"]
+            ttfb = f"{call['ttfb_s']:.2f}" if call["ttfb_s"] is not None else "-"
+            lines.append(f"{call['step']:<20} {status:<8} {call['wall_s']:>8.2f} {ttfb:>8} "
+                         f"{call['prompt_tokens']:>8} {call['completion_tokens']:>8} {call['retries']:>7}")
+        
+        lines.append("-" * len(header))
+        billed = [call for call in self.calls
+                  if not call["cached"] and not call["coalesced"] and call["status"] != "budget"]
+        lines.append(f"{'total (sent)':<20} {f'{len(billed)} calls':<8} {time.perf_counter() - self.started:>8.2f} {'':>8} "
+                     f"{sum(call['prompt_tokens'] for call in billed):>8} "
+                     f"{sum(call['completion_tokens'] for call in billed):>8} "
+                     f"{sum(call['retries'] for call in billed):>7}")
+        return "\n".join(lines)
+
+class ResponseCache:
+    """On-disk cache of chat completions, keyed by the full request (model, messages, response_format)
+    
+    Each entry is stored as <sha256 of the request>.json. Entries older than ttl seconds are
+    not reused, and once the cache outgrows max_bytes the least recently used entries are
+    deleted. With refresh=True nothing is read from the cache, but new responses are stored.
+    """
+    
+    def __init__(self, cache_dir=COMPLETION_CACHE_DIR, ttl=COMPLETION_CACHE_TTL, max_bytes=COMPLETION_CACHE_MAX_BYTES,
+                 refresh=False):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+    
+    @staticmethod
+    def key(request):
+        """Cache key of a chat.completions.create request"""
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    
+    def load(self, request):
+        """Return the cached ChatCompletion for request, or None if there is no fresh entry"""
+        if self.refresh:
+            return None
+        
+        path = self.cache_dir / f"{self.key(request)}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if time.time() - entry.get('created_at', 0) >= self.ttl:
+            return None
+        
+        # The modification time records the last use, for eviction
+        os.utime(path)
+        logger.info(f"Using cached {request.get('model')} response {path.stem[:12]}")
+        from openai.types.chat import ChatCompletion
+        return ChatCompletion.model_validate(entry['response'])
+    
+    def store(self, request, response):
+        """Save a ChatCompletion for request, then evict entries beyond max_bytes"""
+        path = self.cache_dir / f"{self.key(request)}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'request': request, 'created_at': time.time(), 'response': response.model_dump(mode='json')}, f)
+        os.replace(tmp_path, path)
+        self._evict()
+    
+    def _evict(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Evicted cached response {path.stem[:12]}")
 
 class EhbAiIntegrator:
     """Main class for integrating AI generated content into EHB system"""
     
-    def __init__(self):
-        """Initialize paths and settings"""
+    def __init__(self, use_cache=True, refresh=False, stream=True, backend=None, token_budget=None, time_budget=None):
+        """Initialize paths and settings
+        
+        use_cache=False sends every request to OpenAI; refresh=True does too, but still
+        stores the new responses in the cache. stream=True writes the code templates to
+        <file>.partial while they are generated. backend is an ehb_llm_backends backend
+        (default: create_backend(), which reads EHB_LLM_BACKEND). token_budget (prompt and
+        completion tokens) and time_budget (seconds) limit each run; see CallMetrics.
+        """
         self.output_dir = Path("ehb_company_info")
         self.output_dir.mkdir(exist_ok=True)
         
+        self.backend = backend or create_backend()
+        self.response_cache = ResponseCache(refresh=refresh) if use_cache else None
+        self.stream = stream
+        self.metrics = CallMetrics(self.output_dir / CALL_METRICS_FILENAME, token_budget, time_budget)
+        
         self.integration_hub_path = Path("EHB-AI-Dev-Fullstack/shared/data")
         self.integration_hub_path.mkdir(exist_ok=True, parents=True)
         
@@ -44,130 +339,238 @@ class EhbAiIntegrator:
             "https://chatgpt.com/share/681ed416-2280-8010-8414-dab4e29cf4bc",
         ]
     
+    def _complete(self, request, step, stream_to=None):
+        """self.backend.create(request), answered from the response cache when possible
+        
+        step names the call in self.metrics. With stream_to (and streaming enabled) the
+        completion is streamed into <stream_to>.partial.
+        """
+        response = self.response_cache.load(request) if self.response_cache else None
+        if response is not None:
+            self.metrics.record(step, request, response, cached=True)
+            return response
+        
+        trace = self.metrics.begin(step, request)
+        trace_token = CALL_TRACE.set(trace)
+        try:
+            if stream_to and self.stream:
+                remaining = self.metrics.remaining()
+                writer = CompletionStreamWriter(stream_to, STREAM_TIMEOUT if remaining is None
+                                                else min(STREAM_TIMEOUT, remaining))
+                try:
+                    with self.backend.create(request, stream=True, stream_options={"include_usage": True},
+                                             timeout=STREAM_IDLE_TIMEOUT) as stream:
+                        for chunk in stream:
+                            writer.add(chunk)
+                except BaseException as e:
+                    writer.fail(e)
+                    if isinstance(e, TimeoutError) and remaining is not None and self.metrics.remaining() <= 0:
+                        raise BudgetExceededError(f"Time budget of {self.metrics.time_budget}s ran out during {step}") from e
+                    raise
+                response = writer.finish()
+            else:
+                response = self.backend.create(request)
+        except Exception as e:
+            self.metrics.record(step, request, trace=trace, error=e)
+            raise
+        finally:
+            CALL_TRACE.reset(trace_token)
+        
+        self.metrics.record(step, request, response, trace=trace)
+        if self.response_cache:
+            self.response_cache.store(request, response)
+        return response
+    
+    async def _request_async(self, request, stream_to=None):
+        if stream_to and self.stream:
+            remaining = self.metrics.remaining()
+            writer = CompletionStreamWriter(stream_to, STREAM_TIMEOUT if remaining is None
+                                            else min(STREAM_TIMEOUT, remaining))
+            try:
+                async with await self.backend.acreate(request, stream=True, stream_options={"include_usage": True},
+                                                      timeout=STREAM_IDLE_TIMEOUT) as stream:
+                    async for chunk in stream:
+                        writer.add(chunk)
+            except BaseException as e:
+                writer.fail(e)
+                raise
+            return writer.finish()
+        return await self.backend.acreate(request)
+    
+    async def _complete_async(self, request, step, stream_to=None):
+        """Like _complete, with self.backend.acreate; the whole call is cut off at the run's deadline"""
+        response = self.response_cache.load(request) if self.response_cache else None
+        if response is not None:
+            self.metrics.record(step, request, response, cached=True)
+            return response
+        
+        trace = self.metrics.begin(step, request)
+        trace_token = CALL_TRACE.set(trace)
+        try:
+            remaining = self.metrics.remaining()
+            try:
+                response = await asyncio.wait_for(self._request_async(request, stream_to), remaining)
+            except TimeoutError as e:
+                if remaining is not None and self.metrics.remaining() <= 0:
+                    raise BudgetExceededError(f"Time budget of {self.metrics.time_budget}s ran out during {step}") from e
+                raise
+        except (Exception, asyncio.CancelledError) as e:
+            self.metrics.record(step, request, trace=trace, error=e)
+            raise
+        finally:
+            CALL_TRACE.reset(trace_token)
+        
+        self.metrics.record(step, request, response, trace=trace)
+        if self.response_cache:
+            self.response_cache.store(request, response)
+        return response
+    
+    def _company_info_request(self):
+        return {
+            "model": "gpt-4o", # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant that provides detailed company information in JSON format."},
+                {"role": "user", "content": "Generate detailed EHB Technologies company information including name, slogan, website, CEO, departments, tech stack, and timeline. Format as JSON."}
+            ],
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _save_company_info(self, response):
+        company_info = json.loads(response.choices[0].message.content)
+        
+        # Save raw response
+        with open(self.output_dir / "company_info.json", "w") as f:
+            json.dump(company_info, f, indent=2)
+        
+        # Convert to JS module format for integration hub
+        self._convert_to_js_module(company_info, "companyInfo.js")
+        
+        logger.info("Successfully fetched and saved company data")
+        return company_info
+    
     def fetch_company_data_from_openai(self):
         """Fetch company data using the OpenAI API"""
         logger.info("Fetching company data from OpenAI")
         
         try:
-            # Basic company info
-            company_info_response = client.chat.completions.create(
-                model="gpt-4o", # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that provides detailed company information in JSON format."},
-                    {"role": "user", "content": "Generate detailed EHB Technologies company information including name, slogan, website, CEO, departments, tech stack, and timeline. Format as JSON."}
-                ],
-                response_format={"type": "json_object"}
-            )
-            
-            company_info = json.loads(company_info_response.choices[0].message.content)
-            
-            # Save raw response
-            with open(self.output_dir / "company_info.json", "w") as f:
-                json.dump(company_info, f, indent=2)
-            
-            # Convert to JS module format for integration hub
-            self._convert_to_js_module(company_info, "companyInfo.js")
-            
-            logger.info("Successfully fetched and saved company data")
-            return company_info
+            return self._save_company_info(self._complete(self._company_info_request(), "company_info"))
             
         except Exception as e:
             logger.error(f"Error fetching company data: {e}")
             raise
     
+    def _architecture_request(self):
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are a software architect that provides detailed system architecture in JSON format."},
+                {"role": "user", "content": "Generate a detailed architecture for the EHB Technologies system including frontend, backend, database, authentication, and API integration components. Format as JSON."}
+            ],
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _save_architecture(self, response):
+        architecture = json.loads(response.choices[0].message.content)
+        
+        # Save raw response
+        with open(self.output_dir / "system_architecture.json", "w") as f:
+            json.dump(architecture, f, indent=2)
+        
+        # Convert to JS module
+        self._convert_to_js_module(architecture, "systemArchitecture.js")
+        
+        logger.info("Successfully fetched and saved system architecture")
+        return architecture
+    
     def fetch_architecture_from_openai(self):
         """Fetch system architecture using the OpenAI API"""
         logger.info("Fetching system architecture from OpenAI")
         
         try:
-            architecture_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a software architect that provides detailed system architecture in JSON format."},
-                    {"role": "user", "content": "Generate a detailed architecture for the EHB Technologies system including frontend, backend, database, authentication, and API integration components. Format as JSON."}
-                ],
-                response_format={"type": "json_object"}
-            )
-            
-            architecture = json.loads(architecture_response.choices[0].message.content)
-            
-            # Save raw response
-            with open(self.output_dir / "system_architecture.json", "w") as f:
-                json.dump(architecture, f, indent=2)
-            
-            # Convert to JS module
-            self._convert_to_js_module(architecture, "systemArchitecture.js")
-            
-            logger.info("Successfully fetched and saved system architecture")
-            return architecture
+            return self._save_architecture(self._complete(self._architecture_request(), "architecture"))
             
         except Exception as e:
             logger.error(f"Error fetching system architecture: {e}")
             raise
     
+    def _roadmap_request(self):
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are a project manager that provides detailed development roadmaps in JSON format."},
+                {"role": "user", "content": "Generate a detailed development roadmap for the EHB Technologies system including phases, milestones, and priorities. Format as JSON."}
+            ],
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _save_roadmap(self, response):
+        roadmap = json.loads(response.choices[0].message.content)
+        
+        # Save raw response
+        with open(self.output_dir / "development_roadmap.json", "w") as f:
+            json.dump(roadmap, f, indent=2)
+        
+        # Convert to JS module
+        self._convert_to_js_module(roadmap, "developmentRoadmap.js")
+        
+        logger.info("Successfully fetched and saved development roadmap")
+        return roadmap
+    
     def fetch_roadmap_from_openai(self):
         """Fetch development roadmap using the OpenAI API"""
         logger.info("Fetching development roadmap from OpenAI")
         
         try:
-            roadmap_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a project manager that provides detailed development roadmaps in JSON format."},
-                    {"role": "user", "content": "Generate a detailed development roadmap for the EHB Technologies system including phases, milestones, and priorities. Format as JSON."}
-                ],
-                response_format={"type": "json_object"}
-            )
-            
-            roadmap = json.loads(roadmap_response.choices[0].message.content)
-            
-            # Save raw response
-            with open(self.output_dir / "development_roadmap.json", "w") as f:
-                json.dump(roadmap, f, indent=2)
-            
-            # Convert to JS module
-            self._convert_to_js_module(roadmap, "developmentRoadmap.js")
-            
-            logger.info("Successfully fetched and saved development roadmap")
-            return roadmap
+            return self._save_roadmap(self._complete(self._roadmap_request(), "roadmap"))
             
         except Exception as e:
             logger.error(f"Error fetching development roadmap: {e}")
             raise
     
+    def _frontend_template_request(self):
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are a frontend developer that provides React/Next.js component templates."},
+                {"role": "user", "content": "Generate key React components for the EHB Technologies dashboard including a Dashboard component, Analytics component, and User Profile component using Tailwind CSS."}
+            ]
+        }
+    
+    def _backend_template_request(self):
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are a backend developer that provides Node.js/Express API templates."},
+                {"role": "user", "content": "Generate key Express.js API endpoints for the EHB Technologies system including user authentication, data retrieval, and analytics endpoints."}
+            ]
+        }
+    
+    def _save_frontend_template(self, response):
+        frontend_code = response.choices[0].message.content
+        _write_atomic(self.output_dir / "frontend_templates.js", frontend_code)
+        return frontend_code
+    
+    def _save_backend_template(self, response):
+        backend_code = response.choices[0].message.content
+        _write_atomic(self.output_dir / "backend_templates.js", backend_code)
+        return backend_code
+    
     def fetch_code_templates(self):
         """Fetch code templates for important components"""
         logger.info("Fetching code templates from OpenAI")
         
         try:
             # Frontend component templates
-            frontend_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a frontend developer that provides React/Next.js component templates."},
-                    {"role": "user", "content": "Generate key React components for the EHB Technologies dashboard including a Dashboard component, Analytics component, and User Profile component using Tailwind CSS."}
-                ]
-            )
-            
-            frontend_code = frontend_response.choices[0].message.content
+            frontend_response = self._complete(self._frontend_template_request(), "frontend_template",
+                                               stream_to=self.output_dir / "frontend_templates.js")
             
             # Backend API templates
-            backend_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a backend developer that provides Node.js/Express API templates."},
-                    {"role": "user", "content": "Generate key Express.js API endpoints for the EHB Technologies system including user authentication, data retrieval, and analytics endpoints."}
-                ]
-            )
-            
-            backend_code = backend_response.choices[0].message.content
+            backend_response = self._complete(self._backend_template_request(), "backend_template",
+                                              stream_to=self.output_dir / "backend_templates.js")
             
             # Save to files
-            with open(self.output_dir / "frontend_templates.js", "w") as f:
-                f.write(frontend_code)
-            
-            with open(self.output_dir / "backend_templates.js", "w") as f:
-                f.write(backend_code)
+            frontend_code = self._save_frontend_template(frontend_response)
+            backend_code = self._save_backend_template(backend_response)
             
             logger.info("Successfully fetched and saved code templates")
             return {
@@ -197,47 +600,105 @@ module.exports = {json.dumps(data, indent=2)};
         
         logger.info(f"Saved JS module: {filename}")
     
+    def _priorities_request(self, roadmap):
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {"role": "system", "content": "You are a project manager specializing in development prioritization."},
+                {"role": "user", "content": f"Based on this roadmap, what should be the top 3 development priorities? Roadmap: {json.dumps(roadmap)}"}
+            ]
+        }
+    
+    def _save_priorities(self, response):
+        priorities = response.choices[0].message.content
+        
+        # Save priorities
+        with open(self.output_dir / "development_priorities.txt", "w") as f:
+            f.write(priorities)
+        
+        logger.info("Successfully analyzed and saved development priorities")
+        return priorities
+    
     def analyze_development_priorities(self, roadmap):
         """Analyze the roadmap to determine development priorities"""
         logger.info("Analyzing development priorities")
         
         try:
-            priorities_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a project manager specializing in development prioritization."},
-                    {"role": "user", "content": f"Based on this roadmap, what should be the top 3 development priorities? Roadmap: {json.dumps(roadmap)}"}
-                ]
-            )
-            
-            priorities = priorities_response.choices[0].message.content
-            
-            # Save priorities
-            with open(self.output_dir / "development_priorities.txt", "w") as f:
-                f.write(priorities)
-            
-            logger.info("Successfully analyzed and saved development priorities")
-            return priorities
+            return self._save_priorities(self._complete(self._priorities_request(roadmap), "priorities"))
             
         except Exception as e:
             logger.error(f"Error analyzing development priorities: {e}")
             raise
     
+    def _integration_graph(self):
+        """The requests of run_full_integration as
+        name -> (dependencies, request builder, result handler, file the completion is streamed to)
+        
+        A request builder takes the results of its dependencies; dependencies are listed before the
+        steps that need them.
+        """
+        return {
+            "company_info": ((), self._company_info_request, self._save_company_info, None),
+            "architecture": ((), self._architecture_request, self._save_architecture, None),
+            "roadmap": ((), self._roadmap_request, self._save_roadmap, None),
+            "priorities": (("roadmap",), self._priorities_request, self._save_priorities, None),
+            "frontend_template": ((), self._frontend_template_request, self._save_frontend_template,
+                                  self.output_dir / "frontend_templates.js"),
+            "backend_template": ((), self._backend_template_request, self._save_backend_template,
+                                 self.output_dir / "backend_templates.js")
+        }
+    
+    async def _run_integration_graph(self, graph):
+        """Run every step of graph as soon as its dependencies are done; returns name -> result"""
+        start = time.perf_counter()
+        tasks = {}
+        
+        async def run_step(name):
+            dependencies, build_request, handle_response, stream_to = graph[name]
+            inputs = [await tasks[dependency] for dependency in dependencies]
+            
+            logger.info(f"Requesting {name} at +{time.perf_counter() - start:.2f}s")
+            try:
+                response = await self._complete_async(build_request(*inputs), name, stream_to)
+                result = handle_response(response)
+            except Exception as e:
+                logger.error(f"Error in integration step {name}: {e}")
+                raise
+            logger.info(f"Finished {name} at +{time.perf_counter() - start:.2f}s")
+            return result
+        
+        for name, (dependencies, *_) in graph.items():
+            missing = [dependency for dependency in dependencies if dependency not in tasks]
+            if missing:
+                raise ValueError(f"Integration step {name} depends on {missing}, which must come first")
+            tasks[name] = asyncio.ensure_future(run_step(name))
+        
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            # The backend's async client is bound to this event loop
+            await self.backend.aclose()
+        
+        return dict(zip(tasks, results))
+    
     def run_full_integration(self):
-        """Run the full integration process"""
+        """Run the full integration process
+        
+        The requests run concurrently on the backend's async client; only the priorities
+        analysis waits for the roadmap. Per-call metrics are appended to
+        ai_call_metrics.jsonl and summarised in the log, also when the run fails.
+        """
         logger.info("Starting full AI integration process")
+        self.metrics.start()
         
         try:
-            # Fetch all data
-            company_info = self.fetch_company_data_from_openai()
-            architecture = self.fetch_architecture_from_openai()
-            roadmap = self.fetch_roadmap_from_openai()
-            
-            # Analyze priorities
-            priorities = self.analyze_development_priorities(roadmap)
-            
-            # Fetch code templates
-            code_templates = self.fetch_code_templates()
+            results = asyncio.run(self._run_integration_graph(self._integration_graph()))
+            priorities = results["priorities"]
             
             # Create a summary report
             summary = {
@@ -258,19 +719,40 @@ module.exports = {json.dumps(data, indent=2)};
         except Exception as e:
             logger.error(f"Error in full integration process: {e}")
             raise
+        finally:
+            logger.info(f"Completion calls of this run:\n{self.metrics.table()}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate EHB data with the OpenAI API and integrate it")
+    parser.add_argument("--refresh", action="store_true",
+                        help="send every request to OpenAI even if a cached response exists (and cache the new ones)")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the response cache")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="wait for complete code templates instead of streaming them to <file>.partial")
+    parser.add_argument("--backend", choices=list(BACKENDS),
+                        help="LLM backend (default: $EHB_LLM_BACKEND or openai); stub answers offline with canned text")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint to send requests to (default: $OPENAI_BASE_URL)")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY,
+                        help=f"most requests sent at once (default: {MAX_CONCURRENCY})")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="stop sending requests once the run has used this many prompt + completion tokens")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="stop sending requests once the run has taken this many seconds")
+    args = parser.parse_args()
+    
+    backend_options = {"base_url": args.base_url} if args.base_url else {}
+    backend = create_backend(args.backend, max_concurrency=args.max_concurrency, **backend_options)
+    
     # If OPENAI_API_KEY is not set, prompt the user
-    if not os.environ.get("OPENAI_API_KEY"):
+    if not backend.is_configured():
         print("OPENAI_API_KEY environment variable not set.")
         print("Please enter your OpenAI API key:")
         api_key = input("> ")
         os.environ["OPENAI_API_KEY"] = api_key
     
     # Run the integrator
-    import datetime  # Import here to avoid issues with the _convert_to_js_module method
-    
-    integrator = EhbAiIntegrator()
+    integrator = EhbAiIntegrator(use_cache=not args.no_cache, refresh=args.refresh, stream=not args.no_stream,
+                                 backend=backend, token_budget=args.token_budget, time_budget=args.time_budget)
     try:
         summary = integrator.run_full_integration()
         print("\n=== AI Integration Complete ===")
@@ -283,4 +765,7 @@ if __name__ == "__main__":
         print("\nNext steps: Review the generated data and start development based on the priorities")
     except Exception as e:
         print(f"Integration process failed: {e}")
-        print("Check the log file for details: ehb_ai_integration.log")
\ No newline at end of file
+        print("Check the log file for details: ehb_ai_integration.log")
+    
+    print("\nCompletion calls (details in", integrator.output_dir / CALL_METRICS_FILENAME, end="):\n")
+    print(integrator.metrics.table())
\ No newline at end of file
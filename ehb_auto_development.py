@@ -15,6 +15,7 @@ import json
 import logging
 import subprocess
 import time
+import argparse
 from pathlib import Path
 
 # Set up logging
@@ -35,11 +36,15 @@ logger.addHandler(console)
 class EhbAutoDevelopment:
     """Main class for automating the EHB development process"""
     
-    def __init__(self):
-        """Initialize the auto development process"""
+    def __init__(self, refresh_ai_cache=False):
+        """Initialize the auto development process
+        
+        refresh_ai_cache=True sends the OpenAI requests again instead of reusing cached responses.
+        """
         self.base_dir = Path(".")
         self.output_dir = Path("ehb_company_info")
         self.output_dir.mkdir(exist_ok=True)
+        self.refresh_ai_cache = refresh_ai_cache
         
         # ChatGPT URLs provided by the user
         self.chatgpt_urls = [
@@ -161,13 +166,17 @@ class EhbAutoDevelopment:
         """Fetch data from OpenAI API"""
         logger.info("Fetching data from OpenAI API")
         
-        if os.environ.get("OPENAI_API_KEY"):
+        sys.path.append(str(self.base_dir))
+        from ehb_llm_backends import create_backend
+        
+        # EHB_LLM_BACKEND=stub runs the integration offline, without an API key
+        backend = create_backend()
+        if backend.is_configured():
             try:
                 # Import the AI integrator
-                sys.path.append(str(self.base_dir))
                 from ehb_ai_integrator import EhbAiIntegrator
                 
-                integrator = EhbAiIntegrator()
+                integrator = EhbAiIntegrator(refresh=self.refresh_ai_cache, backend=backend)
                 summary = integrator.run_full_integration()
                 
                 logger.info("Successfully fetched data from OpenAI API")
@@ -210,15 +219,33 @@ class EhbAutoDevelopment:
         
         snippets_dir = Path("ehb_company_info/code_snippets")
         
-        if not snippets_dir.exists() or not any(snippets_dir.iterdir()):
+        if not snippets_dir.exists():
             logger.warning("No code snippets found to integrate")
             print("\n⚠️ No code snippets found to integrate")
             return False
         
+        # Snippets live in the content-addressed store; its index gives a stable order across runs
+        sys.path.append(str(self.base_dir))
+        from ehb_snippet_store import SnippetStore
+        from ehb_snippet_clusters import representatives
+        
+        store = SnippetStore(snippets_dir)
+        records = store.records()
+        
+        if not records:
+            logger.warning("No code snippets found to integrate")
+            print("\n⚠️ No code snippets found to integrate")
+            return False
+        
+        # Keep only the newest variant of each group of near-duplicate snippets
+        stored = len(records)
+        records = representatives(store, records, keep='newest')
+        print(f"\n🧬 {stored} stored snippets, {len(records)} after merging near-duplicates")
+        
         # Count snippets by type
-        js_snippets = list(snippets_dir.glob("*.js"))
-        ts_snippets = list(snippets_dir.glob("*.ts"))
-        py_snippets = list(snippets_dir.glob("*.py"))
+        js_snippets = [r for r in records if r['file'].endswith(".js")]
+        ts_snippets = [r for r in records if r['file'].endswith(".ts")]
+        py_snippets = [r for r in records if r['file'].endswith(".py")]
         
         print(f"\n📊 Found {len(js_snippets)} JavaScript, {len(ts_snippets)} TypeScript, and {len(py_snippets)} Python snippets")
         
@@ -226,38 +253,60 @@ class EhbAutoDevelopment:
         examples_dir = Path("ehb_company_info/examples")
         examples_dir.mkdir(exist_ok=True)
         
+        written = 0
+        
         # Integrate JavaScript snippets
         if js_snippets:
             js_examples_dir = examples_dir / "javascript"
             js_examples_dir.mkdir(exist_ok=True)
             
-            for i, snippet in enumerate(js_snippets):
-                target_path = js_examples_dir / f"example_{i+1}{snippet.suffix}"
-                with open(snippet, 'r', encoding='utf-8') as src:
-                    content = src.read()
-                
-                with open(target_path, 'w', encoding='utf-8') as dst:
-                    dst.write(f"/**\n * Example {i+1} from ChatGPT\n */\n\n")
-                    dst.write(content)
+            for i, record in enumerate(js_snippets):
+                target_path = js_examples_dir / f"example_{i+1}.js"
+                content = f"/**\n * Example {i+1} from ChatGPT\n */\n\n" + store.read(record)
+                written += self._write_if_changed(target_path, content)
         
         # Integrate Python snippets
         if py_snippets:
             py_examples_dir = examples_dir / "python"
             py_examples_dir.mkdir(exist_ok=True)
             
-            for i, snippet in enumerate(py_snippets):
-                target_path = py_examples_dir / f"example_{i+1}{snippet.suffix}"
-                with open(snippet, 'r', encoding='utf-8') as src:
-                    content = src.read()
-                
-                with open(target_path, 'w', encoding='utf-8') as dst:
-                    dst.write(f"'''\nExample {i+1} from ChatGPT\n'''\n\n")
-                    dst.write(content)
+            for i, record in enumerate(py_snippets):
+                target_path = py_examples_dir / f"example_{i+1}.py"
+                content = f"'''\nExample {i+1} from ChatGPT\n'''\n\n" + store.read(record)
+                written += self._write_if_changed(target_path, content)
+        
+        # Merging near-duplicates can shrink the example sets; drop numbers left over from larger runs
+        removed = self._remove_stale_examples(examples_dir / "javascript", ".js", len(js_snippets))
+        removed += self._remove_stale_examples(examples_dir / "python", ".py", len(py_snippets))
+        
+        print(f"📝 {written} example files written, {len(js_snippets) + len(py_snippets) - written} unchanged, "
+              f"{removed} stale removed")
         
         logger.info("Successfully integrated code snippets")
         print("\n✅ Successfully integrated code snippets into examples directory")
         return True
     
+    def _remove_stale_examples(self, directory, suffix, count):
+        """Delete example_N files in directory numbered above count; returns how many were deleted"""
+        removed = 0
+        for path in directory.glob(f"example_*{suffix}"):
+            number = path.stem[len("example_"):]
+            if number.isdigit() and int(number) > count:
+                path.unlink()
+                removed += 1
+        return removed
+    
+    def _write_if_changed(self, path, content):
+        """Write content to path unless the file already holds exactly that; returns 1 if written"""
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() == content:
+                    return 0
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return 1
+    
     def generate_development_plan(self):
         """Generate a development plan based on the collected data"""
         logger.info("Generating development plan")
@@ -450,6 +499,11 @@ class EhbAutoDevelopment:
         return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Automate the EHB development process")
+    parser.add_argument("--refresh", action="store_true",
+                        help="send the OpenAI requests again instead of reusing cached responses")
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("🚀 EHB AUTO DEVELOPMENT")
     print("=" * 80)
@@ -462,7 +516,7 @@ if __name__ == "__main__":
     print("\nPress Enter to continue or Ctrl+C to cancel...")
     input()
     
-    auto_dev = EhbAutoDevelopment()
+    auto_dev = EhbAutoDevelopment(refresh_ai_cache=args.refresh)
     try:
         auto_dev.run_auto_development()
     except KeyboardInterrupt:
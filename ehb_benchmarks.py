@@ -0,0 +1,752 @@
+"""
+EHB Benchmarks
+
+Performance checks for the EHB data collection scripts. Each benchmark builds
+a synthetic corpus, times the current implementation and verifies its output
+against a reference where one exists.
+
+Usage: python ehb_benchmarks.py <benchmark> [options]
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import time
+import tracemalloc
+
+def _reference_extract_company_info(text):
+    """The original three-regex ehb_scraper.extract_company_info, kept as the correctness oracle."""
+    info = {}
+    
+    company_name_match = re.search(r'(EHB[- ]Technologies(?:[ -]Limited)?)', text, re.IGNORECASE)
+    if company_name_match:
+        info['company_name'] = company_name_match.group(1)
+    
+    services = re.findall(r'((?:EHB|JPS|OLS|WMS|HMS|HPS)[- ][A-Za-z]+(?: Service| System)?)', text)
+    if services:
+        info['services'] = list(set(services))
+    
+    descriptions = {}
+    service_desc_matches = re.findall(r'((?:EHB|JPS|OLS|WMS|HMS|HPS)[- ][A-Za-z]+(?: Service| System)?)[^\n.]*[^A-Za-z]is[^A-Za-z]([^\n.]+)', text, re.IGNORECASE)
+    for service, desc in service_desc_matches:
+        descriptions[service] = desc.strip()
+    
+    if descriptions:
+        info['service_descriptions'] = descriptions
+    
+    return info
+
+def _normalize_company_info(info):
+    """Make extraction results comparable (services come from a set, so their order is arbitrary)."""
+    info = dict(info)
+    if 'services' in info:
+        info['services'] = sorted(info['services'])
+    return info
+
+def build_company_corpus(total_mb=8, doc_kb=64, seed=42):
+    """Build synthetic Replit-like project pages mixing service mentions, descriptions and filler."""
+    rng = random.Random(seed)
+    codes = ['EHB', 'JPS', 'OLS', 'WMS', 'HMS', 'HPS', 'ehb', 'Jps']
+    names = ['Dashboard', 'Wallet', 'Marketplace', 'Franchise', 'Education', 'Medical', 'Law', 'Tube']
+    suffixes = ['', ' Service', ' System', ' service']
+    filler = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+              "incididunt ut labore et dolore magna aliqua").split()
+    
+    def sentence():
+        roll = rng.random()
+        service = f"{rng.choice(codes)}{rng.choice('- ')}{rng.choice(names)}{rng.choice(suffixes)}"
+        if roll < 0.05:
+            return f"Welcome to EHB{rng.choice('- ')}Technologies{rng.choice(['', ' Limited', '-Limited'])}."
+        if roll < 0.25:
+            return f"{service} is {' '.join(rng.choices(filler, k=8))}."
+        if roll < 0.4:
+            return f"We also run {service} for our partners."
+        return ' '.join(rng.choices(filler, k=12)).capitalize() + rng.choice(['.', '.\n', '\n\n'])
+    
+    docs = []
+    doc_chars = doc_kb * 1024
+    for _ in range(max(1, (total_mb * 1024) // doc_kb)):
+        parts = []
+        size = 0
+        while size < doc_chars:
+            part = sentence()
+            parts.append(part)
+            size += len(part) + 1
+        docs.append(' '.join(parts))
+    return docs
+
+def benchmark_company_extraction(total_mb=8, doc_kb=64):
+    """Time ehb_scraper.extract_company_info against the original implementation."""
+    import ehb_scraper
+    
+    docs = build_company_corpus(total_mb=total_mb, doc_kb=doc_kb)
+    corpus_mb = sum(len(doc) for doc in docs) / (1024 * 1024)
+    print(f"Corpus: {len(docs)} documents, {corpus_mb:.1f} MB")
+    
+    start = time.perf_counter()
+    expected = [_reference_extract_company_info(doc) for doc in docs]
+    reference_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    results = [ehb_scraper.extract_company_info(doc) for doc in docs]
+    engine_time = time.perf_counter() - start
+    
+    for label, seconds in [("reference (3 regexes)", reference_time),
+                           ("prefix-scan engine", engine_time)]:
+        print(f"  {label:<24} {len(docs) / seconds:10.1f} docs/sec  {corpus_mb / seconds:8.2f} MB/sec")
+    
+    mismatches = sum(1 for want, got in zip(expected, results)
+                     if _normalize_company_info(want) != _normalize_company_info(got))
+    print(f"  Output identical to reference: {'yes' if mismatches == 0 else f'NO, {mismatches} documents differ'}")
+
+def _reference_parse_development_roadmap(content):
+    """The original find()-based phase slicing from EhbChatGptScraper.extract_development_roadmap."""
+    roadmap = {'phases': []}
+    
+    roadmap_match = re.search(r"(?:Development|Product) Roadmap:?\s*([^\n]+(?:\n\s*[^\n]+)*)", content, re.IGNORECASE)
+    if roadmap_match:
+        phase_matches = re.findall(r"(?:Phase|Stage) (\d+):?\s*([^:]+)(?::|\n)", content, re.IGNORECASE)
+        for phase_num, phase_name in phase_matches:
+            phase = {'name': f"Phase {phase_num}: {phase_name.strip()}", 'tasks': []}
+            phase_start = content.find(f"Phase {phase_num}")
+            phase_end = content.find(f"Phase {int(phase_num) + 1}", phase_start)
+            if phase_end == -1:
+                phase_end = len(content)
+            for task in re.findall(r"[-•*]\s*([^\n]+)", content[phase_start:phase_end]):
+                phase['tasks'].append({'name': task.strip(), 'status': 'pending'})
+            roadmap['phases'].append(phase)
+    
+    if not roadmap['phases']:
+        roadmap_items = re.findall(r"[-•*]\s*([^\n]+)", content)
+        if roadmap_items:
+            roadmap['phases'].append({
+                'name': 'Development Roadmap',
+                'tasks': [{'name': item.strip(), 'status': 'pending'} for item in roadmap_items]
+            })
+    
+    return roadmap
+
+def build_roadmap_transcript(phases, tasks_per_phase=8, seed=3):
+    """Build a well-formed roadmap transcript: one 'Phase N: name:' heading per phase followed by bullets."""
+    rng = random.Random(seed)
+    verbs = ["Build", "Design", "Test", "Deploy", "Document", "Integrate", "Review", "Migrate"]
+    nouns = ["wallet API", "dashboard", "affiliate tree", "auth flow", "GoSellr store", "JPS portal"]
+    parts = ["Here is the EHB Development Roadmap: a phased plan for the platform.\n\n"]
+    for n in range(1, phases + 1):
+        parts.append(f"Phase {n}: {rng.choice(verbs)} the {rng.choice(nouns)}:\n")
+        for _ in range(tasks_per_phase):
+            parts.append(f"- {rng.choice(verbs)} {rng.choice(nouns)} for release {n}\n")
+        parts.append(f"Notes for this phase. {' '.join(rng.choices(nouns, k=20))}\n\n")
+    return ''.join(parts)
+
+def benchmark_roadmap_segmentation(phase_counts=(100, 200, 400, 800)):
+    """Time ehb_chatgpt_scraper.parse_development_roadmap against the original phase slicing."""
+    import ehb_chatgpt_scraper
+    
+    for phases in phase_counts:
+        content = build_roadmap_transcript(phases)
+        
+        start = time.perf_counter()
+        expected = _reference_parse_development_roadmap(content)
+        reference_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        result = ehb_chatgpt_scraper.parse_development_roadmap(content)
+        segmenter_time = time.perf_counter() - start
+        
+        same = "identical" if result == expected else "DIFFERENT"
+        print(f"  {phases:5d} phases ({len(content) / 1024:7.0f} KB): reference {reference_time * 1000:9.1f} ms, "
+              f"segmenter {segmenter_time * 1000:7.1f} ms, output {same}")
+
+def build_conversation_page(messages=400, seed=7):
+    """Build a synthetic ChatGPT shared-conversation page with deep markup around the messages."""
+    rng = random.Random(seed)
+    words = "the EHB dashboard service uses a react frontend with an express api and postgres storage".split()
+    parts = ['<!DOCTYPE html><html><head><title>Shared conversation</title>']
+    parts += [f'<script src="/_next/static/chunk-{i}.js"></script>' for i in range(40)]
+    parts.append('</head><body><div id="__next"><main class="flex">')
+    for i in range(messages):
+        body = ' '.join(rng.choices(words, k=60))
+        parts.append(f'<div class="group w-full" data-testid="turn-{i}"><div class="flex gap-4"><span class="avatar">'
+                     f'<svg width="24"><path d="M0 0h24v24H0z"/></svg></span>'
+                     f'<div class="markdown prose w-full"><p>{body}</p><ul><li>{body[:80]}</li></ul>'
+                     f'<pre><code class="language-js">const x{i} = {i};</code></pre></div></div></div>')
+    parts.append('</main></div>')
+    parts.append('<script id="__NEXT_DATA__" type="application/json">{"props": {"pageProps": {}}}</script>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+def benchmark_html_parsers(pages_dir=None, repeat=3):
+    """Compare parse time and peak memory of the scraper's HTML parser backends on saved pages."""
+    import ehb_chatgpt_scraper
+    
+    pages_dir = pages_dir or os.path.join("ehb_company_info", "chatgpt_content")
+    paths = sorted(glob.glob(os.path.join(pages_dir, "*.html")))
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                pages.append(f.read())
+        print(f"Pages: {len(pages)} saved pages from {pages_dir}")
+    else:
+        pages = [build_conversation_page()]
+        print(f"Pages: no saved pages in {pages_dir}, using a synthetic {len(pages[0]) / 1024:.0f} KB page")
+    
+    backends = [(parser, targeted) for parser in ehb_chatgpt_scraper.HTML_PARSERS for targeted in (False, True)
+                if parser != 'lxml' or ehb_chatgpt_scraper.HAS_LXML]
+    baseline = None
+    for parser, targeted in backends:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = [ehb_chatgpt_scraper.parse_conversation_html(page, parser, targeted) for page in pages]
+            timings.append(time.perf_counter() - start)
+        
+        tracemalloc.start()
+        for page in pages:
+            ehb_chatgpt_scraper.parse_conversation_html(page, parser, targeted)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        baseline = baseline if baseline is not None else results
+        label = f"{parser}{' + SoupStrainer' if targeted else ''}"
+        same = "same output" if results == baseline else "DIFFERENT output"
+        print(f"  {label:<26} {min(timings) * 1000:9.1f} ms  peak {peak / (1024 * 1024):7.1f} MB  {same}")
+
+def _reference_extract_system_architecture(content, services=('Stripe', 'OpenAI', 'Anthropic', 'AWS', 'Google Cloud', 'Twilio')):
+    """The original per-keyword scans from EhbChatGptScraper.extract_system_architecture,
+    with one scan per third-party service in services."""
+    architecture = {'components': [], 'integrations': [], 'databases': []}
+    
+    for comp_name, comp_desc in re.findall(r"[-•*]\s*([A-Za-z0-9_\- ]+)(?:\s*-\s*|\s*:\s*)([^\n]+)", content):
+        architecture['components'].append({'name': comp_name.strip(), 'description': comp_desc.strip()})
+    
+    if "Database" in content or "MongoDB" in content or "PostgreSQL" in content:
+        db_match = re.search(r"(?:Database|Data Storage):?\s*([^\n]+)", content, re.IGNORECASE)
+        if db_match:
+            db_text = db_match.group(1).strip()
+            architecture['databases'].append({
+                'name': db_text,
+                'type': 'SQL' if any(db in db_text for db in ['SQL', 'PostgreSQL', 'MySQL']) else 'NoSQL'
+            })
+        for db in ['MongoDB', 'PostgreSQL', 'MySQL', 'Supabase', 'Firebase']:
+            if db in content and not any(d['name'] == db for d in architecture['databases']):
+                architecture['databases'].append({'name': db, 'type': 'NoSQL' if db in ['MongoDB', 'Firebase'] else 'SQL'})
+    
+    for keyword in ['API Integration', 'Third-party', 'Integration', 'OAuth', 'Payment Gateway', 'Authentication Provider']:
+        if keyword in content:
+            integration_match = re.search(f"{keyword}:?\\s*([^\\n]+)", content, re.IGNORECASE)
+            if integration_match:
+                architecture['integrations'].append({'name': integration_match.group(1).strip(), 'type': keyword})
+    
+    for integration in services:
+        if integration in content and not any(i['name'] == integration for i in architecture['integrations']):
+            architecture['integrations'].append({'name': integration, 'type': 'Third-party Service'})
+    
+    return architecture
+
+def build_architecture_document(size_kb, seed=11):
+    """Build an architecture write-up that mentions the default keywords in mixed case, late in the text."""
+    rng = random.Random(seed)
+    words = ("the EHB platform uses a gateway service with queues workers caches and a dashboard "
+             "for franchise affiliate wallet and data flows").split()
+    parts = []
+    size = 0
+    while size < size_kb * 1024:
+        line = ' '.join(rng.choices(words, k=16)) + '\n'
+        parts.append(line)
+        size += len(line)
+    parts.append("System Architecture:\n- API Gateway: routes requests\n- Wallet Service - balances\n"
+                 "data storage: PostgreSQL with a Redis cache\nMongoDB for logs, Firebase for push\n"
+                 "oauth: Google and GitHub\nPayment Gateway: Stripe\nIntegration: Twilio SMS, OpenAI\n")
+    return ''.join(parts)
+
+def benchmark_architecture_extraction(sizes_kb=(256, 1024, 4096), extra_keywords=(0, 300)):
+    """Time ehb_chatgpt_scraper.parse_system_architecture against the per-keyword scans, and
+    show how the single-pass scanner scales with the size of the keyword lists."""
+    import ehb_chatgpt_scraper
+    
+    for size_kb in sizes_kb:
+        content = build_architecture_document(size_kb)
+        
+        for extra in extra_keywords:
+            keywords = dict(ehb_chatgpt_scraper.ARCHITECTURE_KEYWORDS)
+            keywords['third_party_services'] = keywords['third_party_services'] + [f"Service{i}" for i in range(extra)]
+            scanner = ehb_chatgpt_scraper.architecture_scanner(keywords)
+            
+            start = time.perf_counter()
+            expected = _reference_extract_system_architecture(content, keywords['third_party_services'])
+            reference_time = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            result = ehb_chatgpt_scraper.parse_system_architecture(content, keywords, scanner)
+            scanner_time = time.perf_counter() - start
+            
+            same = "identical" if result == expected else "DIFFERENT"
+            print(f"  {size_kb:6d} KB, {len(scanner.keywords):3d} keywords: reference {reference_time * 1000:8.1f} ms, "
+                  f"scanner {scanner_time * 1000:8.1f} ms, output {same}")
+
+def _reference_guess_language(code):
+    """The keyword heuristic the scraper used before the token-weight classifier."""
+    language = 'javascript'  # Default
+    if 'function' in code and 'def ' not in code:
+        language = 'javascript'
+    elif 'def ' in code or 'import ' in code and '#' in code:
+        language = 'python'
+    elif '<html>' in code.lower() or '</div>' in code:
+        language = 'html'
+    return language
+
+# Snippet templates per language, in the style ChatGPT answers use; NAME and VALUE are filled in per sample
+LANGUAGE_SAMPLES = {
+    'javascript': [
+        "const NAME = require('express');\nconst app = NAME();\n\napp.get('/api/VALUE', async (req, res) => {\n  const items = await db.find({});\n  res.json(items);\n});\n\nmodule.exports = app;",
+        "function NAME(items) {\n  let total = 0;\n  for (const item of items) {\n    if (item.price !== undefined) {\n      total += item.price;\n    }\n  }\n  console.log('total', total);\n  return total;\n}",
+        "document.getElementById('VALUE').addEventListener('click', () => {\n  fetch('/api/NAME')\n    .then(response => response.json())\n    .then(data => console.log(data));\n});",
+    ],
+    'typescript': [
+        "interface NAME {\n  id: number;\n  name: string;\n  active: boolean;\n}\n\nexport async function getNAME(id: number): Promise<NAME> {\n  const response = await fetch(`/api/VALUE/${id}`);\n  return response.json() as Promise<NAME>;\n}",
+        "export class NAMEService {\n  private readonly cache: Record<string, number> = {};\n\n  constructor(private http: HttpClient) {}\n\n  get(key: string): number | undefined {\n    return this.cache[key];\n  }\n}",
+        "type NAME = 'VALUE' | 'pending' | 'done';\n\nconst labels: Record<NAME, string> = {\n  VALUE: 'Open',\n  pending: 'Waiting',\n  done: 'Closed',\n};\n\nexport function label(status: NAME): string {\n  return labels[status];\n}",
+    ],
+    'jsx': [
+        "import React, { useState } from 'react';\n\nfunction NAME() {\n  const [count, setCount] = useState(0);\n  return (\n    <div className=\"VALUE\">\n      <button onClick={() => setCount(count + 1)}>Add</button>\n      <p>{count}</p>\n    </div>\n  );\n}\n\nexport default NAME;",
+        "const NAME = ({ items }) => (\n  <ul className=\"list\">\n    {items.map(item => <li key={item.id}>{item.VALUE}</li>)}\n  </ul>\n);\n\nexport default NAME;",
+    ],
+    'tsx': [
+        "import React, { useState } from 'react';\n\ninterface NAMEProps {\n  title: string;\n  onSave: (value: string) => void;\n}\n\nexport const NAME: React.FC<NAMEProps> = ({ title, onSave }) => {\n  const [VALUE, setValue] = useState<string>('');\n  return (\n    <form className=\"form\" onSubmit={() => onSave(VALUE)}>\n      <h2>{title}</h2>\n      <input value={VALUE} onChange={e => setValue(e.target.value)} />\n    </form>\n  );\n};",
+        "type NAMEProps = { items: string[]; active?: boolean };\n\nexport default function NAME({ items, active }: NAMEProps) {\n  return <div className={active ? 'VALUE' : ''}>{items.length}</div>;\n}",
+    ],
+    'python': [
+        "import os\nimport json\n\ndef NAME(path):\n    \"\"\"Load the VALUE settings\"\"\"\n    if not os.path.exists(path):\n        return None\n    with open(path, 'r') as f:\n        return json.load(f)",
+        "class NAME:\n    def __init__(self, VALUE=None):\n        self.VALUE = VALUE or []\n\n    def add(self, item):\n        self.VALUE.append(item)\n        return len(self.VALUE)",
+        "from fastapi import FastAPI\n\napp = FastAPI()\n\n@app.get('/VALUE')\nasync def NAME(limit: int = 10):\n    items = [x for x in range(limit) if x % 2]\n    return {'items': items}",
+        "for NAME in VALUE:\n    try:\n        result = process(NAME)\n    except ValueError as e:\n        print(f'failed: {e}')\n    else:\n        print(result)",
+    ],
+    'html': [
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n  <meta charset=\"UTF-8\">\n  <title>NAME</title>\n  <link rel=\"stylesheet\" href=\"style.css\">\n</head>\n<body>\n  <div class=\"VALUE\">\n    <h1>NAME</h1>\n  </div>\n</body>\n</html>",
+        "<div class=\"NAME\">\n  <ul>\n    <li><a href=\"/VALUE\">Home</a></li>\n    <li><a href=\"/about\">About</a></li>\n  </ul>\n  <button id=\"VALUE\">Sign up</button>\n</div>",
+    ],
+    'css': [
+        ".NAME {\n  display: flex;\n  align-items: center;\n  padding: 16px 24px;\n  background: #fff;\n  border-radius: 8px;\n}\n\n.NAME:hover {\n  color: rgba(0, 0, 0, 0.8);\n}",
+        "body {\n  margin: 0;\n  font-family: sans-serif;\n  font-size: 1rem;\n}\n\n@media (max-width: 768px) {\n  .VALUE {\n    width: 100%;\n    padding: 0.5rem;\n  }\n}",
+    ],
+    'json': [
+        "{\n  \"name\": \"NAME\",\n  \"version\": \"1.0.0\",\n  \"scripts\": {\n    \"start\": \"node index.js\",\n    \"test\": \"jest\"\n  },\n  \"dependencies\": {\n    \"express\": \"^4.18.2\"\n  }\n}",
+        "[\n  {\"id\": 1, \"NAME\": \"VALUE\", \"active\": true},\n  {\"id\": 2, \"NAME\": \"other\", \"active\": false, \"parent\": null}\n]",
+    ],
+    'markdown': [
+        "# NAME\n\nThis is the setup guide for the VALUE service.\n\n## Installation\n\n- Clone the repository\n- Run `npm install`\n- Copy `.env.example` to `.env`\n\nSee the [docs](https://example.com/docs) for **more details**.",
+        "## NAME\n\n| Field | Type | Description |\n|-------|------|-------------|\n| id | int | The VALUE identifier |\n| name | text | Display name |\n\n> Note: all fields are required.",
+    ],
+    'bash': [
+        "#!/bin/bash\nset -e\n\nNAME=\"VALUE\"\nif [ -z \"$NAME\" ]; then\n  echo \"missing name\"\n  exit 1\nfi\nmkdir -p /opt/$NAME && cd /opt/$NAME",
+        "npm install --save NAME\nnpm run build\nnpx prisma migrate dev --name VALUE",
+        "sudo apt-get update\nsudo apt-get install -y nginx\nsudo systemctl enable nginx\ncurl -fsSL https://example.com/NAME.sh | bash",
+        "git clone https://github.com/ehb/NAME.git\ncd NAME\npip install -r requirements.txt\nexport VALUE=1",
+    ],
+    'sql': [
+        "CREATE TABLE NAME (\n  id SERIAL PRIMARY KEY,\n  VALUE VARCHAR(255) NOT NULL,\n  created_at TIMESTAMP DEFAULT NOW()\n);",
+        "SELECT u.id, u.VALUE, COUNT(o.id) AS orders\nFROM NAME u\nLEFT JOIN orders o ON o.user_id = u.id\nWHERE u.active = TRUE\nGROUP BY u.id\nORDER BY orders DESC\nLIMIT 10;",
+        "INSERT INTO NAME (VALUE, email) VALUES ('EHB', 'info@ehb.com');\nUPDATE NAME SET VALUE = 'x' WHERE id = 1;",
+    ],
+    'java': [
+        "public class NAME {\n    private final String VALUE;\n\n    public NAME(String VALUE) {\n        this.VALUE = VALUE;\n    }\n\n    public static void main(String[] args) {\n        System.out.println(new NAME(\"EHB\").VALUE);\n    }\n}",
+        "@RestController\npublic class NAMEController {\n    @Autowired\n    private NAMEService service;\n\n    @GetMapping(\"/VALUE\")\n    public List<NAME> list() {\n        return service.findAll();\n    }\n}",
+    ],
+    'c': [
+        "#include <stdio.h>\n#include <stdlib.h>\n\nint NAME(int *values, int count) {\n    int total = 0;\n    for (int i = 0; i < count; i++) {\n        total += values[i];\n    }\n    return total;\n}\n\nint main(void) {\n    printf(\"%d\\n\", NAME(NULL, 0));\n    return 0;\n}",
+        "typedef struct {\n    char *VALUE;\n    size_t length;\n} NAME;\n\nNAME *NAME_new(size_t length) {\n    NAME *item = malloc(sizeof(NAME));\n    item->length = length;\n    return item;\n}",
+    ],
+    'cpp': [
+        "#include <iostream>\n#include <vector>\n\nint main() {\n    std::vector<int> NAME = {1, 2, 3};\n    for (auto VALUE : NAME) {\n        std::cout << VALUE << std::endl;\n    }\n    return 0;\n}",
+        "template <typename T>\nclass NAME {\npublic:\n    explicit NAME(T VALUE) : value_(VALUE) {}\n    virtual ~NAME() = default;\n    T get() const { return value_; }\nprivate:\n    T value_;\n};",
+    ],
+    'csharp': [
+        "using System;\nusing System.Linq;\n\nnamespace EHB\n{\n    public class NAME\n    {\n        public string VALUE { get; set; }\n\n        public static void Main(string[] args)\n        {\n            Console.WriteLine(\"Hello\");\n        }\n    }\n}",
+        "public async Task<IActionResult> NAME(int id)\n{\n    var VALUE = await _context.Items.FindAsync(id);\n    if (VALUE == null) return NotFound();\n    return Ok(VALUE);\n}",
+    ],
+    'go': [
+        "package main\n\nimport (\n    \"fmt\"\n    \"net/http\"\n)\n\nfunc NAME(w http.ResponseWriter, r *http.Request) {\n    fmt.Fprintf(w, \"VALUE\")\n}\n\nfunc main() {\n    http.HandleFunc(\"/\", NAME)\n    http.ListenAndServe(\":8080\", nil)\n}",
+        "func NAME(path string) ([]byte, error) {\n    data, err := os.ReadFile(path)\n    if err != nil {\n        return nil, fmt.Errorf(\"VALUE: %w\", err)\n    }\n    return data, nil\n}",
+    ],
+    'ruby': [
+        "class NAME < ApplicationRecord\n  has_many :VALUE\n  belongs_to :user\n\n  def full_name\n    \"#{first} #{last}\"\n  end\nend",
+        "require 'json'\n\ndef NAME(items)\n  items.each do |item|\n    puts item.VALUE unless item.nil?\n  end\nend",
+    ],
+    'php': [
+        "<?php\n\nnamespace App\\Http\\Controllers;\n\nclass NAMEController extends Controller\n{\n    public function index()\n    {\n        $VALUE = NAME::all();\n        return view('VALUE.index', ['items' => $VALUE]);\n    }\n}",
+        "<?php\n$NAME = $_POST['VALUE'] ?? '';\nif (isset($NAME)) {\n    echo htmlspecialchars($NAME);\n}",
+    ],
+    'rust': [
+        "use std::collections::HashMap;\n\nfn NAME(words: &[&str]) -> HashMap<String, usize> {\n    let mut counts = HashMap::new();\n    for w in words {\n        *counts.entry(w.to_string()).or_insert(0) += 1;\n    }\n    counts\n}",
+        "#[derive(Debug, Clone)]\npub struct NAME {\n    pub VALUE: String,\n    pub count: u32,\n}\n\nimpl NAME {\n    pub fn new(VALUE: &str) -> Self {\n        Self { VALUE: VALUE.to_string(), count: 0 }\n    }\n}",
+    ],
+    'swift': [
+        "import SwiftUI\n\nstruct NAME: View {\n    @State private var VALUE = 0\n\n    var body: some View {\n        VStack {\n            Text(\"Count: \\(VALUE)\")\n            Button(\"Add\") { VALUE += 1 }\n        }\n    }\n}",
+        "func NAME(_ VALUE: String?) -> Int {\n    guard let VALUE = VALUE else {\n        return 0\n    }\n    return VALUE.count\n}",
+    ],
+    'kotlin': [
+        "data class NAME(val id: Int, val VALUE: String)\n\nfun main() {\n    val items = listOf(NAME(1, \"a\"), NAME(2, \"b\"))\n    items.forEach { println(it.VALUE) }\n}",
+        "class NAMEViewModel : ViewModel() {\n    private val VALUE = MutableLiveData<String>()\n\n    fun load() {\n        viewModelScope.launch {\n            VALUE.value = repository.fetch()\n        }\n    }\n}",
+    ],
+    'scala': [
+        "object NAME extends App {\n  val VALUE = Seq(1, 2, 3)\n  println(VALUE.map(_ * 2).sum)\n}",
+        "sealed trait NAME\ncase class VALUE(id: Int) extends NAME\n\ndef describe(x: NAME): String = x match {\n  case VALUE(id) => s\"id $id\"\n}",
+    ],
+    'xml': [
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<project xmlns=\"http://maven.apache.org/POM/4.0.0\">\n  <groupId>com.ehb</groupId>\n  <artifactId>NAME</artifactId>\n  <version>1.0</version>\n</project>",
+        "<NAME>\n  <VALUE id=\"1\">first</VALUE>\n  <VALUE id=\"2\">second</VALUE>\n</NAME>",
+    ],
+    'yaml': [
+        "version: '3.8'\nservices:\n  NAME:\n    image: node:18\n    ports:\n      - \"3000:3000\"\n    environment:\n      - VALUE=1",
+        "name: CI\non: [push]\njobs:\n  build:\n    runs-on: ubuntu-latest\n    steps:\n      - uses: actions/checkout@v3\n      - run: npm test",
+        "apiVersion: apps/v1\nkind: Deployment\nmetadata:\n  name: NAME\nspec:\n  replicas: 2",
+    ],
+    'ini': [
+        "[NAME]\nhost=localhost\nport=5432\nVALUE=true\n\n; comment\n[logging]\nlevel=debug",
+    ],
+    'toml': [
+        "[package]\nname = \"NAME\"\nversion = \"0.1.0\"\nedition = \"2021\"\n\n[dependencies]\nVALUE = \"1.0\"",
+        "[tool.poetry]\nname = \"NAME\"\nversion = \"0.1.0\"\n\n[tool.poetry.dependencies]\npython = \"^3.10\"\nVALUE = \"^2.0\"",
+    ],
+    'dockerfile': [
+        "FROM node:18-alpine\nWORKDIR /app\nCOPY package*.json ./\nRUN npm install\nCOPY . .\nEXPOSE 3000\nCMD [\"node\", \"NAME.js\"]",
+        "FROM python:3.11-slim\nENV VALUE=1\nWORKDIR /NAME\nCOPY requirements.txt .\nRUN pip install -r requirements.txt\nENTRYPOINT [\"python\", \"main.py\"]",
+    ],
+}
+
+def build_language_corpus(per_language=40, seed=5):
+    """Build a labeled corpus of (language, code) pairs from LANGUAGE_SAMPLES.
+    
+    Each sample fills in fresh names and keeps a random run of the template's lines,
+    so the classifier also sees partial snippets.
+    """
+    rng = random.Random(seed)
+    names = ["user", "order", "wallet", "franchise", "affiliate", "payment", "profile", "dashboard", "report"]
+    corpus = []
+    for language, templates in LANGUAGE_SAMPLES.items():
+        for i in range(per_language):
+            template = templates[i % len(templates)]
+            code = template.replace("NAME", rng.choice(names).capitalize()).replace("VALUE", rng.choice(names))
+            lines = code.split('\n')
+            if i >= len(templates) and len(lines) > 4:
+                start = rng.randrange(len(lines) // 3)
+                lines = lines[start:start + rng.randrange(len(lines) // 2 + 1, len(lines) + 1)]
+            corpus.append((language, '\n'.join(lines)))
+    return corpus
+
+# Files written alongside LANGUAGE_WEIGHTS (they quote other languages in strings), kept out of held-out corpora
+LANGUAGE_TUNING_FILES = {"ehb_benchmarks.py", "ehb_language_classifier.py"}
+HELD_OUT_SKIP_DIRS = {".git", "node_modules", "__pycache__", ".venv", "venv", "dist", "build"}
+
+def build_held_out_corpus(source_dirs, max_per_language=300, seed=11):
+    """Build a labeled corpus of (language, code) pairs from real files, labeled by extension.
+    
+    Each file contributes one window of 5-40 consecutive non-empty lines, so samples are
+    snippet-sized. None of this code was looked at when LANGUAGE_WEIGHTS were set.
+    """
+    import ehb_chatgpt_scraper
+    
+    canonical = {ext: language for language, ext in reversed(ehb_chatgpt_scraper.LANGUAGE_EXTENSIONS.items())}
+    rng = random.Random(seed)
+    by_language = {}
+    for source_dir in source_dirs:
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = sorted(d for d in dirs if d not in HELD_OUT_SKIP_DIRS)
+            for name in sorted(files):
+                language = canonical.get(os.path.splitext(name)[1])
+                if language is None or name in LANGUAGE_TUNING_FILES or name.endswith(".min.js"):
+                    continue
+                try:
+                    with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                        lines = [line for line in f.read(200000).split("\n") if line.strip()]
+                except (OSError, UnicodeDecodeError):
+                    continue
+                if len(lines) < 5 or max(len(line) for line in lines) > 1000:
+                    continue
+                size = rng.randrange(5, 41)
+                start = rng.randrange(max(len(lines) - size, 0) + 1)
+                by_language.setdefault(language, []).append("\n".join(lines[start:start + size]))
+    
+    corpus = []
+    for language, codes in sorted(by_language.items()):
+        rng.shuffle(codes)
+        corpus.extend((language, code) for code in codes[:max_per_language])
+    return corpus
+
+def load_fenced_snippets(source_dirs):
+    """(language, code) pairs for the language-labeled code fences in .md and .txt files (pasted ChatGPT answers)."""
+    import ehb_chatgpt_scraper
+    
+    corpus = []
+    for source_dir in source_dirs:
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = sorted(d for d in dirs if d not in HELD_OUT_SKIP_DIRS)
+            for name in sorted(files):
+                if os.path.splitext(name)[1] not in (".md", ".txt"):
+                    continue
+                try:
+                    with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                        blocks = list(ehb_chatgpt_scraper.iter_fenced_blocks(f))
+                except (OSError, UnicodeDecodeError):
+                    continue
+                for info, code in blocks:
+                    language = ehb_chatgpt_scraper.fence_language(info)
+                    if language in ehb_chatgpt_scraper.LANGUAGE_EXTENSIONS and code.strip():
+                        corpus.append((language, code))
+    return corpus
+
+def load_labeled_snippets(store_dir):
+    """(language, code) pairs for the snippets in a snippet store whose language came from the code fence."""
+    from ehb_snippet_store import SnippetStore
+    
+    store = SnippetStore(store_dir)
+    return [(record["language"], store.read(record)) for record in store.records() if record.get("labeled")]
+
+def _language_accuracy(corpus, classify):
+    """Fraction of corpus classified correctly, comparing the file extensions the languages map to."""
+    import ehb_chatgpt_scraper
+    
+    def extension(language):
+        ext = ehb_chatgpt_scraper.LANGUAGE_EXTENSIONS.get(language.lower(), ".txt")
+        return ".yaml" if ext == ".yml" else ext
+    
+    predicted = classify([code for _, code in corpus])
+    errors = {}
+    for (label, _), guess in zip(corpus, predicted):
+        if extension(label) != extension(guess):
+            errors[(label, guess)] = errors.get((label, guess), 0) + 1
+    return 1 - sum(errors.values()) / len(corpus), predicted, errors
+
+def benchmark_language_classifier(per_language=40, repeat=5, source_dirs=None, snippet_dir=None):
+    """Accuracy and throughput of ehb_language_classifier against the original heuristic.
+    
+    The synthetic LANGUAGE_SAMPLES corpus was written together with LANGUAGE_WEIGHTS, so its
+    accuracy is in-sample and only guards against regressions. Held-out accuracy is measured on
+    real files labeled by extension and on the labeled code fences of .md/.txt files (both from
+    source_dirs, default: this repository) and, with snippet_dir, on the fence-labeled snippets
+    of a snippet store.
+    """
+    import ehb_chatgpt_scraper
+    import ehb_language_classifier
+    
+    corpus = build_language_corpus(per_language)
+    codes = [code for _, code in corpus]
+    
+    canonical = {ext: language for language, ext in reversed(ehb_chatgpt_scraper.LANGUAGE_EXTENSIONS.items())}
+    missing = set(canonical.values()) - set(ehb_language_classifier.LANGUAGE_WEIGHTS) - {'yml'}
+    print(f"Synthetic corpus: {len(corpus)} snippets in {len(LANGUAGE_SAMPLES)} languages"
+          f"{f', no weights for {sorted(missing)}' if missing else ''}")
+    
+    candidates = [("original heuristic", lambda batch: [_reference_guess_language(code) for code in batch]),
+                  ("classifier", ehb_chatgpt_scraper.guess_languages)]
+    
+    for label, classify in candidates:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            classify(codes)
+            timings.append(time.perf_counter() - start)
+        
+        accuracy, _, _ = _language_accuracy(corpus, classify)
+        print(f"  {label:<26} in-sample accuracy {accuracy:6.1%}  {len(codes) / min(timings):10.0f} snippets/sec")
+    
+    source_dirs = source_dirs or [os.path.dirname(os.path.abspath(__file__))]
+    held_out = [("files by extension", build_held_out_corpus(source_dirs)),
+                ("code fences in .md/.txt files", load_fenced_snippets(source_dirs))]
+    if snippet_dir:
+        held_out.append(("fence-labeled snippets", load_labeled_snippets(snippet_dir)))
+    
+    for name, held_out_corpus in held_out:
+        if not held_out_corpus:
+            print(f"\nHeld-out {name}: no labeled samples found")
+            continue
+        
+        counts = {}
+        for language, _ in held_out_corpus:
+            counts[language] = counts.get(language, 0) + 1
+        print(f"\nHeld-out {name}: {len(held_out_corpus)} samples "
+              f"({', '.join(f'{language} {count}' for language, count in sorted(counts.items()))})")
+        for label, candidate in candidates:
+            accuracy, _, errors = _language_accuracy(held_out_corpus, candidate)
+            print(f"  {label:<26} accuracy {accuracy:6.1%}")
+        for (expected, got), count in sorted(errors.items(), key=lambda item: -item[1])[:10]:
+            print(f"    {expected} classified as {got}: {count}")
+
+def build_snippet_variants(count, variants=5, seed=13):
+    """Build count snippets in families of near-duplicate variants: (family, code) pairs.
+    
+    Every family starts from a random 30-line component; each variant renames an
+    identifier, changes a literal and drops or adds a line.
+    """
+    rng = random.Random(seed)
+    words = [f"{prefix}{suffix}" for prefix in ("user", "order", "wallet", "item", "price", "token", "cart", "page")
+             for suffix in ("", "Id", "List", "Count", "Total", "Service", "Store", "Data")]
+    snippets = []
+    for family in range(count // variants):
+        lines = [f"const {rng.choice(words)} = {rng.choice(words)}.{rng.choice(words)}({rng.choice(words)}, {rng.randrange(100)});"
+                 for _ in range(30)]
+        for _ in range(variants):
+            variant = list(lines)
+            old, new = rng.sample(words, 2)
+            line = rng.randrange(len(variant))
+            variant[line] = variant[line].replace(old, new)
+            variant[rng.randrange(len(variant))] += f" // {rng.randrange(1000)}"
+            if rng.random() < 0.5:
+                del variant[rng.randrange(len(variant))]
+            else:
+                variant.insert(rng.randrange(len(variant)), f"console.log({rng.choice(words)});")
+            snippets.append((family, '\n'.join(variant)))
+    return snippets
+
+def benchmark_near_duplicates(counts=(1000, 5000, 20000)):
+    """Time ehb_snippet_clusters' MinHash/LSH clustering and check the clusters against the known families."""
+    import ehb_snippet_clusters
+    
+    for count in counts:
+        snippets = build_snippet_variants(count)
+        index = ehb_snippet_clusters.NearDuplicateIndex()
+        
+        start = time.perf_counter()
+        for key, (_, code) in enumerate(snippets):
+            index.add(key, code, group="js")
+        clusters = index.clusters()
+        elapsed = time.perf_counter() - start
+        
+        families = len({family for family, _ in snippets})
+        pure = sum(len({snippets[key][0] for key in cluster}) == 1 for cluster in clusters)
+        print(f"  {len(snippets):6d} snippets in {families:5d} families: {elapsed:7.2f} s, {len(clusters):5d} clusters "
+              f"({pure / len(clusters):6.1%} pure), {index.comparisons:8d} comparisons "
+              f"vs {len(snippets) * (len(snippets) - 1) // 2:10d} pairs")
+
+def build_search_corpus(data_dir, conversations=2000, conversation_kb=16, snippets=5000, seed=17):
+    """Write a synthetic ehb_company_info tree (conversations plus a snippet store) to data_dir."""
+    from ehb_snippet_store import SnippetStore
+    
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    phrase = "the franchise wallet service settles affiliate payments nightly"
+    
+    content_dir = os.path.join(data_dir, "chatgpt_content")
+    os.makedirs(content_dir, exist_ok=True)
+    for i in range(conversations):
+        words = rng.choices(vocabulary, weights, k=conversation_kb * 1024 // 8)
+        if i % 100 == 0:
+            words.insert(rng.randrange(len(words)), phrase)
+        with open(os.path.join(content_dir, f"chatgpt_{i:05d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(' '.join(words))
+    
+    store = SnippetStore(os.path.join(data_dir, "code_snippets"))
+    for i in range(snippets):
+        body = ' '.join(rng.choices(vocabulary, weights, k=60))
+        if i % 2:
+            store.add(f"def handler_{i}(request):\n    return '{body}'", 'python', '.py')
+        else:
+            store.add(f"function handler{i}(req, res) {{\n  res.send('{body}');\n}}", 'javascript', '.js')
+    store.save()
+
+def benchmark_search_index(conversations=2000, snippets=5000, repeat=5):
+    """Build, incrementally update and query ehb_search_index on a synthetic data directory,
+    comparing query latency with scanning the files."""
+    import tempfile
+    import ehb_search_index
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        build_search_corpus(data_dir, conversations=conversations, snippets=snippets)
+        paths = sorted(glob.glob(os.path.join(data_dir, "chatgpt_content", "*.txt")))
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"Corpus: {len(paths)} conversations ({size / (1024 * 1024):.0f} MB) and {snippets} snippets")
+        
+        with ehb_search_index.SearchIndex(data_dir) as index:
+            for label in ("full build", "no changes"):
+                start = time.perf_counter()
+                counts = index.update()
+                print(f"  {label:<20} {time.perf_counter() - start:8.2f} s  {counts}")
+            
+            for path in paths[:10]:
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(" appended words")
+            start = time.perf_counter()
+            counts = index.update()
+            print(f"  {'10 files changed':<20} {time.perf_counter() - start:8.2f} s  {counts}")
+            
+            queries = [("term5", None), ("term15000", None), ('"franchise wallet service"', None),
+                       ("term3 term40 term900", None), ("handler", "python"), ("res", "js")]
+            for query, language in queries:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    results = index.search(query, language=language)
+                    timings.append(time.perf_counter() - start)
+                label = f"{query} [{language}]" if language else query
+                print(f"  query {label:<34} {min(timings) * 1000:8.2f} ms  {len(results)} results")
+        
+        # What answering the phrase query took before: reading every file
+        start = time.perf_counter()
+        pattern = re.compile(r"franchise\s+wallet\s+service", re.IGNORECASE)
+        found = 0
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                found += bool(pattern.search(f.read()))
+        print(f"  scanning the files for the phrase       {(time.perf_counter() - start) * 1000:8.2f} ms  {found} files")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run EHB performance benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    
+    company = subparsers.add_parser("company-extraction", help="ehb_scraper company info extraction")
+    company.add_argument("--size-mb", type=int, default=8, help="synthetic corpus size")
+    company.add_argument("--doc-kb", type=int, default=64, help="size of each synthetic document")
+    
+    parsers = subparsers.add_parser("html-parsers", help="ehb_chatgpt_scraper HTML parser backends")
+    parsers.add_argument("--pages-dir", default=None, help="directory of saved .html pages")
+    parsers.add_argument("--repeat", type=int, default=3, help="timing repetitions (best is reported)")
+    
+    roadmap = subparsers.add_parser("roadmap", help="ehb_chatgpt_scraper roadmap phase segmentation")
+    roadmap.add_argument("--phases", type=int, nargs="+", default=[100, 200, 400, 800],
+                         help="phase counts of the synthetic transcripts")
+    
+    architecture = subparsers.add_parser("architecture", help="ehb_chatgpt_scraper system architecture keyword scan")
+    architecture.add_argument("--size-kb", type=int, nargs="+", default=[256, 1024, 4096],
+                              help="sizes of the synthetic documents")
+    architecture.add_argument("--extra-keywords", type=int, nargs="+", default=[0, 300],
+                              help="additional third-party keywords to scan for")
+    
+    languages = subparsers.add_parser("languages", help="ehb_language_classifier accuracy and throughput")
+    languages.add_argument("--per-language", type=int, default=40, help="labeled snippets per language")
+    languages.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is reported)")
+    languages.add_argument("--source-dir", action="append", default=None,
+                           help="directory of real files for the held-out corpus (repeatable; default: this repository)")
+    languages.add_argument("--snippet-dir", default=None,
+                           help="snippet store whose fence-labeled snippets form a second held-out corpus")
+    
+    duplicates = subparsers.add_parser("near-duplicates", help="ehb_snippet_clusters MinHash/LSH clustering")
+    duplicates.add_argument("--counts", type=int, nargs="+", default=[1000, 5000, 20000],
+                            help="numbers of synthetic snippets")
+    
+    search = subparsers.add_parser("search-index", help="ehb_search_index build, update and query times")
+    search.add_argument("--conversations", type=int, default=2000, help="synthetic conversation files")
+    search.add_argument("--snippets", type=int, default=5000, help="synthetic snippets")
+    search.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is reported)")
+    
+    args = parser.parse_args()
+    
+    if args.benchmark == "search-index":
+        benchmark_search_index(conversations=args.conversations, snippets=args.snippets, repeat=args.repeat)
+    elif args.benchmark == "near-duplicates":
+        benchmark_near_duplicates(counts=args.counts)
+    elif args.benchmark == "languages":
+        benchmark_language_classifier(per_language=args.per_language, repeat=args.repeat,
+                                      source_dirs=args.source_dir, snippet_dir=args.snippet_dir)
+    elif args.benchmark == "architecture":
+        benchmark_architecture_extraction(sizes_kb=args.size_kb, extra_keywords=args.extra_keywords)
+    elif args.benchmark == "roadmap":
+        benchmark_roadmap_segmentation(phase_counts=args.phases)
+    elif args.benchmark == "html-parsers":
+        benchmark_html_parsers(pages_dir=args.pages_dir, repeat=args.repeat)
+    elif args.benchmark == "company-extraction":
+        benchmark_company_extraction(total_mb=args.size_mb, doc_kb=args.doc_kb)
@@ -3,16 +3,50 @@ EHB ChatGPT Scraper
 
 This script scrapes content from ChatGPT shared URLs and processes it 
 for use in EHB system development.
+
+Optional dependencies: lxml is the faster BeautifulSoup tree builder; without
+it pages are parsed with the standard library's html.parser. ijson streams
+large __NEXT_DATA__ payloads; without it they are read with json.loads. Both
+give the same results.
 """
 
+import io
 import os
 import re
 import json
+import codecs
+import filecmp
+import hashlib
+import time
+import random
 import logging
+import multiprocessing
+import argparse
+import queue
+import threading
+import statistics
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+from html.parser import HTMLParser
+from numbers import Number
 from pathlib import Path
-from datetime import datetime
+from ehb_snippet_store import SnippetStore
+from ehb_language_classifier import classify_languages
+
+try:
+    import lxml  # noqa: F401 - only needed as a BeautifulSoup tree builder
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
 
 # Configure logging
 logging.basicConfig(
@@ -21,201 +55,1075 @@ logging.basicConfig(
 )
 logger = logging.getLogger('EhbChatGptScraper')
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+REQUEST_TIMEOUT = 30
+
+# Concurrency and politeness defaults
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 2.0
+BURST = 2
+
+# Responses worth retrying, and the retry schedule (full-jitter exponential backoff)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Downloaded pages allowed to wait for extraction, per extraction process
+EXTRACTION_BACKLOG = 2
+
+# Default cap on extraction processes; starting each one costs about as much as extracting
+# a few dozen pages, and four download threads rarely keep more than this busy
+MAX_EXTRACTION_PROCESSES = 4
+
+# Runs with fewer pages than this extract in-process: starting the worker pool (~0.6 s)
+# takes longer than extracting that many typical pages one after another
+PARALLEL_MIN_PAGES = 32
+
+# Bump whenever an extractor's output changes, so cached parse results are not reused
+EXTRACTOR_VERSION = 3
+
+# Bytes read from the network at a time in streaming mode
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Language of an unlabeled snippet nothing points to, as before the classifier; the examples
+# EhbAutoDevelopment builds only pick up .js and .py snippets
+FALLBACK_LANGUAGE = 'javascript'
+
+# File extension for each fence language (ehb_language_classifier has weights for each canonical one)
+LANGUAGE_EXTENSIONS = {
+    'javascript': '.js',
+    'js': '.js',
+    'typescript': '.ts',
+    'ts': '.ts',
+    'jsx': '.jsx',
+    'tsx': '.tsx',
+    'python': '.py',
+    'py': '.py',
+    'html': '.html',
+    'css': '.css',
+    'json': '.json',
+    'markdown': '.md',
+    'md': '.md',
+    'bash': '.sh',
+    'shell': '.sh',
+    'sh': '.sh',
+    'sql': '.sql',
+    'java': '.java',
+    'c': '.c',
+    'cpp': '.cpp',
+    'c++': '.cpp',
+    'csharp': '.cs',
+    'cs': '.cs',
+    'go': '.go',
+    'ruby': '.rb',
+    'rb': '.rb',
+    'php': '.php',
+    'rust': '.rs',
+    'swift': '.swift',
+    'kotlin': '.kt',
+    'scala': '.scala',
+    'xml': '.xml',
+    'yaml': '.yaml',
+    'yml': '.yml',
+    'ini': '.ini',
+    'toml': '.toml',
+    'dockerfile': '.Dockerfile',
+}
+
+# BeautifulSoup tree builders that support targeted (SoupStrainer) parsing, fastest first
+HTML_PARSERS = ['lxml', 'html.parser']
+
+def default_html_parser():
+    """Return the fastest installed HTML parser"""
+    return 'lxml' if HAS_LXML else 'html.parser'
+
+# Message authors whose text is part of the conversation
+DIALOGUE_ROLES = ('user', 'assistant')
+
+# __NEXT_DATA__ payloads at least this large are streamed with ijson (when installed)
+# instead of being decoded into one object tree
+NEXT_DATA_STREAM_MIN_CHARS = 1024 * 1024
+
+# Where shared-conversation pages keep the messages, in conversation order
+NEXT_DATA_MESSAGE_PATHS = (
+    'props.pageProps.serverResponse.data.linear_conversation.item.message',
+)
+
+def _is_message(node):
+    return (isinstance(node, dict) and isinstance(node.get('author'), dict)
+            and isinstance(node.get('content'), dict) and isinstance(node['content'].get('parts'), list))
+
+def _walk_next_data_messages(payload):
+    """Yield the message objects of a decoded payload in document order, using an explicit stack"""
+    stack = [(False, payload)]
+    while stack:
+        is_message, node = stack.pop()
+        if is_message:
+            yield node
+            continue
+        
+        if isinstance(node, dict):
+            children = [(key == 'message' and _is_message(value), value) for key, value in node.items()
+                        if isinstance(value, (dict, list))]
+        else:
+            children = [(False, value) for value in node if isinstance(value, (dict, list))]
+        stack.extend(reversed(children))
+
+def _stream_next_data_messages(payload):
+    """Stream the message objects at the known conversation paths, or return None if there are none"""
+    for path in NEXT_DATA_MESSAGE_PATHS:
+        found = [message for message in ijson.items(io.BytesIO(payload.encode('utf-8')), path) if _is_message(message)]
+        if found:
+            return found
+    return None
+
+def iter_next_data_messages(payload):
+    """Yield (role, text) for each conversation message in a __NEXT_DATA__ JSON payload
+    
+    Messages are the objects stored under a "message" key with an author and content parts;
+    they are listed both in the conversation's mapping and its linear_conversation, so each
+    is emitted once (by id) and, when every message has a create_time, in creation order.
+    Framework state is skipped without being turned into text. Large payloads are streamed
+    with ijson when it is installed, building only the objects at NEXT_DATA_MESSAGE_PATHS;
+    payloads of another shape are decoded and walked. Raises ValueError if the payload is
+    not valid JSON.
+    """
+    found = None
+    if HAS_IJSON and len(payload) >= NEXT_DATA_STREAM_MIN_CHARS:
+        try:
+            found = _stream_next_data_messages(payload)
+        except ijson.JSONError as e:
+            raise ValueError(str(e)) from e
+    if found is None:
+        found = list(_walk_next_data_messages(json.loads(payload)))
+    
+    seen = set()
+    dialogue = []
+    for message in found:
+        message_id = message.get('id')
+        if message_id is not None:
+            if message_id in seen:
+                continue
+            seen.add(message_id)
+        
+        role = message['author'].get('role')
+        hidden = (message.get('metadata') or {}).get('is_visually_hidden_from_conversation')
+        text = '\n'.join(part for part in message['content']['parts'] if isinstance(part, str)).strip()
+        if role in DIALOGUE_ROLES and text and not hidden:
+            dialogue.append((message.get('create_time'), role, text))
+    
+    if all(isinstance(create_time, Number) for create_time, _, _ in dialogue):
+        dialogue.sort(key=lambda item: float(item[0]))
+    
+    for _, role, text in dialogue:
+        yield role, text
+
+class ConversationStreamParser(HTMLParser):
+    """Incremental parser that hands over each markdown div's text as soon as the div closes
+    
+    Feed it decoded pieces of a shared-conversation page; on_block(text) is called for every
+    rendered message, in page order, with the text BeautifulSoup's get_text() gives for it.
+    A message still open when close() is called (a truncated page) is handed over as it
+    stands. Only the message being parsed is held in memory. Until the first message is found,
+    scripts that may hold the __NEXT_DATA__ payload are kept in next_data for the fallback.
+    """
+    
+    # Elements whose text get_text() leaves out
+    SKIPPED_TAGS = ('script', 'style', 'template')
+    
+    def __init__(self, on_block):
+        super().__init__(convert_charrefs=True)
+        self.on_block = on_block
+        self.blocks = 0
+        self.next_data = []
+        self._parts = None  # text of the open markdown div
+        self._depth = 0  # <div>s open inside it, including itself
+        self._skipping = None
+        self._script = None  # (is __NEXT_DATA__, text parts) of the open <script>
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'script':
+            self._script = (dict(attrs).get('id') == '__NEXT_DATA__', [])
+        
+        if self._parts is None:
+            if tag == 'div' and 'markdown' in (dict(attrs).get('class') or '').split():
+                self._parts = []
+                self._depth = 1
+        elif tag == 'div':
+            self._depth += 1
+        elif tag in self.SKIPPED_TAGS and self._skipping is None:
+            self._skipping = tag
+    
+    def handle_endtag(self, tag):
+        if tag == 'script' and self._script is not None:
+            is_next_data, parts = self._script
+            self._script = None
+            text = ''.join(parts)
+            if not self.blocks and (is_next_data or '__NEXT_DATA__' in text):
+                self.next_data.append(text)
+        
+        if self._parts is None:
+            return
+        if tag == self._skipping:
+            self._skipping = None
+        elif tag == 'div':
+            self._depth -= 1
+            if self._depth == 0:
+                self._emit_block()
+    
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script[1].append(data)
+        if self._parts is not None and self._skipping is None:
+            self._parts.append(data)
+    
+    def close(self):
+        super().close()
+        if self._parts is not None:
+            self._emit_block()
+    
+    def _emit_block(self):
+        text, self._parts = ''.join(self._parts), None
+        self._skipping = None
+        self.on_block(text)
+        self.blocks += 1
+
+def _has_markdown_class(value):
+    # bs4 >= 4.13 strainers match class_ strings against the whole attribute, so test each class
+    return bool(value) and 'markdown' in value.split()
+
+def parse_conversation_html(html, parser=None, targeted=True):
+    """Extract the conversation from a shared-conversation page
+    
+    Returns (content, source) where source is 'markdown' for rendered message divs,
+    'next_data' for the message texts of the Next.js payload, or (None, None) if neither
+    is present.
+    With targeted=True only the markdown divs (and, if there are none, the <script> tags)
+    are materialized instead of the whole document tree.
+    """
+    parser = parser or default_html_parser()
+    
+    if targeted:
+        soup = BeautifulSoup(html, parser, parse_only=SoupStrainer("div", class_=_has_markdown_class))
+    else:
+        soup = BeautifulSoup(html, parser)
+    
+    # Extract conversation content
+    content_divs = soup.find_all("div", class_="markdown")
+    if content_divs:
+        # Combine all markdown content
+        return "\n\n".join([div.get_text() for div in content_divs]), 'markdown'
+    
+    # Try to extract content from a potential JSON structure
+    if targeted:
+        soup = BeautifulSoup(html, parser, parse_only=SoupStrainer("script"))
+    for script in soup.find_all("script"):
+        if script.string and (script.get("id") == "__NEXT_DATA__" or "__NEXT_DATA__" in script.string):
+            try:
+                messages = [text for _, text in iter_next_data_messages(script.string)]
+            except ValueError:
+                continue
+            if messages:
+                return "\n\n".join(messages), 'next_data'
+    
+    return None, None
+
+# Closing fence: up to 3 spaces of indentation, a run of ``` or ~~~, then only whitespace
+CLOSING_FENCE_RE = re.compile(r' {0,3}(`{3,}|~{3,})[ \t]*$')
+
+def iter_fenced_blocks(lines):
+    """Yield (info, code) for every fenced code block in an iterable of lines
+    
+    Follows the CommonMark fence rules in a single streaming pass: fences are ``` or ~~~
+    runs of three or more, indented by at most three spaces, and a block is closed only by a
+    fence of the same character that is at least as long as the opening one, so longer fences
+    can wrap shorter ones. Blocks still open at the end of the input are not emitted.
+    """
+    fence_char = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        stripped = line.lstrip(' ')
+        indent = len(line) - len(stripped)
+        
+        if fence_char is None:
+            if indent > 3 or not stripped.startswith(('```', '~~~')):
+                continue
+            char = stripped[0]
+            length = len(stripped) - len(stripped.lstrip(char))
+            info = stripped[length:].strip()
+            # A backtick fence's info string may not contain backticks (that is inline code)
+            if char == '`' and '`' in info:
+                continue
+            fence_char, fence_length, fence_indent, body = char, length, indent, []
+        else:
+            closing = CLOSING_FENCE_RE.match(line) if stripped.startswith(fence_char * 3) else None
+            if closing and len(closing.group(1)) >= fence_length and closing.group(1)[0] == fence_char:
+                yield info, '\n'.join(body)
+                fence_char = None
+            else:
+                # Content lines lose up to the opening fence's indentation
+                body.append(line[min(fence_indent, indent):])
+
+def fence_language(info):
+    """Get the language from a fence info string such as 'python', 'js title="app.js"' or '{.python .numberLines}'"""
+    if not info:
+        return ''
+    if info.startswith('{'):
+        classes = [token[1:] for token in info.strip('{}').split() if token.startswith('.')]
+        return classes[0].lower() if classes else ''
+    return info.split()[0].lower()
+
+# Roadmap extraction patterns. A roadmap section is only recognised when the heading is
+# followed by some text on the same or a later line
+ROADMAP_HEADING_RE = re.compile(r"(?:Development|Product) Roadmap:?\s*[^\n]", re.IGNORECASE)
+PHASE_HEADING_RE = re.compile(r"(?:Phase|Stage) (\d+):?\s*([^:]+)(?::|\n)", re.IGNORECASE)
+TASK_RE = re.compile(r"[-•*]\s*([^\n]+)")
+
+def parse_development_roadmap(content):
+    """Split content into roadmap phases and their bullet-point tasks
+    
+    Phase headings are located once with finditer; each phase spans from its heading to the
+    next heading (or the end of the text), and bullets are matched segment by segment with
+    pos/endpos, so the text is scanned once in total and never copied.
+    """
+    roadmap = {
+        'phases': []
+    }
+    
+    # Look for roadmap section
+    if ROADMAP_HEADING_RE.search(content):
+        roadmap['phases'] = _roadmap_phases(content)
+    
+    # If no structured phases were found, try to extract a list
+    if not roadmap['phases']:
+        # Look for bullet points that might indicate roadmap items
+        roadmap['phases'] = _roadmap_list(TASK_RE.findall(content))
+    
+    return roadmap
+
+def _roadmap_phases(content):
+    """Every phase heading in content, with the bullet-point tasks up to the next heading"""
+    phases = []
+    headings = list(PHASE_HEADING_RE.finditer(content))
+    
+    for i, heading in enumerate(headings):
+        phase_num, phase_name = heading.groups()
+        phase_end = headings[i + 1].start() if i + 1 < len(headings) else len(content)
+        
+        phases.append({
+            'name': f"Phase {phase_num}: {phase_name.strip()}",
+            'tasks': [{'name': task.group(1).strip(), 'status': 'pending'}
+                      for task in TASK_RE.finditer(content, heading.start(), phase_end)]
+        })
+    return phases
+
+def _roadmap_list(roadmap_items):
+    """The single phase listing bullet points found outside any structured roadmap (none without items)"""
+    if not roadmap_items:
+        return []
+    return [{
+        'name': 'Development Roadmap',
+        'tasks': [{'name': item.strip(), 'status': 'pending'} for item in roadmap_items]
+    }]
+
+# Keywords for system architecture extraction. All of them are compiled into one
+# KeywordScanner, so the lists can grow without adding passes over the text
+ARCHITECTURE_KEYWORDS = {
+    # Case-sensitive mentions that enable the database section
+    'database_markers': ['Database', 'MongoDB', 'PostgreSQL'],
+    # Headings whose following text names the primary database
+    'database_headings': ['Database', 'Data Storage'],
+    # Substrings of that text which make the primary database SQL rather than NoSQL
+    'sql_markers': ['SQL', 'PostgreSQL', 'MySQL'],
+    # Database products recorded when mentioned, with their type
+    'databases': {
+        'MongoDB': 'NoSQL',
+        'PostgreSQL': 'SQL',
+        'MySQL': 'SQL',
+        'Supabase': 'SQL',
+        'Firebase': 'NoSQL'
+    },
+    # Integration headings; the text following each becomes an integration of that type
+    'integration_types': [
+        'API Integration', 'Third-party', 'Integration',
+        'OAuth', 'Payment Gateway', 'Authentication Provider'
+    ],
+    # Services recorded as third-party integrations when mentioned
+    'third_party_services': ['Stripe', 'OpenAI', 'Anthropic', 'AWS', 'Google Cloud', 'Twilio']
+}
+
+COMPONENT_RE = re.compile(r"[-•*]\s*([A-Za-z0-9_\- ]+)(?:\s*-\s*|\s*:\s*)([^\n]+)")
+KEYWORD_VALUE_RE = re.compile(r":?\s*([^\n]+)")
+
+# Characters re.IGNORECASE matches to an ASCII letter that str.lower() does not map onto it.
+# Folding them first also keeps the folded text the same length as the original
+# ('İ' is the only character whose lowercase is longer), so offsets carry over.
+_FOLD_TABLE = str.maketrans({'İ': 'i', 'ı': 'i', 'ſ': 's'})
+
+def _fold(text):
+    """Case-fold text without changing its length"""
+    return text.translate(_FOLD_TABLE).lower()
+
+def _trie_pattern(words):
+    """Regex source matching the longest of words at a position, factored as a prefix tree
+    
+    Every branch starts with a literal, so sre can skip positions that start no word.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        group = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{group})?' if '' in node else group
+    
+    return build(trie)
+
+class KeywordScanner:
+    """Finds every case-insensitive occurrence of a set of keywords in one pass
+    
+    The keywords are compiled into a single prefix-tree regex that runs over a case-folded
+    copy of the text, so the cost of a scan hardly depends on how many keywords there are.
+    For ASCII keywords an occurrence is exactly what re.IGNORECASE would match. Each search
+    resumes one character after the previous hit, so overlapping occurrences are found too.
+    """
+    
+    def __init__(self, keywords):
+        self.keywords = {}
+        for keyword in filter(None, keywords):
+            self.keywords.setdefault(_fold(keyword), set()).add(keyword)
+        
+        # A match is the longest keyword at its offset; shorter keywords it starts with match there too
+        self.prefixes = {folded: [prefix for prefix in self.keywords if folded.startswith(prefix)]
+                         for folded in self.keywords}
+        self.pattern = re.compile(_trie_pattern(self.keywords)) if self.keywords else None
+    
+    def scan(self, text):
+        """Map each keyword found in text to the sorted start offsets of its occurrences"""
+        hits = {}
+        if self.pattern is None:
+            return hits
+        
+        folded_text = _fold(text)
+        match = self.pattern.search(folded_text)
+        while match:
+            offset = match.start()
+            for folded in self.prefixes[match.group()]:
+                for keyword in self.keywords[folded]:
+                    hits.setdefault(keyword, []).append(offset)
+            match = self.pattern.search(folded_text, offset + 1)
+        return hits
+
+def architecture_scanner(keywords=ARCHITECTURE_KEYWORDS):
+    """Build the KeywordScanner for every keyword parse_system_architecture looks up"""
+    return KeywordScanner([
+        *keywords['database_markers'], *keywords['database_headings'], *keywords['databases'],
+        *keywords['integration_types'], *keywords['third_party_services']
+    ])
+
+def _value_after(content, occurrences):
+    """Rest of the line (or the next non-empty line) after the first (offset, keyword)
+    occurrence that has one, with an optional colon and leading whitespace skipped"""
+    for offset, keyword in occurrences:
+        match = KEYWORD_VALUE_RE.match(content, offset + len(keyword))
+        if match:
+            return match.group(1)
+    return None
+
+def parse_system_architecture(content, keywords=ARCHITECTURE_KEYWORDS, scanner=None):
+    """Extract components, databases and integrations from content
+    
+    Every keyword is located by one scanner pass; a keyword counts as mentioned when one of
+    its occurrences matches case-sensitively, and values are read with a regex anchored just
+    after the first occurrence instead of searching the text again.
+    """
+    architecture = {
+        'components': [],
+        'integrations': [],
+        'databases': []
+    }
+    
+    hits = (scanner or architecture_scanner(keywords)).scan(content)
+    
+    def mentioned(keyword):
+        return any(content.startswith(keyword, offset) for offset in hits.get(keyword, ()))
+    
+    # Extract components/services
+    for comp_name, comp_desc in COMPONENT_RE.findall(content):
+        architecture['components'].append({
+            'name': comp_name.strip(),
+            'description': comp_desc.strip()
+        })
+    
+    # Extract database information
+    if any(mentioned(marker) for marker in keywords['database_markers']):
+        headings = sorted((offset, i, heading) for i, heading in enumerate(keywords['database_headings'])
+                          for offset in hits.get(heading, ()))
+        db_text = _value_after(content, [(offset, heading) for offset, _, heading in headings])
+        
+        if db_text is not None:
+            db_text = db_text.strip()
+            architecture['databases'].append({
+                'name': db_text,
+                'type': 'SQL' if any(marker in db_text for marker in keywords['sql_markers']) else 'NoSQL'
+            })
+        
+        # Look for specific database mentions
+        for db, db_type in keywords['databases'].items():
+            if mentioned(db) and not any(d['name'] == db for d in architecture['databases']):
+                architecture['databases'].append({
+                    'name': db,
+                    'type': db_type
+                })
+    
+    # Extract integrations
+    for keyword in keywords['integration_types']:
+        if mentioned(keyword):
+            value = _value_after(content, [(offset, keyword) for offset in hits[keyword]])
+            if value is not None:
+                architecture['integrations'].append({
+                    'name': value.strip(),
+                    'type': keyword
+                })
+    
+    # Look for specific integrations
+    for integration in keywords['third_party_services']:
+        if mentioned(integration) and not any(i['name'] == integration for i in architecture['integrations']):
+            architecture['integrations'].append({
+                'name': integration,
+                'type': 'Third-party Service'
+            })
+    
+    return architecture
+
+def load_architecture_keywords(path):
+    """ARCHITECTURE_KEYWORDS with the lists in a JSON file replacing the defaults of the same name"""
+    with open(path, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    
+    unknown = set(overrides) - set(ARCHITECTURE_KEYWORDS)
+    if unknown:
+        raise ValueError(f"Unknown architecture keyword lists in {path}: {', '.join(sorted(unknown))}")
+    return {**ARCHITECTURE_KEYWORDS, **overrides}
+
+# Company information fields and the patterns that find them
+COMPANY_INFO_PATTERNS = {key: re.compile(pattern, re.IGNORECASE) for key, pattern in {
+    'name': r"(?:Company|Business) Name:?\s*([^\n]+)",
+    'description': r"(?:Company|Business) Description:?\s*([^\n]+(?:\n\s*[^\n]+)*)",
+    'mission': r"Mission(?: Statement)?:?\s*([^\n]+(?:\n\s*[^\n]+)*)",
+    'vision': r"Vision(?: Statement)?:?\s*([^\n]+(?:\n\s*[^\n]+)*)",
+    'values': r"(?:Core )?Values:?\s*([^\n]+(?:\n\s*[^\n]+)*)",
+    'founded': r"Founded(?: Year| Date)?:?\s*([^\n]+)",
+    'headquarters': r"(?:Headquarters|HQ|Location):?\s*([^\n]+)",
+    'industry': r"Industry:?\s*([^\n]+)",
+    'employees': r"(?:Employees|Team Size):?\s*([^\n]+)",
+    'website': r"Website:?\s*([^\n]+)",
+    'contact': r"Contact:?\s*([^\n]+(?:\n\s*[^\n]+)*)"
+}.items()}
+
+def parse_company_info(content):
+    """Find the company information fields present in content"""
+    company_info = {}
+    for key, pattern in COMPANY_INFO_PATTERNS.items():
+        match = pattern.search(content)
+        if match:
+            company_info[key] = match.group(1).strip()
+    return company_info
+
+def guess_languages(codes):
+    """Guess the languages of a batch of unlabeled snippets (FALLBACK_LANGUAGE where nothing points to one)"""
+    return classify_languages(codes, FALLBACK_LANGUAGE)
+
+def guess_language(code):
+    """Guess the language of an unlabeled snippet"""
+    return guess_languages([code])[0]
+
+def parse_code_snippets(content):
+    """List the distinct fenced code blocks in content as dicts of language, content and labeled"""
+    snippets = []
+    _add_code_snippets(content, snippets, set())
+    _classify_unlabeled(snippets)
+    return snippets
+
+def _add_code_snippets(content, snippets, seen):
+    """Append the fenced code blocks in content whose code is not in seen yet to snippets,
+    leaving the language of unlabeled blocks empty"""
+    # One streaming pass over the lines finds labeled and unlabeled blocks alike
+    for info, code in iter_fenced_blocks(io.StringIO(content)):
+        code = code.strip()
+        
+        # Skip code that was already captured from an earlier block
+        if code in seen:
+            continue
+        seen.add(code)
+        
+        language = fence_language(info)
+        snippets.append({
+            'language': language,
+            'content': code,
+            'labeled': bool(language)
+        })
+
+def _classify_unlabeled(snippets):
+    # Classify all unlabeled blocks in one batch
+    unlabeled = [snippet for snippet in snippets if not snippet['labeled']]
+    for snippet, language in zip(unlabeled, guess_languages([snippet['content'] for snippet in unlabeled])):
+        snippet['language'] = language
+
+def extract_content(content, architecture_keywords=ARCHITECTURE_KEYWORDS, architecture_scanner=None):
+    """Run every extractor over content
+    
+    Nothing is written, so this can run in a worker process; EhbChatGptScraper saves the
+    results (snippet files, processed JSON) afterwards.
+    """
+    return {
+        'code_snippets': parse_code_snippets(content),
+        'company_info': parse_company_info(content),
+        'development_roadmap': parse_development_roadmap(content),
+        'system_architecture': parse_system_architecture(content, architecture_keywords, architecture_scanner)
+    }
+
+def extract_messages(messages, architecture_keywords=ARCHITECTURE_KEYWORDS, scanner=None):
+    """extract_content for a conversation read one message at a time
+    
+    Each message is extracted on its own, so apart from the results only the current message
+    is held in memory. Matches do not run on from one message into the next: a company field
+    keeps the value from the first message that has it, phases and components are collected
+    from every message, and code, databases and integrations an earlier message already
+    named are skipped.
+    """
+    scanner = scanner or architecture_scanner(architecture_keywords)
+    snippets = []
+    seen = set()
+    company_info = {}
+    roadmap_found = False
+    phases = []
+    roadmap_items = []
+    architecture = {
+        'components': [],
+        'integrations': [],
+        'databases': []
+    }
+    
+    for message in messages:
+        _add_code_snippets(message, snippets, seen)
+        
+        for key, value in parse_company_info(message).items():
+            company_info.setdefault(key, value)
+        
+        roadmap_found = roadmap_found or ROADMAP_HEADING_RE.search(message) is not None
+        phases.extend(_roadmap_phases(message))
+        roadmap_items.extend(TASK_RE.findall(message))
+        
+        found = parse_system_architecture(message, architecture_keywords, scanner)
+        architecture['components'].extend(found['components'])
+        for section in ('databases', 'integrations'):
+            names = {item['name'] for item in architecture[section]}
+            architecture[section].extend(item for item in found[section] if item['name'] not in names)
+    
+    _classify_unlabeled(snippets)
+    return {
+        'code_snippets': snippets,
+        'company_info': company_info,
+        'development_roadmap': {'phases': (phases if roadmap_found else []) or _roadmap_list(roadmap_items)},
+        'system_architecture': architecture
+    }
+
+class SavedConversation:
+    """A conversation saved by streaming mode: its file and the byte range of each message in it
+    
+    It is passed to an extraction process in place of the text, and messages() reads the
+    file one message at a time.
+    """
+    
+    def __init__(self, path, spans):
+        self.path = Path(path)
+        self.spans = spans
+    
+    def messages(self):
+        with open(self.path, 'rb') as f:
+            for start, end in self.spans:
+                f.seek(start)
+                yield f.read(end - start).decode('utf-8')
+
+# Keyword lists and their compiled scanner in an extraction worker process
+_worker_keywords = ARCHITECTURE_KEYWORDS
+_worker_scanner = None
+
+def _init_extraction_worker(architecture_keywords):
+    global _worker_keywords, _worker_scanner
+    _worker_keywords = architecture_keywords
+    _worker_scanner = architecture_scanner(architecture_keywords)
+
+def _extract_in_worker(content, is_html=False, html_parser=None, targeted=True):
+    """extract_content for the pipeline's worker pool, parsing saved HTML pages first
+    
+    content may also be the SavedConversation of streaming mode, which is extracted a
+    message at a time. Returns (extracted, seconds); extracted is None for a page without a
+    conversation.
+    """
+    start = time.perf_counter()
+    if isinstance(content, SavedConversation):
+        return extract_messages(content.messages(), _worker_keywords, _worker_scanner), time.perf_counter() - start
+    if is_html:
+        content, _ = parse_conversation_html(content, html_parser, targeted)
+    extracted = extract_content(content, _worker_keywords, _worker_scanner) if content else None
+    return extracted, time.perf_counter() - start
+
+def _fingerprint(chunks, settings):
+    digest = hashlib.sha256(json.dumps([EXTRACTOR_VERSION, *settings], sort_keys=True).encode('utf-8'))
+    digest.update(b'\0')
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def content_fingerprint(text, *settings):
+    """Hash of a page's text, EXTRACTOR_VERSION and the extraction settings
+    
+    Two pages with the same fingerprint give the same extract_content output.
+    """
+    return _fingerprint([text.encode('utf-8')], settings)
+
+def file_fingerprint(path, *settings):
+    """content_fingerprint of the text in a UTF-8 file, read a piece at a time"""
+    with open(path, 'rb') as f:
+        return _fingerprint(iter(lambda: f.read(STREAM_CHUNK_SIZE), b''), settings)
+
+class ParseCache:
+    """On-disk cache of extract_content results, keyed by content_fingerprint
+    
+    The key covers the page text, EXTRACTOR_VERSION and the settings the result depends on
+    (architecture keywords, HTML parser), so an entry is only reused when extracting again
+    would give the same output. Each entry is stored as <key>.json.
+    """
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def load(self, key):
+        """Return the cache entry ({'extracted': ...}) for key, or None if there is none"""
+        try:
+            with open(self.cache_dir / f"{key}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def store(self, key, extracted):
+        """Save an extract_content result (None for a page without a conversation)"""
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': EXTRACTOR_VERSION, 'extracted': extracted}, f)
+        os.replace(tmp_path, path)
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `burst` requests at once, refilled at `rate` per second"""
+    
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HostRateLimiter:
+    """Keeps one token bucket per host"""
+    
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+    
+    def acquire(self, url):
+        """Wait for permission to send a request to the host of url"""
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
 class EhbChatGptScraper:
     """Scrapes and processes content from ChatGPT shared URLs"""
     
-    def __init__(self):
+    def __init__(self, max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND, max_retries=MAX_RETRIES,
+                 html_parser=None, targeted_parse=True, architecture_keywords=None, processes=None,
+                 streaming=False):
         """Initialize the scraper with output directories"""
+        self.html_parser = html_parser or default_html_parser()
+        self.targeted_parse = targeted_parse
+        self.streaming = streaming
+        self.architecture_keywords = architecture_keywords or ARCHITECTURE_KEYWORDS
+        self.architecture_scanner = architecture_scanner(self.architecture_keywords)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.processes = processes or min(MAX_EXTRACTION_PROCESSES, os.cpu_count() or 1)
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        
+        # One keep-alive session shared by all worker threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+        
+        # Per-URL fetch statistics from the latest requests, and per-stage busy time of the latest run
+        self.fetch_stats = {}
+        self.pipeline_stats = {}
+        
+        # While a pipeline runs, processed JSON files are collected here and written once at the end
+        self._deferred_outputs = None
+        
         self.output_dir = Path("ehb_company_info")
         self.raw_dir = self.output_dir / "chatgpt_content"
         self.code_dir = self.output_dir / "code_snippets"
         self.processed_dir = self.output_dir / "processed"
+        self.parse_cache_dir = self.output_dir / ".parse_cache"
+        self.fingerprints_path = self.output_dir / "fingerprints.json"
         
         # Create directories if they don't exist
         self.output_dir.mkdir(exist_ok=True)
         self.raw_dir.mkdir(exist_ok=True)
         self.code_dir.mkdir(exist_ok=True)
         self.processed_dir.mkdir(exist_ok=True)
+        
+        # Code snippets are stored once per distinct content
+        self.snippet_store = SnippetStore(self.code_dir)
+        self.snippet_store.migrate_legacy_files(self._get_language_for_extension)
+    
+    def _retry_delay(self, attempt, response=None):
+        """Seconds to wait before the next attempt, honouring Retry-After when the server sends it"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), BACKOFF_MAX)
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    
+    def fetch(self, url, stream=False):
+        """GET a URL through the shared session, rate limited per host and retried on 429/5xx"""
+        start = time.perf_counter()
+        response = None
+        attempt = 0
+        
+        try:
+            while True:
+                self.rate_limiter.acquire(url)
+                try:
+                    response = self.session.get(url, timeout=REQUEST_TIMEOUT, stream=stream)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self._retry_delay(attempt)
+                    logger.warning(f"Request to {url} failed ({e}); retrying in {delay:.1f}s")
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                        return response
+                    delay = self._retry_delay(attempt, response)
+                    logger.warning(f"{url} returned {response.status_code}; retrying in {delay:.1f}s")
+                    response.close()
+                
+                attempt += 1
+                time.sleep(delay)
+        finally:
+            self.fetch_stats[url] = {
+                'latency': round(time.perf_counter() - start, 3),
+                'attempts': attempt + 1,
+                'status': response.status_code if response is not None else None
+            }
     
     def scrape_url(self, url):
         """Scrape content from a ChatGPT shared URL"""
         logger.info(f"Scraping URL: {url}")
         
         try:
-            # Use requests to get the page content
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            response = requests.get(url, headers=headers, timeout=30)
+            # Get the page content through the shared, rate-limited session
+            response = self.fetch(url)
             
             if response.status_code != 200:
                 logger.error(f"Failed to retrieve content from {url}. Status code: {response.status_code}")
                 return None
             
             # Parse the HTML content
-            soup = BeautifulSoup(response.text, 'html.parser')
+            content, source = parse_conversation_html(response.text, self.html_parser, self.targeted_parse)
             
-            # Extract conversation content
-            content_divs = soup.find_all("div", class_="markdown")
+            if source == 'next_data':
+                logger.info(f"No rendered conversation at {url}; using the messages from __NEXT_DATA__")
             
-            if not content_divs:
+            if source is None:
                 logger.warning(f"No conversation content found at {url}")
                 
-                # Try to extract content from a potential JSON structure
-                scripts = soup.find_all("script")
-                for script in scripts:
-                    if script.string and "__NEXT_DATA__" in script.string:
-                        try:
-                            data = json.loads(script.string)
-                            # Extract content from the Next.js data structure (this varies depending on the page structure)
-                            # This is a simplified approach and might need adjustment
-                            return json.dumps(data, indent=2)
-                        except:
-                            pass
-                
                 # If we still can't find content, save the entire HTML for manual inspection
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                html_path = self.raw_dir / f"raw_html_{timestamp}.html"
-                with open(html_path, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                logger.info(f"Saved raw HTML to {html_path} for inspection")
+                # (named after the URL, so concurrent downloads never write the same file)
+                html_path = self.raw_dir / f"raw_html_{url.split('/')[-1]}.html"
+                if self._write_if_changed(html_path, response.text):
+                    logger.info(f"Saved raw HTML to {html_path} for inspection")
                 
                 return None
             
-            # Combine all markdown content
-            content = "\n\n".join([div.get_text() for div in content_divs])
-            
             # Save raw content
             url_id = url.split('/')[-1]
             filename = f"chatgpt_{url_id}.txt"
             filepath = self.raw_dir / filename
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            logger.info(f"Saved raw content to {filepath}")
+            if self._write_if_changed(filepath, content):
+                logger.info(f"Saved raw content to {filepath}")
+            else:
+                logger.info(f"Raw content unchanged in {filepath}")
             return content
             
         except Exception as e:
             logger.error(f"Error scraping URL {url}: {str(e)}")
             return None
     
-    def extract_code_snippets(self, content):
-        """Extract code snippets from the content"""
-        logger.info("Extracting code snippets")
+    def scrape_url_streaming(self, url):
+        """Scrape a ChatGPT shared URL without holding the page in memory
         
-        if not content:
-            return []
+        The response is read STREAM_CHUNK_SIZE bytes at a time into a ConversationStreamParser,
+        and each rendered message is appended to chatgpt_<id>.txt as soon as it is complete,
+        so memory use follows the largest message rather than the page. The page itself is
+        spooled to disk in case it has to be kept as raw_html_<id>.html for inspection.
+        Returns the SavedConversation, whose messages are extracted one at a time, or None.
+        """
+        logger.info(f"Streaming URL: {url}")
         
-        # Match code blocks with language specifier ```language ... ```
-        pattern = r"```([a-zA-Z0-9_+\-#]+)\n([\s\S]*?)```"
-        matches = re.findall(pattern, content)
+        url_id = url.split('/')[-1]
+        filepath = self.raw_dir / f"chatgpt_{url_id}.txt"
+        html_path = self.raw_dir / f"raw_html_{url_id}.html"
+        tmp_path = filepath.with_name(f"{filepath.name}.partial")
+        html_tmp_path = html_path.with_name(f"{html_path.name}.partial")
         
-        # Also match code blocks without language specifier
-        unlabeled_pattern = r"```\n([\s\S]*?)```"
-        unlabeled_matches = re.findall(unlabeled_pattern, content)
-        
-        # Process matches with language specifier
-        snippets = []
-        for i, (language, code) in enumerate(matches):
-            language = language.strip().lower()
-            code = code.strip()
-            
-            ext = self._get_extension_for_language(language)
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = f"snippet_{timestamp}_{i}{ext}"
-            filepath = self.code_dir / filename
+        try:
+            with self.fetch(url, stream=True) as response:
+                if response.status_code != 200:
+                    logger.error(f"Failed to retrieve content from {url}. Status code: {response.status_code}")
+                    return None
+                
+                decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+                spans = []
+                with open(tmp_path, 'wb') as out, open(html_tmp_path, 'w', encoding='utf-8') as page:
+                    def write_block(text):
+                        if spans:
+                            out.write(b"\n\n")
+                        data = text.encode('utf-8')
+                        spans.append((out.tell(), out.tell() + len(data)))
+                        out.write(data)
+                    
+                    parser = ConversationStreamParser(write_block)
+                    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                        text = decoder.decode(chunk)
+                        page.write(text)
+                        parser.feed(text)
+                    text = decoder.decode(b'', final=True)
+                    page.write(text)
+                    parser.feed(text)
+                    parser.close()
+                    
+                    found = parser.blocks > 0
+                    if not found:
+                        # Fall back to the messages in the Next.js payload
+                        for payload in parser.next_data:
+                            try:
+                                messages = [text for _, text in iter_next_data_messages(payload)]
+                            except ValueError:
+                                continue
+                            if messages:
+                                logger.info(f"No rendered conversation at {url}; using the messages from __NEXT_DATA__")
+                                for message in messages:
+                                    write_block(message)
+                                found = True
+                                break
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(code)
+            if not found:
+                logger.warning(f"No conversation content found at {url}")
+                if self._replace_if_changed(html_tmp_path, html_path):
+                    logger.info(f"Saved raw HTML to {html_path} for inspection")
+                return None
             
-            snippets.append({
-                'language': language,
-                'content': code,
-                'file': str(filepath)
-            })
+            if self._replace_if_changed(tmp_path, filepath):
+                logger.info(f"Saved raw content to {filepath}")
+            else:
+                logger.info(f"Raw content unchanged in {filepath}")
+            return SavedConversation(filepath, spans)
             
-            logger.info(f"Saved {language} code snippet to {filepath}")
+        except Exception as e:
+            logger.error(f"Error scraping URL {url}: {str(e)}")
+            return None
+        finally:
+            tmp_path.unlink(missing_ok=True)
+            html_tmp_path.unlink(missing_ok=True)
+    
+    def extract_code_snippets(self, content, url=None):
+        """Extract code snippets from the content into the content-addressed snippet store"""
+        logger.info("Extracting code snippets")
         
-        # Process unlabeled matches (assume it's JavaScript if we can't tell)
-        for i, code in enumerate(unlabeled_matches):
-            code = code.strip()
-            
-            # Skip if this code is already captured in the labeled snippets
-            if any(s['content'] == code for s in snippets):
-                continue
-            
-            # Guess language based on content
-            language = 'javascript'  # Default
-            if 'function' in code and 'def ' not in code:
-                language = 'javascript'
-            elif 'def ' in code or 'import ' in code and '#' in code:
-                language = 'python'
-            elif '<html>' in code.lower() or '</div>' in code:
-                language = 'html'
-            
+        if not content:
+            return []
+        
+        return self._save_code_snippets(parse_code_snippets(content), url)
+    
+    def _save_code_snippets(self, parsed_snippets, url=None):
+        """Add parsed snippets to the snippet store"""
+        snippets = []
+        for snippet in parsed_snippets:
+            code, language = snippet['content'], snippet['language']
             ext = self._get_extension_for_language(language)
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = f"snippet_{timestamp}_unlabeled_{i}{ext}"
-            filepath = self.code_dir / filename
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(code)
+            record, created = self.snippet_store.add(code, language, ext, source_url=url,
+                                                     labeled=snippet['labeled'])
+            filepath = self.snippet_store.path_for(record)
             
             snippets.append({
                 'language': language,
                 'content': code,
-                'file': str(filepath)
+                'file': str(filepath),
+                'sha256': record['sha256']
             })
             
-            logger.info(f"Saved unlabeled (guessed as {language}) code snippet to {filepath}")
+            if not created:
+                logger.info(f"Code snippet already stored as {filepath}")
+            elif snippet['labeled']:
+                logger.info(f"Saved {language} code snippet to {filepath}")
+            else:
+                logger.info(f"Saved unlabeled (guessed as {language}) code snippet to {filepath}")
+        
+        # During a pipeline run the index is saved once, with the deferred outputs
+        if self._deferred_outputs is None:
+            self.snippet_store.save()
         
         logger.info(f"Extracted {len(snippets)} code snippets")
         return snippets
     
     def _get_extension_for_language(self, language):
         """Get the appropriate file extension for a language"""
-        language_map = {
-            'javascript': '.js',
-            'js': '.js',
-            'typescript': '.ts',
-            'ts': '.ts',
-            'jsx': '.jsx',
-            'tsx': '.tsx',
-            'python': '.py',
-            'py': '.py',
-            'html': '.html',
-            'css': '.css',
-            'json': '.json',
-            'markdown': '.md',
-            'md': '.md',
-            'bash': '.sh',
-            'shell': '.sh',
-            'sh': '.sh',
-            'sql': '.sql',
-            'java': '.java',
-            'c': '.c',
-            'cpp': '.cpp',
-            'c++': '.cpp',
-            'csharp': '.cs',
-            'cs': '.cs',
-            'go': '.go',
-            'ruby': '.rb',
-            'rb': '.rb',
-            'php': '.php',
-            'rust': '.rs',
-            'swift': '.swift',
-            'kotlin': '.kt',
-            'scala': '.scala',
-            'xml': '.xml',
-            'yaml': '.yaml',
-            'yml': '.yml',
-            'ini': '.ini',
-            'toml': '.toml',
-            'dockerfile': '.Dockerfile',
-        }
-        
-        return language_map.get(language.lower(), '.txt')
+        return LANGUAGE_EXTENSIONS.get(language.lower(), '.txt')
+    
+    def _get_language_for_extension(self, ext):
+        """Get the canonical language for a file extension (the first language mapped to it)"""
+        for language, language_ext in LANGUAGE_EXTENSIONS.items():
+            if language_ext == ext:
+                return language
+        return ext.lstrip('.').lower() or 'text'
     
     def extract_company_info(self, content):
         """Extract company information from the content"""
@@ -224,37 +1132,12 @@ class EhbChatGptScraper:
         if not content:
             return None
         
-        # Look for company information sections
-        company_info = {}
-        
-        # Common patterns to look for
-        patterns = {
-            'name': r"(?:Company|Business) Name:?\s*([^\n]+)",
-            'description': r"(?:Company|Business) Description:?\s*([^\n]+(?:\n\s*[^\n]+)*)",
-            'mission': r"Mission(?: Statement)?:?\s*([^\n]+(?:\n\s*[^\n]+)*)",
-            'vision': r"Vision(?: Statement)?:?\s*([^\n]+(?:\n\s*[^\n]+)*)",
-            'values': r"(?:Core )?Values:?\s*([^\n]+(?:\n\s*[^\n]+)*)",
-            'founded': r"Founded(?: Year| Date)?:?\s*([^\n]+)",
-            'headquarters': r"(?:Headquarters|HQ|Location):?\s*([^\n]+)",
-            'industry': r"Industry:?\s*([^\n]+)",
-            'employees': r"(?:Employees|Team Size):?\s*([^\n]+)",
-            'website': r"Website:?\s*([^\n]+)",
-            'contact': r"Contact:?\s*([^\n]+(?:\n\s*[^\n]+)*)"
-        }
-        
-        # Extract information using patterns
-        for key, pattern in patterns.items():
-            match = re.search(pattern, content, re.IGNORECASE)
-            if match:
-                company_info[key] = match.group(1).strip()
-        
+        return self._save_company_info(parse_company_info(content))
+    
+    def _save_company_info(self, company_info):
         # Save company info as JSON
         if company_info:
-            filepath = self.processed_dir / "company_info.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(company_info, f, indent=2)
-            
-            logger.info(f"Saved company information to {filepath}")
+            self._write_json(self.processed_dir / "company_info.json", company_info, "company information")
         
         return company_info
     
@@ -265,67 +1148,12 @@ class EhbChatGptScraper:
         if not content:
             return None
         
-        roadmap = {
-            'phases': []
-        }
-        
-        # Look for roadmap section
-        roadmap_pattern = r"(?:Development|Product) Roadmap:?\s*([^\n]+(?:\n\s*[^\n]+)*)"
-        roadmap_match = re.search(roadmap_pattern, content, re.IGNORECASE)
-        
-        if roadmap_match:
-            roadmap_text = roadmap_match.group(1)
-            
-            # Look for phases or stages
-            phase_pattern = r"(?:Phase|Stage) (\d+):?\s*([^:]+)(?::|\n)"
-            phase_matches = re.findall(phase_pattern, content, re.IGNORECASE)
-            
-            for phase_num, phase_name in phase_matches:
-                phase = {
-                    'name': f"Phase {phase_num}: {phase_name.strip()}",
-                    'tasks': []
-                }
-                
-                # Find the end of the current phase
-                phase_start = content.find(f"Phase {phase_num}")
-                next_phase = f"Phase {int(phase_num) + 1}"
-                phase_end = content.find(next_phase, phase_start)
-                if phase_end == -1:
-                    phase_end = len(content)
-                
-                # Extract the phase content
-                phase_content = content[phase_start:phase_end]
-                
-                # Extract tasks for this phase
-                task_pattern = r"[-•*]\s*([^\n]+)"
-                task_matches = re.findall(task_pattern, phase_content)
-                
-                for task in task_matches:
-                    phase['tasks'].append({
-                        'name': task.strip(),
-                        'status': 'pending'
-                    })
-                
-                roadmap['phases'].append(phase)
-        
-        # If no structured phases were found, try to extract a list
-        if not roadmap['phases']:
-            # Look for bullet points that might indicate roadmap items
-            roadmap_items = re.findall(r"[-•*]\s*([^\n]+)", content)
-            
-            if roadmap_items:
-                roadmap['phases'].append({
-                    'name': 'Development Roadmap',
-                    'tasks': [{'name': item.strip(), 'status': 'pending'} for item in roadmap_items]
-                })
-        
+        return self._save_development_roadmap(parse_development_roadmap(content))
+    
+    def _save_development_roadmap(self, roadmap):
         # Save roadmap as JSON
         if roadmap['phases']:
-            filepath = self.processed_dir / "development_roadmap.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(roadmap, f, indent=2)
-            
-            logger.info(f"Saved development roadmap to {filepath}")
+            self._write_json(self.processed_dir / "development_roadmap.json", roadmap, "development roadmap")
         
         return roadmap
     
@@ -336,82 +1164,74 @@ class EhbChatGptScraper:
         if not content:
             return None
         
-        architecture = {
-            'components': [],
-            'integrations': [],
-            'databases': []
-        }
-        
-        # Look for system architecture section
-        arch_pattern = r"(?:System|Software) Architecture:?\s*([^\n]+(?:\n\s*[^\n]+)*)"
-        arch_match = re.search(arch_pattern, content, re.IGNORECASE)
-        
-        # Extract components/services
-        component_pattern = r"[-•*]\s*([A-Za-z0-9_\- ]+)(?:\s*-\s*|\s*:\s*)([^\n]+)"
-        component_matches = re.findall(component_pattern, content)
-        
-        for comp_name, comp_desc in component_matches:
-            architecture['components'].append({
-                'name': comp_name.strip(),
-                'description': comp_desc.strip()
-            })
-        
-        # Extract database information
-        if "Database" in content or "MongoDB" in content or "PostgreSQL" in content:
-            db_pattern = r"(?:Database|Data Storage):?\s*([^\n]+)"
-            db_match = re.search(db_pattern, content, re.IGNORECASE)
-            
-            if db_match:
-                db_text = db_match.group(1).strip()
-                architecture['databases'].append({
-                    'name': db_text,
-                    'type': 'SQL' if any(db in db_text for db in ['SQL', 'PostgreSQL', 'MySQL']) else 'NoSQL'
-                })
-            
-            # Look for specific database mentions
-            for db in ['MongoDB', 'PostgreSQL', 'MySQL', 'Supabase', 'Firebase']:
-                if db in content:
-                    if not any(d['name'] == db for d in architecture['databases']):
-                        architecture['databases'].append({
-                            'name': db,
-                            'type': 'NoSQL' if db in ['MongoDB', 'Firebase'] else 'SQL'
-                        })
-        
-        # Extract integrations
-        integration_keywords = [
-            'API Integration', 'Third-party', 'Integration', 
-            'OAuth', 'Payment Gateway', 'Authentication Provider'
-        ]
-        
-        for keyword in integration_keywords:
-            if keyword in content:
-                integration_pattern = f"{keyword}:?\s*([^\n]+)"
-                integration_match = re.search(integration_pattern, content, re.IGNORECASE)
-                
-                if integration_match:
-                    architecture['integrations'].append({
-                        'name': integration_match.group(1).strip(),
-                        'type': keyword
-                    })
-        
-        # Look for specific integrations
-        for integration in ['Stripe', 'OpenAI', 'Anthropic', 'AWS', 'Google Cloud', 'Twilio']:
-            if integration in content and not any(i['name'] == integration for i in architecture['integrations']):
-                architecture['integrations'].append({
-                    'name': integration,
-                    'type': 'Third-party Service'
-                })
-        
+        architecture = parse_system_architecture(content, self.architecture_keywords, self.architecture_scanner)
+        return self._save_system_architecture(architecture)
+    
+    def _save_system_architecture(self, architecture):
         # Save architecture as JSON
         if architecture['components'] or architecture['integrations'] or architecture['databases']:
-            filepath = self.processed_dir / "system_architecture.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(architecture, f, indent=2)
-            
-            logger.info(f"Saved system architecture to {filepath}")
+            self._write_json(self.processed_dir / "system_architecture.json", architecture, "system architecture")
         
         return architecture
     
+    def _write_if_changed(self, path, text):
+        """Write text to path unless the file already holds exactly that text
+        
+        Returns True if the file was written. Unchanged files are not touched, so watchers
+        of the output directories only see real changes.
+        """
+        path = Path(path)
+        try:
+            if path.read_text(encoding='utf-8') == text:
+                return False
+        except (OSError, UnicodeDecodeError):
+            pass
+        
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return True
+    
+    def _replace_if_changed(self, tmp_path, path):
+        """Move a finished temporary file into place unless path already has the same content
+        
+        Returns True if path was replaced; otherwise the temporary file is removed.
+        """
+        if path.exists() and filecmp.cmp(tmp_path, path, shallow=False):
+            tmp_path.unlink()
+            return False
+        os.replace(tmp_path, path)
+        return True
+    
+    def _write_json(self, filepath, data, description):
+        """Save a processed JSON file, or hold it back until the running pipeline finishes"""
+        text = json.dumps(data, indent=2)
+        if self._deferred_outputs is not None:
+            self._deferred_outputs[filepath] = (text, description)
+        elif self._write_if_changed(filepath, text):
+            logger.info(f"Saved {description} to {filepath}")
+        else:
+            logger.info(f"{description.capitalize()} unchanged in {filepath}")
+    
+    def _flush_deferred_outputs(self):
+        """Write the processed JSON files held back during a pipeline run (only the final version of each)"""
+        deferred, self._deferred_outputs = self._deferred_outputs or {}, None
+        self.snippet_store.save()
+        for filepath, (text, description) in deferred.items():
+            if self._write_if_changed(filepath, text):
+                logger.info(f"Saved {description} to {filepath}")
+            else:
+                logger.info(f"{description.capitalize()} unchanged in {filepath}")
+    
+    def _load_fingerprints(self):
+        """Content fingerprint recorded for each URL (or replayed file) by earlier runs"""
+        try:
+            with open(self.fingerprints_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
     def process_content(self, content, url):
         """Process the scraped content to extract meaningful information"""
         logger.info(f"Processing content from {url}")
@@ -420,12 +1240,17 @@ class EhbChatGptScraper:
             logger.warning(f"No content to process from {url}")
             return None
         
+        extracted = extract_content(content, self.architecture_keywords, self.architecture_scanner)
+        return self._save_extracted(extracted, url)
+    
+    def _save_extracted(self, extracted, url):
+        """Write the output files for one page's extract_content results and summarize them"""
         results = {
             'url': url,
-            'code_snippets': self.extract_code_snippets(content),
-            'company_info': self.extract_company_info(content),
-            'development_roadmap': self.extract_development_roadmap(content),
-            'system_architecture': self.extract_system_architecture(content)
+            'code_snippets': self._save_code_snippets(extracted['code_snippets'], url),
+            'company_info': self._save_company_info(extracted['company_info']),
+            'development_roadmap': self._save_development_roadmap(extracted['development_roadmap']),
+            'system_architecture': self._save_system_architecture(extracted['system_architecture'])
         }
         
         # Generate summary
@@ -444,27 +1269,259 @@ class EhbChatGptScraper:
         
         return results
     
-    def scrape_and_process_all(self, urls):
-        """Scrape and process all provided URLs"""
+    def _extraction_pool(self, processes):
+        """Worker pool for extract_content; processes=1 keeps extraction in this process"""
+        if processes == 1:
+            return ThreadPoolExecutor(max_workers=1, initializer=_init_extraction_worker,
+                                      initargs=(self.architecture_keywords,))
+        # Download threads are already running, so don't fork: a forked child could inherit a held lock
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(method),
+                                   initializer=_init_extraction_worker, initargs=(self.architecture_keywords,))
+    
+    def scrape_and_process_all(self, urls, use_cache=True):
+        """Scrape and process all provided URLs
+        
+        Up to max_workers threads download pages while they are extracted in worker processes
+        (see _run_pipeline); results come back in the order of urls. Conversations whose text
+        has not changed since an earlier run reuse that run's cached extraction results. In
+        streaming mode the download threads only pass on each SavedConversation.
+        """
         logger.info(f"Starting to scrape and process {len(urls)} URLs")
         
-        all_results = []
-        for i, url in enumerate(urls, 1):
-            logger.info(f"Processing URL {i}/{len(urls)}: {url}")
-            
-            # Scrape content
-            content = self.scrape_url(url)
-            
-            # Process content
-            if content:
-                results = self.process_content(content, url)
-                if results:
-                    all_results.append(results)
+        scrape = self.scrape_url_streaming if self.streaming else self.scrape_url
+        cache = ParseCache(self.parse_cache_dir) if use_cache else None
+        all_results = self._run_pipeline(urls, lambda url: (scrape(url), False),
+                                         max(1, min(self.max_workers, len(urls))), 'fetch', cache)
+        for results in all_results:
+            results['fetch'] = self.fetch_stats.get(results['url'])
         
+        self._log_fetch_stats(urls)
         logger.info(f"Scraping complete. Processed {len(all_results)}/{len(urls)} URLs successfully")
         return all_results
+    
+    def replay(self, directory=None, use_cache=True):
+        """Re-process the pages saved by scrape_url without touching the network
+        
+        raw_html_*.html pages are parsed like a fresh download and chatgpt_*.txt files are
+        extracted as they are, in file name order, through the same pipeline as
+        scrape_and_process_all; each result's 'url' is the file it came from. Extraction
+        results are cached by content hash in ehb_company_info/.parse_cache, so unchanged
+        pages are only extracted again when an extractor or its settings change.
+        """
+        directory = Path(directory) if directory else self.raw_dir
+        paths = sorted([*directory.glob("raw_html_*.html"), *directory.glob("chatgpt_*.txt")])
+        logger.info(f"Replaying {len(paths)} saved pages from {directory}")
+        
+        def load(path):
+            try:
+                return path.read_text(encoding='utf-8'), path.suffix == '.html'
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Could not read saved page {path}: {e}")
+                return None, False
+        
+        cache = ParseCache(self.parse_cache_dir) if use_cache else None
+        all_results = self._run_pipeline([str(path) for path in paths], lambda path: load(Path(path)),
+                                         max(1, min(self.max_workers, len(paths))), 'load', cache)
+        
+        logger.info(f"Replay complete. Processed {len(all_results)}/{len(paths)} saved pages successfully")
+        return all_results
+    
+    def _run_pipeline(self, sources, load, load_workers, load_stage, cache=None):
+        """Load, extract and save every source, returning the results in the order of sources
+        
+        Runs as a three-stage pipeline. load_workers threads call load(source), which returns
+        (text, is_html) - text may also be a SavedConversation - and put the pages
+        on a bounded queue; a dispatcher hands queued pages to a pool of extraction processes,
+        blocking (and so holding up the loads) while EXTRACTION_BACKLOG pages per process are
+        already waiting; and this thread saves each page's results strictly in the order of
+        sources, so the output files are exactly those of a sequential run. Runs of fewer than
+        PARALLEL_MIN_PAGES sources extract in this process instead. With a ParseCache, pages
+        extracted before are not extracted again.
+        
+        Every page's content_fingerprint is recorded in fingerprints.json, and the processed
+        JSON files are written once, after the last page, and only where their content changed,
+        so a run over unchanged inputs modifies no output file. The busy time of each stage is
+        logged at the end and kept in self.pipeline_stats.
+        """
+        self.pipeline_stats = {}
+        if not sources:
+            return []
+        
+        started = time.perf_counter()
+        processes = self.processes if len(sources) >= PARALLEL_MIN_PAGES else 1
+        backlog = processes * EXTRACTION_BACKLOG
+        pages = queue.Queue(maxsize=backlog)
+        slots = threading.BoundedSemaphore(backlog)
+        jobs = [None] * len(sources)
+        cached = [None] * len(sources)
+        fingerprints = [None] * len(sources)
+        dispatched = [threading.Event() for _ in sources]
+        load_seconds = []
+        settings = (self.architecture_keywords, self.html_parser, self.targeted_parse)
+        
+        def load_page(index, source):
+            start = time.perf_counter()
+            page = (None, False)
+            try:
+                page = load(source)
+            finally:
+                load_seconds.append(time.perf_counter() - start)
+                pages.put((index, source, page))
+        
+        def dispatch(pool):
+            for _ in sources:
+                index, source, (text, is_html) = pages.get()
+                if text:
+                    if isinstance(text, SavedConversation):
+                        # Messages are extracted one by one, so where they start and end matters too
+                        fingerprints[index] = file_fingerprint(text.path, is_html, text.spans, *settings)
+                    else:
+                        fingerprints[index] = content_fingerprint(text, is_html, *settings)
+                    if cache:
+                        cached[index] = cache.load(fingerprints[index])
+                if text and cached[index] is None:
+                    slots.acquire()
+                    try:
+                        jobs[index] = pool.submit(_extract_in_worker, text, is_html,
+                                                  self.html_parser, self.targeted_parse)
+                        jobs[index].add_done_callback(lambda _: slots.release())
+                    except RuntimeError as e:
+                        slots.release()
+                        logger.error(f"Could not queue {source} for extraction: {e}")
+                dispatched[index].set()
+        
+        all_results = []
+        extract_seconds = 0.0
+        save_seconds = 0.0
+        cache_hits = 0
+        self._deferred_outputs = {}
+        try:
+            with ThreadPoolExecutor(max_workers=load_workers) as loaders, self._extraction_pool(processes) as pool:
+                dispatcher = threading.Thread(target=dispatch, args=(pool,), daemon=True)
+                dispatcher.start()
+                for index, source in enumerate(sources):
+                    loaders.submit(load_page, index, source)
+                
+                for index, source in enumerate(sources):
+                    logger.info(f"Processing {index + 1}/{len(sources)}: {source}")
+                    
+                    # Wait for this page's extraction; later ones keep loading and extracting meanwhile
+                    dispatched[index].wait()
+                    if cached[index] is not None:
+                        extracted = cached[index]['extracted']
+                        cache_hits += 1
+                    elif jobs[index] is None:
+                        logger.warning(f"No content to process from {source}")
+                        continue
+                    else:
+                        try:
+                            extracted, seconds = jobs[index].result()
+                        except Exception as e:
+                            logger.error(f"Error processing content from {source}: {str(e)}")
+                            continue
+                        jobs[index] = None
+                        extract_seconds += seconds
+                        if cache:
+                            cache.store(fingerprints[index], extracted)
+                    
+                    if extracted is None:
+                        logger.warning(f"No conversation content found in {source}")
+                        continue
+                    
+                    start = time.perf_counter()
+                    all_results.append(self._save_extracted(extracted, source))
+                    save_seconds += time.perf_counter() - start
+                
+                dispatcher.join()
+        finally:
+            # Write the final version of each processed file once, even if the run was interrupted
+            start = time.perf_counter()
+            self._flush_deferred_outputs()
+            save_seconds += time.perf_counter() - start
+        
+        changed = self._record_fingerprints(sources, fingerprints)
+        
+        elapsed = time.perf_counter() - started
+        self.pipeline_stats = {
+            'elapsed': elapsed,
+            load_stage: self._stage_stats(sum(load_seconds), load_workers, elapsed),
+            'extract': self._stage_stats(extract_seconds, processes, elapsed),
+            'save': self._stage_stats(save_seconds, 1, elapsed)
+        }
+        self.pipeline_stats['changed'] = changed
+        if cache:
+            self.pipeline_stats['cache_hits'] = cache_hits
+            logger.info(f"Parse cache: {cache_hits}/{len(sources)} pages reused")
+        
+        self._log_pipeline_stats(load_stage)
+        return all_results
+    
+    def _record_fingerprints(self, sources, fingerprints):
+        """Store this run's page fingerprints; returns the sources whose content changed"""
+        recorded = self._load_fingerprints()
+        changed = [source for source, fingerprint in zip(sources, fingerprints)
+                   if fingerprint and recorded.get(source) != fingerprint]
+        recorded.update((source, fingerprint) for source, fingerprint in zip(sources, fingerprints) if fingerprint)
+        
+        self._write_if_changed(self.fingerprints_path, json.dumps(recorded, indent=2, sort_keys=True))
+        if changed:
+            logger.info(f"{len(changed)}/{len(sources)} inputs changed since the last run")
+        else:
+            logger.info("No input changed since the last run")
+        return changed
+    
+    @staticmethod
+    def _stage_stats(busy, workers, elapsed):
+        return {
+            'busy': busy,
+            'workers': workers,
+            'utilization': busy / (workers * elapsed) if elapsed > 0 else 0.0
+        }
+    
+    def _log_pipeline_stats(self, load_stage='fetch'):
+        """Log how busy each pipeline stage was over the run"""
+        stats = self.pipeline_stats
+        for stage in (load_stage, 'extract', 'save'):
+            logger.info(f"Stage {stage}: {stats[stage]['busy']:.2f}s busy on {stats[stage]['workers']} worker(s), "
+                        f"{stats[stage]['utilization']:.0%} utilization over {stats['elapsed']:.2f}s")
+    
+    def _log_fetch_stats(self, urls):
+        """Log per-URL latency and a summary of the run"""
+        latencies = []
+        for url in urls:
+            stats = self.fetch_stats.get(url)
+            if stats:
+                latencies.append(stats['latency'])
+                logger.info(f"Fetched {url} in {stats['latency']:.2f}s "
+                            f"(status {stats['status']}, {stats['attempts']} attempt(s))")
+        
+        if latencies:
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+            logger.info(f"Fetch latency: min {latencies[0]:.2f}s, median {statistics.median(latencies):.2f}s, "
+                        f"p95 {p95:.2f}s, max {latencies[-1]:.2f}s")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape and process ChatGPT shared conversations")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="concurrent downloads")
+    parser.add_argument("--rps", type=float, default=REQUESTS_PER_SECOND, help="requests per second per host")
+    parser.add_argument("--parser", choices=HTML_PARSERS, default=None,
+                        help="BeautifulSoup parser (default: fastest installed)")
+    parser.add_argument("--full-parse", action="store_true",
+                        help="build the whole document tree instead of only the conversation elements")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse pages while they download, keeping only one message in memory")
+    parser.add_argument("--processes", type=int, default=None,
+                        help=f"extraction worker processes (default: up to {MAX_EXTRACTION_PROCESSES}, 1 = in-process)")
+    parser.add_argument("--replay", nargs="?", const=os.path.join("ehb_company_info", "chatgpt_content"), default=None,
+                        metavar="DIR", help="re-process saved pages from DIR instead of scraping")
+    parser.add_argument("--no-parse-cache", action="store_true",
+                        help="extract every page again instead of reusing cached results")
+    parser.add_argument("--architecture-keywords", default=None,
+                        help="JSON file of keyword lists replacing the ARCHITECTURE_KEYWORDS defaults")
+    args = parser.parse_args()
+    
     # URLs to scrape (user provided)
     urls_to_scrape = [
         "https://chatgpt.com/c/67d9ff38-97fc-8010-8509-545340b6cc66",
@@ -474,8 +1531,14 @@ if __name__ == "__main__":
     ]
     
     # Run the scraper
-    scraper = EhbChatGptScraper()
-    results = scraper.scrape_and_process_all(urls_to_scrape)
+    scraper = EhbChatGptScraper(max_workers=args.workers, requests_per_second=args.rps, processes=args.processes,
+                                html_parser=args.parser, targeted_parse=not args.full_parse, streaming=args.stream,
+                                architecture_keywords=(load_architecture_keywords(args.architecture_keywords)
+                                                       if args.architecture_keywords else None))
+    if args.replay:
+        results = scraper.replay(args.replay, use_cache=not args.no_parse_cache)
+    else:
+        results = scraper.scrape_and_process_all(urls_to_scrape, use_cache=not args.no_parse_cache)
     
     # Create a combined company info file if multiple sources were found
     company_info_sources = [r['company_info'] for r in results if r.get('company_info')]
@@ -485,8 +1548,10 @@ if __name__ == "__main__":
             combined_info.update(info)
         
         if combined_info:
-            filepath = Path("ehb_company_info") / "processed" / "combined_company_info.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(combined_info, f, indent=2)
-            
-            logger.info(f"Saved combined company information to {filepath}")
\ No newline at end of file
+            filepath = scraper.processed_dir / "combined_company_info.json"
+            scraper._write_json(filepath, combined_info, "combined company information")
+    
+    # Index the new conversations and snippets for ehb_search_index queries
+    from ehb_search_index import SearchIndex
+    with SearchIndex(scraper.output_dir) as index:
+        index.update()
@@ -0,0 +1,360 @@
+"""
+EHB Language Classifier
+
+Guesses the language of unlabeled code snippets collected by the EHB scrapers.
+Each snippet is reduced to token and line-start counts, and every language has
+a precomputed weight for the tokens that are typical of it; a snippet's score for
+a language is the weighted sum of its log-scaled counts.
+
+TypeScript, JSX and TSX share JavaScript's tokens and only win on tokens of their
+own (type annotations, markup), so plain JavaScript is never pulled into them by
+words such as "type" or "props".
+"""
+
+import re
+import math
+import logging
+from collections import Counter
+
+logger = logging.getLogger('EhbLanguageClassifier')
+
+# Returned when no language has any evidence, unless the caller names another fallback
+UNKNOWN_LANGUAGE = 'text'
+
+# Lowest score accepted as evidence for a language
+MIN_SCORE = 1.0
+
+# Code tokens: multi-character operators and markers first, then words and single punctuation
+TOKEN_RE = re.compile(r"""
+    <\?php | <\?xml | <!DOCTYPE | <!-- | \#! | </ | /> | === | !== | => | -> | :: | := | << | \*\* | \]\(
+    | :[ \t]*(?:string|number|boolean|any|void|unknown|never)\b(?:\[\])?
+    | \|\| | && | \$\( | \$\{ | \$\w+ | @\w+ | \#\w+ | \w+!(?!=) | ---
+    | (?<!\S)--?[A-Za-z][\w-]*
+    | "[^"\n]*"(?=[ \t]*:)
+    | [A-Za-z_]\w*
+    | [{}()\[\];:=<>#$.,"'`|&?*]
+""", re.VERBOSE)
+
+# What starts each line: an INI/TOML section, a YAML key, a shell or INI assignment,
+# a spaced TOML assignment, or the first word or symbol
+LINE_RE = re.compile(r"""
+    ^[ \t]*(?:
+        (?P<section>\[\[?[\w. "'-]+\]\]?[ \t]*$)
+        | (?P<key>[\w.-]+:(?=[ \t]|$))
+        | (?P<assign>[A-Za-z_]\w*=)
+        | (?P<spaced>[\w.-]+[ \t]+=[ \t])
+        | (?P<first>[A-Za-z_]\w*|\#!|[-#>|;{\[.*])
+    )
+""", re.VERBOSE | re.MULTILINE)
+
+LINE_FEATURES = {'section': '^[section]', 'key': '^key:', 'assign': '^key=', 'spaced': '^key ='}
+
+def _canonical_token(token):
+    """Feature for a token that has no weight of its own, or None"""
+    first = token[0]
+    if first == '"':
+        return '"key":'
+    if first == '$':
+        return '$var'
+    if first == '@':
+        return '@name'
+    if first == '-':
+        return '--flag' if token.startswith('--') else '-flag'
+    if token.endswith('!'):
+        return 'macro!'
+    if first == ':':
+        return ': type'
+    return None
+
+def features(code):
+    """Count the classifier features of a snippet"""
+    counts = Counter(TOKEN_RE.findall(code))
+    counts.update(LINE_FEATURES.get(match.lastgroup) or '^' + match.group('first')
+                  for match in LINE_RE.finditer(code))
+    return counts
+
+# Token weights shared by several languages
+_JS = {
+    'const': 2.0, 'let': 1.5, 'var': 1.0, 'function': 2.0, '=>': 1.5, '===': 3.0, '!==': 3.0,
+    'console': 3.0, 'require': 2.0, 'module': 1.0, 'exports': 2.0, 'export': 1.5, 'import': 0.5,
+    'from': 0.5, 'async': 0.8, 'await': 0.8, 'this': 0.5, 'new': 0.3, 'undefined': 3.0,
+    'document': 2.5, 'window': 2.5, 'JSON': 1.0, 'Promise': 1.0, 'then': 0.5, 'catch': 0.5,
+    'app': 0.5, 'res': 1.0, 'req': 1.0, 'express': 2.0, 'null': 0.3, ';': 0.3, '^const': 1.0,
+    '^export': 1.0, '^module': 1.0, '^import': 0.3, 'length': 0.5, 'push': 1.0, 'map': 0.5,
+    'addEventListener': 3.0, 'fetch': 1.5, 'axios': 2.5, 'process': 1.0, 'env': 0.5,
+    'React': 1.0, 'useState': 1.0, 'useEffect': 1.0, 'props': 0.5, 'mongoose': 2.0, 'router': 1.0
+}
+
+# Only what plain JavaScript cannot contain: type annotations and TypeScript-only keywords
+_TS = {
+    ': type': 3.0, 'interface': 2.0, 'readonly': 2.0, 'enum': 1.5, 'implements': 1.5, 'keyof': 3.0,
+    'namespace': 1.0, 'Record': 2.0, 'Partial': 3.0
+}
+
+# JSX/TSX markup on top of the script tokens
+_MARKUP = {
+    '/>': 3.0, 'className': 5.0, '</': 2.0, 'onClick': 3.5, 'onChange': 3.5, 'div': 1.0
+}
+
+_C = {
+    '#include': 4.0, '#define': 3.5, '#ifndef': 3.0, '#endif': 3.0, 'printf': 3.0, 'int': 1.0,
+    'char': 2.0, 'void': 1.0, 'struct': 2.0, 'malloc': 3.5, 'free': 2.0, 'sizeof': 3.0,
+    'NULL': 1.5, 'main': 1.0, 'stdio': 3.0, 'stdlib': 3.0, 'string': 0.3, 'h': 1.0, '->': 1.0,
+    'unsigned': 2.5, 'typedef': 3.0, 'scanf': 3.0, 'return': 0.3, ';': 0.5, 'float': 1.0,
+    'double': 1.0, 'long': 1.0
+}
+
+_CPP = {
+    'std': 4.0, '::': 2.0, 'cout': 4.0, 'cin': 3.0, 'endl': 4.0, 'vector': 3.0, 'namespace': 2.0,
+    'template': 3.0, 'typename': 3.5, 'iostream': 4.0, 'auto': 1.0, 'nullptr': 4.0, '<<': 2.0,
+    'virtual': 3.0, 'override': 1.5, 'class': 0.5, 'public': 0.5, 'delete': 1.0, 'new': 0.5,
+    'const': 0.5, 'unique_ptr': 4.0, 'shared_ptr': 4.0
+}
+
+# SQL keywords are case-insensitive; upper case is the common style
+_SQL_KEYWORDS = {
+    'SELECT': 3.0, 'FROM': 1.5, 'WHERE': 3.0, 'INSERT': 3.0, 'INTO': 2.5, 'VALUES': 2.5,
+    'UPDATE': 2.0, 'SET': 1.5, 'DELETE': 2.0, 'CREATE': 2.5, 'TABLE': 3.0, 'PRIMARY': 3.0,
+    'KEY': 2.0, 'JOIN': 3.0, 'ON': 1.0, 'AND': 1.0, 'NOT': 1.0, 'NULL': 2.0, 'VARCHAR': 4.0,
+    'INT': 2.0, 'INTEGER': 2.0, 'ORDER': 2.0, 'BY': 2.0, 'GROUP': 2.0, 'REFERENCES': 3.0,
+    'DEFAULT': 1.5, 'ALTER': 3.0, 'INDEX': 2.0, 'TIMESTAMP': 2.0, 'SERIAL': 3.0, 'LIMIT': 2.0,
+    'COUNT': 1.5, 'AS': 0.5, 'TEXT': 1.5, 'BOOLEAN': 1.5, 'UNIQUE': 2.5, 'FOREIGN': 3.0,
+    'DROP': 2.0, 'EXISTS': 2.0, 'IF': 0.5, 'LEFT': 1.5, 'INNER': 2.5, 'HAVING': 3.0
+}
+_SQL_LOWER = ('select', 'where', 'insert', 'into', 'values', 'varchar', 'primary', 'references', 'foreign', 'having')
+_SQL = {**_SQL_KEYWORDS, **{word: _SQL_KEYWORDS[word.upper()] * 0.6 for word in _SQL_LOWER},
+        ';': 0.5, '^SELECT': 1.0, '^CREATE': 1.0, '^INSERT': 1.0}
+
+# Weights per language, keyed by the canonical names of LANGUAGE_EXTENSIONS in ehb_chatgpt_scraper
+LANGUAGE_WEIGHTS = {
+    'javascript': _JS,
+    'typescript': {**_JS, **_TS},
+    'jsx': {**_JS, **_MARKUP},
+    'tsx': {**_JS, **_TS, **_MARKUP},
+    'python': {
+        'def': 3.0, 'import': 1.0, 'from': 0.5, 'self': 2.5, 'None': 3.0, 'True': 2.0, 'False': 2.0,
+        'elif': 4.0, 'print': 1.5, '__init__': 4.0, '__name__': 4.0, 'lambda': 1.5, 'in': 0.5,
+        'not': 0.5, 'and': 0.5, 'is': 0.5, 'pass': 2.5, 'class': 0.5, 'with': 1.0, 'as': 0.5,
+        'yield': 1.0, 'except': 3.0, 'raise': 2.0, 'try': 0.5, 'range': 2.0, 'len': 2.0,
+        'dict': 1.5, 'list': 1.0, 'str': 1.5, ':': 0.5, '^def': 2.0, '^import': 1.0, '^from': 1.5,
+        'append': 1.5, 'np': 1.5, 'pd': 1.5, 'os': 1.0, 'sys': 1.0, 'requests': 1.0, '@name': 0.5,
+        'kwargs': 3.0, 'args': 1.0, 'isinstance': 3.0, 'f': 0.5, 'async': 0.3, 'await': 0.3,
+        'json': 0.5, 'open': 1.0, 'items': 1.0, 'for': 0.3, ';': -1.0, '{': -0.3
+    },
+    'html': {
+        '<!DOCTYPE': 5.0, '</': 1.5, 'html': 2.5, 'div': 1.5, 'body': 2.0, 'head': 2.0, 'class': 1.0,
+        'href': 2.0, 'src': 1.0, 'span': 1.5, 'script': 1.0, 'meta': 2.0, 'title': 1.0, '<': 0.5,
+        'p': 0.5, 'li': 1.0, 'ul': 1.0, 'a': 0.3, '/>': 0.5, '<!--': 1.5, 'charset': 1.5,
+        'button': 1.0, 'form': 1.0, 'input': 1.0, 'link': 1.0, 'rel': 1.5, 'id': 0.5, 'h1': 1.5
+    },
+    'css': {
+        '{': 0.5, '}': 0.5, ';': 0.5, ':': 0.8, 'px': 3.0, 'color': 2.0, 'margin': 2.5, 'padding': 2.5,
+        'display': 2.0, 'flex': 1.5, 'background': 2.0, 'font': 2.0, 'border': 2.0, 'width': 1.0,
+        'height': 1.0, 'em': 1.0, 'rem': 2.5, 'important': 2.0, 'hover': 2.0, '@media': 3.0,
+        'rgba': 2.5, 'solid': 2.5, 'auto': 0.5, 'size': 1.0, 'weight': 1.0, 'align': 1.0,
+        'center': 1.0, 'grid': 1.5, 'transition': 2.0, 'radius': 2.5, '^.': 2.0, '^#': 0.5,
+        'vh': 2.5, 'vw': 2.5, 'none': 1.0, 'position': 1.5, 'absolute': 2.0,
+        'relative': 1.5, 'const': -3.0, 'function': -3.0, '=>': -2.0, 'return': -2.0, 'true': -1.0,
+        'false': -1.0, 'null': -1.0, "'": -0.5, '(': -0.5, '=': -1.0
+    },
+    'json': {
+        '"key":': 2.5, '{': 0.5, '}': 0.5, '[': 0.3, ']': 0.3, 'true': 0.5, 'false': 0.5, 'null': 0.5,
+        '^{': 1.5, ',': 0.3, ';': -2.0, '=': -2.0, 'const': -3.0, 'function': -3.0, '(': -1.0,
+        'def': -3.0, '=>': -2.0, 'return': -2.0
+    },
+    'markdown': {
+        '^#': 1.5, '**': 3.0, '](': 3.5, '^-': 1.0, '^*': 1.0, '^>': 1.5, '^|': 2.5, '`': 1.0, '---': 1.0,
+        'the': 0.8, 'and': 0.5, 'is': 0.5, 'of': 0.5, 'to': 0.5, 'a': 0.3, 'you': 0.8, 'this': 0.3,
+        'for': 0.3, 'with': 0.3, 'your': 0.8, '|': 0.5, '(': -0.3, ';': -1.5, '=': -1.0, '{': -1.0
+    },
+    'bash': {
+        '#!': 3.0, '^#!': 1.0, 'echo': 3.0, '$var': 1.5, '${': 2.0, '$(': 2.0, 'fi': 3.5, 'then': 1.5,
+        'esac': 3.5, 'done': 1.5, 'do': 0.5, 'sudo': 3.0, 'apt': 2.5, 'install': 1.5, 'npm': 3.0,
+        'npx': 3.0, 'pip': 3.0, 'cd': 2.5, 'export': 1.0, '&&': 1.5, '|': 0.8, '--flag': 1.5,
+        '-flag': 1.0, 'mkdir': 3.0, 'rm': 2.5, 'cp': 2.0, 'chmod': 3.5, 'curl': 2.5, 'git': 2.5,
+        'source': 1.5, 'grep': 2.5, 'ls': 2.0, 'cat': 1.5, '^key=': 1.5, 'yarn': 3.0, 'docker': 2.0,
+        'node': 1.0, 'python3': 2.0, 'cargo': 2.0, 'ssh': 2.5, 'systemctl': 3.5, 'brew': 3.5,
+        'wget': 3.5, 'bash': 2.5, 'sh': 2.0, 'tar': 2.5, 'unzip': 3.0, 'kill': 2.0, '^npm': 1.5,
+        '^pip': 1.5, '^cd': 1.5, '^sudo': 1.5, '^git': 1.5, '^echo': 1.0, '^export': 1.0,
+        'run': 0.3, 'dev': 0.5, 'start': 0.3, 'build': 0.3, '(': -0.3, ';': -0.3
+    },
+    'sql': _SQL,
+    'java': {
+        'public': 1.5, 'private': 1.0, 'static': 1.5, 'void': 1.5, 'class': 1.0, 'String': 1.5,
+        'System': 3.0, 'out': 1.5, 'println': 3.0, 'new': 0.5, 'import': 0.5, 'package': 2.5,
+        'extends': 1.5, 'implements': 1.5, 'final': 2.0, 'int': 0.5, 'boolean': 1.0, '@Override': 3.0,
+        'throws': 3.0, 'ArrayList': 3.0, 'List': 1.0, 'Map': 1.0, 'HashMap': 3.0, 'Integer': 2.0,
+        'args': 1.0, 'java': 2.5, 'util': 2.0, ';': 0.5, 'this': 0.3, 'null': 0.3, '@name': 0.5,
+        'protected': 2.0, 'Exception': 1.0, 'try': 0.3, 'catch': 0.3, 'interface': 0.5,
+        '@Autowired': 4.0, '@RestController': 4.0, 'Long': 1.5, 'get': 0.3
+    },
+    'c': _C,
+    'cpp': {**_C, **_CPP},
+    'csharp': {
+        'using': 3.0, 'namespace': 1.5, 'public': 1.0, 'class': 0.5, 'static': 1.0, 'void': 1.0,
+        'string': 1.5, 'Console': 4.0, 'WriteLine': 4.0, 'var': 0.8, 'get': 2.0, 'set': 2.0,
+        'async': 0.5, 'Task': 2.5, 'new': 0.5, 'List': 1.0, 'int': 0.5, 'override': 1.0,
+        'private': 0.5, 'readonly': 0.5, 'IEnumerable': 4.0, 'Linq': 4.0, 'System': 2.0,
+        'ToString': 2.5, 'foreach': 2.0, 'bool': 2.0, 'internal': 3.0, 'sealed': 3.0,
+        'partial': 2.5, 'ILogger': 4.0, 'Controller': 1.5, 'IActionResult': 4.0, ';': 0.5,
+        'Id': 0.5, 'Name': 0.3, 'await': 0.3
+    },
+    'go': {
+        'package': 2.0, 'func': 4.0, 'fmt': 4.0, 'Println': 2.5, 'Printf': 2.0, ':=': 3.0, 'err': 2.0,
+        'nil': 3.0, 'go': 1.0, 'defer': 3.0, 'chan': 3.0, 'struct': 1.0, 'interface': 0.5,
+        'range': 1.0, 'import': 0.5, 'string': 0.5, 'main': 1.0, 'http': 1.0, 'type': 0.5,
+        'var': 0.5, 'make': 1.5, 'errors': 1.5, 'Errorf': 3.0, 'int': 0.3, 'json': 0.3,
+        '^func': 1.0, '^package': 1.0
+    },
+    'ruby': {
+        'def': 1.5, 'end': 3.0, 'puts': 4.0, 'require': 1.0, 'attr_accessor': 4.0, 'do': 2.0,
+        '|': 0.8, 'nil': 1.5, 'elsif': 4.0, 'unless': 3.0, 'module': 1.0, 'class': 0.5, 'each': 2.5,
+        '@name': 1.5, 'self': 0.5, 'Rails': 3.0, 'gem': 3.0, 'initialize': 3.0, 'yield': 0.5,
+        'new': 0.5, 'to_s': 4.0, 'rescue': 4.0, 'begin': 2.0, '^end': 2.0, 'has_many': 4.0,
+        'belongs_to': 4.0, 'render': 1.0, 'params': 1.5
+    },
+    'php': {
+        '<?php': 6.0, '$var': 3.0, '$this': 3.0, 'echo': 1.5, 'function': 0.5, '->': 1.5,
+        'public': 0.5, 'array': 2.0, '=>': 0.5, 'namespace': 0.5, 'use': 1.5, 'foreach': 1.5,
+        'as': 0.5, 'require_once': 4.0, 'isset': 4.0, 'null': 0.3, 'new': 0.3, 'class': 0.3,
+        ';': 0.3, '::': 0.5, 'Route': 2.0, 'mysqli': 4.0, '$_POST': 4.0, '$_GET': 4.0
+    },
+    'rust': {
+        'fn': 4.0, 'let': 1.0, 'mut': 4.0, 'impl': 3.5, 'pub': 3.0, 'struct': 1.0, 'enum': 1.0,
+        'match': 1.5, 'use': 1.0, '::': 1.5, 'macro!': 2.5, 'println!': 3.0, 'vec!': 3.5,
+        'Vec': 3.0, 'String': 0.5, 'Option': 2.5, 'Some': 3.0, 'None': 0.5, 'Result': 2.0,
+        'Ok': 2.5, 'Err': 2.5, '&': 0.5, 'self': 0.5, 'crate': 4.0, '->': 1.0, 'u32': 3.0,
+        'i32': 3.0, 'usize': 3.5, 'mod': 2.0, 'trait': 2.5, 'unwrap': 3.5, 'tokio': 3.0,
+        'derive': 3.0, 'i64': 3.0, 'u8': 3.0, 'f64': 3.0, 'str': 0.5, 'async': 0.3
+    },
+    'swift': {
+        'func': 2.0, 'let': 1.0, 'var': 1.0, 'import': 0.5, 'UIKit': 4.0, 'SwiftUI': 4.0,
+        'guard': 4.0, 'struct': 1.0, 'class': 0.5, 'override': 1.0, 'init': 2.0, 'self': 0.5,
+        'nil': 1.5, 'print': 1.0, 'extension': 3.0, 'protocol': 3.0, 'some': 1.5, 'View': 2.0,
+        '@State': 3.5, '@Published': 4.0, '->': 0.5, 'String': 0.5, 'Int': 1.5, 'Bool': 2.0,
+        'Double': 1.0, 'weak': 3.0, 'Foundation': 3.0, 'DispatchQueue': 4.0, 'body': 0.5,
+        'case': 0.5, '?': 0.5, 'VStack': 4.0, 'Text': 1.5, 'ObservableObject': 4.0
+    },
+    'kotlin': {
+        'fun': 4.0, 'val': 3.5, 'var': 1.0, 'println': 1.5, 'class': 0.5, 'data': 2.0, 'object': 1.5,
+        'companion': 4.0, 'override': 1.0, 'import': 0.5, 'package': 1.0, 'String': 0.5, 'Int': 1.5,
+        'when': 2.5, 'is': 0.5, 'lateinit': 4.0, 'suspend': 4.0, 'listOf': 4.0, 'mutableListOf': 4.0,
+        'it': 1.0, 'Unit': 2.5, 'private': 0.5, 'android': 2.0, '?': 0.5, 'Activity': 2.0,
+        'viewModelScope': 4.0, 'launch': 1.5, 'Boolean': 1.0
+    },
+    'scala': {
+        'def': 1.5, 'val': 2.5, 'var': 0.5, 'object': 2.5, 'extends': 1.0, 'trait': 2.0, 'case': 1.5,
+        'class': 0.5, 'println': 1.0, 'match': 1.0, '=>': 0.5, 'implicit': 4.0, 'import': 0.5,
+        'Seq': 3.0, 'List': 0.5, 'Option': 1.0, 'Some': 1.0, 'None': 0.5, 'sealed': 1.5, 'Unit': 1.5,
+        'Int': 1.0, 'String': 0.5, 'yield': 0.5, 'with': 0.5, 'akka': 3.0, 'Future': 1.0,
+        'lazy': 2.0, 'App': 2.0, '_': 0.5, 'Map': 0.5
+    },
+    'xml': {
+        '<?xml': 6.0, '</': 2.0, '<': 1.0, 'xmlns': 4.0, 'version': 1.0, 'encoding': 1.5, '/>': 1.0,
+        'dependency': 2.0, 'groupId': 4.0, 'artifactId': 4.0, 'project': 1.0, 'bean': 2.5,
+        'configuration': 1.0
+    },
+    'yaml': {
+        '^key:': 2.0, '^-': 1.5, 'name': 0.5, 'version': 0.5, 'image': 1.5, 'services': 1.5,
+        'ports': 1.5, 'environment': 1.5, 'steps': 1.5, 'uses': 2.0, 'run': 0.5, 'on': 0.5,
+        'jobs': 2.0, 'apiVersion': 4.0, 'kind': 2.0, 'metadata': 2.0, 'spec': 2.0, 'true': 0.3,
+        'false': 0.3, '---': 1.5, 'volumes': 1.5, 'replicas': 3.0, 'containers': 2.5,
+        '{': -0.5, ';': -1.5, '=': -1.0, '(': -0.5, '"key":': -1.0
+    },
+    'ini': {
+        '^[section]': 3.0, '^key=': 2.0, '^key =': 1.0, '^;': 2.0, '=': 0.5, '"': -0.3,
+        'host': 0.5, 'port': 0.5, 'user': 0.3, 'password': 0.5, 'enabled': 0.5
+    },
+    'toml': {
+        '^[section]': 3.0, '^key =': 2.0, '"': 0.8, '[': 0.3, 'true': 0.3, 'false': 0.3,
+        'version': 1.0, 'dependencies': 2.0, 'package': 0.5, 'tool': 2.0, 'name': 0.5,
+        'edition': 3.0, 'authors': 1.5, 'features': 1.0
+    },
+    'dockerfile': {
+        '^FROM': 2.5, '^RUN': 3.5, '^COPY': 3.5, '^WORKDIR': 4.0, '^CMD': 3.5, '^EXPOSE': 4.0,
+        '^ENV': 3.0, '^ENTRYPOINT': 4.0, '^ARG': 2.5, '^ADD': 2.5, '^LABEL': 2.0, '^USER': 1.5,
+        '^VOLUME': 3.0, 'alpine': 2.0, 'slim': 1.5, 'apt': 0.5, 'npm': 0.3, 'pip': 0.3
+    }
+}
+
+# Languages that extend another one must outscore it on their own tokens; within the
+# JavaScript family that takes clear evidence, so javascript wins the close calls
+LANGUAGE_BIAS = {
+    'typescript': -2.5,
+    'jsx': -2.5,
+    'tsx': -4.0,
+    'cpp': -0.5
+}
+
+class LanguageClassifier:
+    """Linear token-weight classifier over LANGUAGE_WEIGHTS
+    
+    The weights are indexed by token, so scoring a snippet only visits the weights of the
+    tokens it contains.
+    """
+    
+    def __init__(self, weights=LANGUAGE_WEIGHTS, bias=LANGUAGE_BIAS):
+        self.languages = list(weights)
+        self.vocabulary = {}
+        for language_weights in weights.values():
+            for token in language_weights:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+        self.bias = [bias.get(language, 0.0) for language in self.languages]
+        
+        # Vocabulary row of every token seen so far (-1 for tokens without a weight)
+        self._rows = {}
+        
+        # Per vocabulary row, the (language index, weight) pairs
+        self.token_weights = [[] for _ in self.vocabulary]
+        for column, language_weights in enumerate(weights.values()):
+            for token, weight in language_weights.items():
+                self.token_weights[self.vocabulary[token]].append((column, weight))
+    
+    def _row_for(self, token):
+        row = self.vocabulary.get(token)
+        if row is None:
+            row = self.vocabulary.get(_canonical_token(token), -1)
+        if len(self._rows) > 100000:
+            self._rows.clear()
+        self._rows[token] = row
+        return row
+    
+    def _counts(self, code):
+        """Vocabulary row -> count for one snippet"""
+        counts = {}
+        for token, count in features(code).items():
+            row = self._rows.get(token)
+            if row is None:
+                row = self._row_for(token)
+            if row >= 0:
+                counts[row] = counts.get(row, 0) + count
+        return counts
+    
+    def scores(self, codes):
+        """Score of every language for every snippet, one row per snippet"""
+        results = []
+        for code in codes:
+            scores = list(self.bias)
+            for row, count in self._counts(code).items():
+                scale = math.log1p(count)
+                for column, weight in self.token_weights[row]:
+                    scores[column] += weight * scale
+            results.append(scores)
+        return results
+    
+    def classify(self, codes, fallback=UNKNOWN_LANGUAGE):
+        """Most likely language of each snippet, or fallback where nothing scores MIN_SCORE"""
+        results = []
+        for scores in self.scores(codes):
+            best = max(range(len(scores)), key=scores.__getitem__)
+            results.append(self.languages[best] if scores[best] >= MIN_SCORE else fallback)
+        return results
+
+_default_classifier = None
+
+def classify_languages(codes, fallback=UNKNOWN_LANGUAGE):
+    """Classify a batch of snippets with the default weights"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = LanguageClassifier()
+    return _default_classifier.classify(codes, fallback)
@@ -0,0 +1,654 @@
+"""
+EHB LLM Backends
+
+Chat completion backends for the EHB AI integrator. A backend takes a
+chat.completions.create request (a dict of model, messages and options) and
+returns an OpenAI ChatCompletion, or a stream of ChatCompletionChunks when
+stream=True is passed:
+
+    OpenAIBackend  the OpenAI API, or any compatible endpoint via base_url
+    StubBackend    canned responses generated locally, for offline runs and tests
+
+Nothing from the openai package is imported until a backend is first used, and
+the OpenAI clients are created on first request, so the API key and base URL
+are read at that point rather than at import time.
+
+create_backend() wraps the backend in a RateLimitedBackend, which retries rate
+limited and transient failures, paces requests by the x-ratelimit-* headers,
+caps concurrency and lets identical requests in flight share one response.
+
+Callers that want per-call timings set CALL_TRACE to a dict around a request;
+backends count the HTTP attempts made for it in trace["attempts"], record when
+the first response arrived in trace["first_byte"] (a time.perf_counter() value)
+and keep the headers of the last response in trace["headers"]. A caller can also
+put a "deadline" (a time.perf_counter() value) and a "check_budget" callable in
+the trace; RateLimitedBackend calls check_budget before every attempt and after
+every wait, and never waits or lets an attempt run past the deadline.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import inspect
+import logging
+import threading
+import contextvars
+import concurrent.futures
+
+logger = logging.getLogger('ehb_llm_backends')
+
+CALL_TRACE = contextvars.ContextVar('ehb_llm_call_trace', default=None)
+
+# Requests sent at once by a RateLimitedBackend, and how often one request is retried
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 6
+
+# Exponential backoff when the server gives no retry hint: base * 2**attempt seconds, at most max
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and server errors
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def _trace_request(request):
+    trace = CALL_TRACE.get()
+    if trace is not None:
+        trace["attempts"] = trace.get("attempts", 0) + 1
+
+def _trace_response(response):
+    trace = CALL_TRACE.get()
+    if trace is not None:
+        if "first_byte" not in trace:
+            trace["first_byte"] = time.perf_counter()
+        if response is not None:
+            trace["headers"] = response.headers
+
+async def _trace_request_async(request):
+    _trace_request(request)
+
+async def _trace_response_async(response):
+    _trace_response(response)
+
+class OpenAIBackend:
+    """The OpenAI API (or a compatible server) through the openai client library
+    
+    api_key and base_url default to OPENAI_API_KEY and OPENAI_BASE_URL when the first
+    request is made. The async client belongs to the event loop that created it, so
+    async callers close it with aclose() before their loop ends.
+    """
+    
+    name = "openai"
+    
+    def __init__(self, api_key=None, base_url=None, **client_options):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client_options = client_options
+        self._client = None
+        self._async_client = None
+    
+    def _options(self):
+        return {
+            "api_key": self.api_key or os.environ.get("OPENAI_API_KEY"),
+            "base_url": self.base_url or os.environ.get("OPENAI_BASE_URL") or None,
+            **self.client_options
+        }
+    
+    def is_configured(self):
+        """Whether requests can be sent (an API key is set)"""
+        return bool(self.api_key or os.environ.get("OPENAI_API_KEY"))
+    
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI, DefaultHttpxClient
+            http_client = DefaultHttpxClient(event_hooks={"request": [_trace_request], "response": [_trace_response]})
+            self._client = OpenAI(http_client=http_client, **self._options())
+        return self._client
+    
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            http_client = DefaultAsyncHttpxClient(event_hooks={"request": [_trace_request_async],
+                                                               "response": [_trace_response_async]})
+            self._async_client = AsyncOpenAI(http_client=http_client, **self._options())
+        return self._async_client
+    
+    def create(self, request, **options):
+        """client.chat.completions.create(**request, **options)"""
+        return self.client.chat.completions.create(**request, **options)
+    
+    async def acreate(self, request, **options):
+        """Like create, on the async client"""
+        return await self.async_client.chat.completions.create(**request, **options)
+    
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+    
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+class StubStream:
+    """A list of ChatCompletionChunks usable like the openai Stream and AsyncStream"""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+    
+    def __iter__(self):
+        return iter(self.chunks)
+    
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+def stub_response(request):
+    """Default StubBackend content: a JSON object for JSON requests, plain text otherwise"""
+    prompt = request["messages"][-1]["content"] if request.get("messages") else ""
+    if (request.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"stub": True, "prompt": prompt})
+    return f"Stub response to: {prompt}"
+
+class StubBackend:
+    """Answers every request locally with respond(request) -> str, without any network access
+    
+    Every request is recorded in self.requests. Streams split the response into
+    whitespace-separated pieces, one per chunk, followed by a usage chunk.
+    """
+    
+    name = "stub"
+    
+    def __init__(self, respond=stub_response, model="stub"):
+        self.respond = respond
+        self.model = model
+        self.requests = []
+    
+    def is_configured(self):
+        return True
+    
+    def _usage(self, request, content):
+        prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in request.get("messages", []))
+        completion_tokens = len(content.split())
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+    
+    def create(self, request, stream=False, **options):
+        """Build the ChatCompletion (or StubStream) for request"""
+        from openai.types.chat import ChatCompletion, ChatCompletionChunk
+        
+        self.requests.append(request)
+        _trace_request(request)
+        content = self.respond(request)
+        _trace_response(None)
+        completion_id = f"stub-{len(self.requests)}"
+        created = int(time.time())
+        usage = self._usage(request, content)
+        
+        if not stream:
+            return ChatCompletion.model_validate({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": self.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+        
+        def chunk(choices, usage=None):
+            return ChatCompletionChunk.model_validate({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": self.model,
+                "choices": choices,
+                "usage": usage
+            })
+        
+        pieces = [piece for piece in content.replace("\n", "\n\0").replace(" ", " \0").split("\0") if piece]
+        chunks = [chunk([{"index": 0, "delta": {"content": piece}, "finish_reason": None}]) for piece in pieces]
+        chunks.append(chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if (options.get("stream_options") or {}).get("include_usage"):
+            chunks.append(chunk([], usage))
+        return StubStream(chunks)
+    
+    async def acreate(self, request, **options):
+        return self.create(request, **options)
+    
+    def close(self):
+        pass
+    
+    async def aclose(self):
+        pass
+
+def parse_duration(value):
+    """Seconds in an x-ratelimit-reset-* value such as "1s", "6m0s" or "20ms" (None if unparseable)"""
+    parts = DURATION_RE.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+def retry_after(headers):
+    """Seconds the server asked us to wait (retry-after-ms / retry-after headers), or None"""
+    if headers is None:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+def estimate_tokens(request):
+    """Rough token count of a request (4 characters per token, plus max_tokens), for pacing"""
+    characters = sum(len(str(message.get("content", ""))) for message in request.get("messages", []))
+    return characters // 4 + (request.get("max_tokens") or 0)
+
+class RateLimits:
+    """What the x-ratelimit-* headers say is left of the request and token limits
+    
+    Each request takes its share from the remaining budget before it is sent, so
+    concurrent requests do not all spend the same remainder; wait_time() is how long
+    a request has to wait for the window to reset. block() pauses every request, for
+    example after a 429.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.blocked_until = 0.0
+        self.limit = {}
+        self.window = {}
+        self.remaining = {}
+        self.reset_at = {}
+    
+    def update(self, headers):
+        """Take the remaining requests and tokens from the headers of a response"""
+        now = time.monotonic()
+        with self.lock:
+            for kind in ("requests", "tokens"):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining is None or reset is None:
+                    continue
+                try:
+                    remaining = int(remaining)
+                    self.limit[kind] = int(headers.get(f"x-ratelimit-limit-{kind}") or 0) or None
+                except ValueError:
+                    continue
+                if kind in self.remaining and now < self.reset_at[kind]:
+                    # Same window: responses arrive out of order, and requests sent since count too
+                    self.remaining[kind] = min(self.remaining[kind], remaining)
+                    self.reset_at[kind] = max(self.reset_at[kind], now + reset)
+                else:
+                    self.remaining[kind] = remaining
+                    self.reset_at[kind] = now + reset
+                # The window length is at least the longest reset time seen
+                self.window[kind] = max(self.window.get(kind, 0), reset)
+    
+    def block(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+    
+    def acquire(self, tokens):
+        """Seconds to wait before sending a request of about tokens tokens (0 reserves them)"""
+        now = time.monotonic()
+        with self.lock:
+            wait = self.blocked_until - now
+            for kind, needed in (("requests", 1), ("tokens", tokens)):
+                if kind not in self.remaining:
+                    continue
+                if now >= self.reset_at[kind]:
+                    # The window has reset: assume the full limit until a response says otherwise
+                    if self.limit.get(kind):
+                        self.remaining[kind] = self.limit[kind]
+                        self.reset_at[kind] = now + self.window[kind]
+                    else:
+                        del self.remaining[kind], self.reset_at[kind]
+                        continue
+                if self.remaining[kind] < needed:
+                    wait = max(wait, self.reset_at[kind] - now)
+            
+            if wait > 0:
+                return wait
+            for kind, needed in (("requests", 1), ("tokens", tokens)):
+                if kind in self.remaining:
+                    self.remaining[kind] -= needed
+            return 0
+
+class SlotStream:
+    """A backend stream holding one of RateLimitedBackend's concurrency slots until it is closed
+    
+    Used like the stream it wraps; the slot is released when the with block exits or
+    close() is called, so callers must do one of the two.
+    """
+    
+    def __init__(self, stream, release):
+        self.stream = stream
+        self._release = release
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+    
+    def _release_slot(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+    
+    def __iter__(self):
+        return iter(self.stream)
+    
+    def __enter__(self):
+        self.stream.__enter__()
+        return self
+    
+    def __exit__(self, *exc_info):
+        try:
+            return self.stream.__exit__(*exc_info)
+        finally:
+            self._release_slot()
+    
+    def close(self):
+        try:
+            if hasattr(self.stream, "close"):
+                self.stream.close()
+        finally:
+            self._release_slot()
+
+class AsyncSlotStream(SlotStream):
+    """SlotStream for the async streams returned by acreate"""
+    
+    def __aiter__(self):
+        return self.stream.__aiter__()
+    
+    async def __aenter__(self):
+        await self.stream.__aenter__()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        try:
+            return await self.stream.__aexit__(*exc_info)
+        finally:
+            self._release_slot()
+    
+    async def close(self):
+        try:
+            if hasattr(self.stream, "close"):
+                await self.stream.close()
+        finally:
+            self._release_slot()
+
+class RateLimitedBackend:
+    """Wraps a backend with retries, rate limit pacing, a concurrency cap and request coalescing
+    
+    Rate limited (429), timed out and server errors are retried up to max_retries times,
+    waiting as long as the retry-after header asks or else backing off exponentially with
+    jitter; a 429 pauses all requests, not only the one that got it. The caller's budget
+    (see CALL_TRACE) is checked before each attempt, and waits and request timeouts are
+    cut short at its deadline. A stream keeps its concurrency slot until it is closed (see
+    SlotStream). Non-streaming requests identical to one already in flight wait for its
+    response instead of being sent again. Everything else is passed through to the wrapped
+    backend.
+    """
+    
+    def __init__(self, backend, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES):
+        self.backend = backend
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.rate_limits = RateLimits()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._async_semaphore = None
+        self._async_in_flight = {}
+    
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+    
+    @staticmethod
+    def _key(request, options):
+        # The timeout only bounds how long this caller waits, so it does not tell requests apart
+        options = {name: value for name, value in options.items() if name != "timeout"}
+        return json.dumps([request, options], sort_keys=True, default=str)
+    
+    @staticmethod
+    def _check_budget(trace):
+        """Run the caller's budget check; returns the seconds left before its deadline (None: no deadline)"""
+        if trace.get("check_budget"):
+            trace["check_budget"]()
+        deadline = trace.get("deadline")
+        if deadline is None:
+            return None
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise TimeoutError("The caller's deadline has passed")
+        return remaining
+    
+    @staticmethod
+    def _within_deadline(seconds, remaining):
+        """How long to wait for seconds without passing the deadline (remaining seconds away)"""
+        return seconds if remaining is None else max(min(seconds, remaining), 0)
+    
+    @staticmethod
+    def _attempt_options(options, remaining):
+        if remaining is None:
+            return options
+        timeout = options.get("timeout")
+        return {**options, "timeout": remaining if timeout is None else min(timeout, remaining)}
+    
+    def _retry_delay(self, error, attempt):
+        """Seconds to wait before retrying after error, or None if it should not be retried"""
+        import openai
+        
+        status = getattr(error, "status_code", None)
+        if status is not None:
+            if status not in RETRY_STATUS_CODES or getattr(error, "code", None) == "insufficient_quota":
+                return None
+        elif not isinstance(error, openai.APIConnectionError):
+            return None
+        if attempt >= self.max_retries:
+            return None
+        
+        response = getattr(error, "response", None)
+        headers = response.headers if response is not None else None
+        delay = retry_after(headers)
+        if delay is None:
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+        if status == 429:
+            self.rate_limits.block(delay)
+        logger.warning(f"{type(error).__name__} (attempt {attempt + 1}), retrying in {delay:.1f}s: {error}")
+        return delay
+    
+    def _attempt_started(self):
+        # Time to first byte is measured for the attempt that succeeds
+        trace = CALL_TRACE.get()
+        trace.pop("first_byte", None)
+        trace.pop("headers", None)
+        return trace
+    
+    def _attempt_finished(self, trace):
+        if trace.get("headers") is not None:
+            self.rate_limits.update(trace["headers"])
+    
+    def _send(self, request, options):
+        # The rate limit headers are read from the trace, so every request needs one
+        trace_token = CALL_TRACE.set({}) if CALL_TRACE.get() is None else None
+        try:
+            trace = CALL_TRACE.get()
+            tokens = estimate_tokens(request)
+            for attempt in range(self.max_retries + 1):
+                self._semaphore.acquire()
+                release = self._semaphore.release
+                try:
+                    remaining = self._check_budget(trace)
+                    wait = self.rate_limits.acquire(tokens)
+                    while wait > 0:
+                        time.sleep(self._within_deadline(wait, remaining))
+                        remaining = self._check_budget(trace)
+                        wait = self.rate_limits.acquire(tokens)
+                    
+                    self._attempt_started()
+                    try:
+                        response = self.backend.create(request, **self._attempt_options(options, remaining))
+                    except Exception as e:
+                        delay = self._retry_delay(e, attempt)
+                        if delay is None:
+                            raise
+                    else:
+                        if options.get("stream"):
+                            # The stream is read after this returns, so it takes the slot with it
+                            response, release = SlotStream(response, release), None
+                        return response
+                    finally:
+                        self._attempt_finished(trace)
+                finally:
+                    if release is not None:
+                        release()
+                time.sleep(self._within_deadline(delay, self._check_budget(trace)))
+        finally:
+            if trace_token is not None:
+                CALL_TRACE.reset(trace_token)
+    
+    async def _asend(self, request, options):
+        if self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+        trace_token = CALL_TRACE.set({}) if CALL_TRACE.get() is None else None
+        try:
+            trace = CALL_TRACE.get()
+            tokens = estimate_tokens(request)
+            for attempt in range(self.max_retries + 1):
+                await self._async_semaphore.acquire()
+                release = self._async_semaphore.release
+                try:
+                    # Waiting inside the semaphore keeps the requests behind this one queued in order
+                    remaining = self._check_budget(trace)
+                    wait = self.rate_limits.acquire(tokens)
+                    while wait > 0:
+                        await asyncio.sleep(self._within_deadline(wait, remaining))
+                        remaining = self._check_budget(trace)
+                        wait = self.rate_limits.acquire(tokens)
+                    
+                    self._attempt_started()
+                    try:
+                        response = await self.backend.acreate(request, **self._attempt_options(options, remaining))
+                    except Exception as e:
+                        delay = self._retry_delay(e, attempt)
+                        if delay is None:
+                            raise
+                    else:
+                        if options.get("stream"):
+                            response, release = AsyncSlotStream(response, release), None
+                        return response
+                    finally:
+                        self._attempt_finished(trace)
+                finally:
+                    if release is not None:
+                        release()
+                await asyncio.sleep(self._within_deadline(delay, self._check_budget(trace)))
+        finally:
+            if trace_token is not None:
+                CALL_TRACE.reset(trace_token)
+    
+    def create(self, request, **options):
+        if options.get("stream"):
+            return self._send(request, options)
+        
+        key = self._key(request, options)
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = concurrent.futures.Future()
+        
+        if not owner:
+            trace = CALL_TRACE.get()
+            if trace is not None:
+                trace["coalesced"] = True
+            return future.result()
+        
+        try:
+            future.set_result(self._send(request, options))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+    
+    async def acreate(self, request, **options):
+        if options.get("stream"):
+            return await self._asend(request, options)
+        
+        key = self._key(request, options)
+        task = self._async_in_flight.get(key)
+        if task is None:
+            task = self._async_in_flight[key] = asyncio.ensure_future(self._asend(request, options))
+            task.add_done_callback(lambda _: self._async_in_flight.pop(key, None))
+        else:
+            trace = CALL_TRACE.get()
+            if trace is not None:
+                trace["coalesced"] = True
+        # A caller that is cancelled leaves the request to the others waiting for it
+        return await asyncio.shield(task)
+    
+    def close(self):
+        self.backend.close()
+    
+    async def aclose(self):
+        # The semaphore and in-flight tasks belong to the event loop that is ending
+        self._async_semaphore = None
+        self._async_in_flight = {}
+        await self.backend.aclose()
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "stub": StubBackend
+}
+
+def create_backend(name=None, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES, **options):
+    """Backend by name (default: EHB_LLM_BACKEND, else "openai") in a RateLimitedBackend
+    
+    options go to the backend's constructor; those it does not take (such as base_url for
+    the stub backend) are left out, so the same options can be passed whichever backend is
+    chosen. The OpenAI client's own retries are turned off, since RateLimitedBackend
+    retries instead.
+    """
+    name = name or os.environ.get("EHB_LLM_BACKEND") or "openai"
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM backend {name!r} (choose from {', '.join(BACKENDS)})") from None
+    parameters = inspect.signature(backend_class).parameters
+    if not any(parameter.kind is parameter.VAR_KEYWORD for parameter in parameters.values()):
+        ignored = sorted(set(options) - set(parameters))
+        if ignored:
+            logger.debug(f"The {name} backend ignores {', '.join(ignored)}")
+        options = {option: value for option, value in options.items() if option in parameters}
+    if backend_class is OpenAIBackend:
+        options.setdefault("max_retries", 0)
+    return RateLimitedBackend(backend_class(**options), max_concurrency, max_retries)
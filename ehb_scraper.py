@@ -1,22 +1,190 @@
 import requests
 import trafilatura
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import threading
+import argparse
+import gzip
+import hashlib
 import json
 import os
 import re
+import time
 
-def fetch_website_content(url):
-    """Fetch the content of a website using trafilatura."""
+# Replit pages that describe the EHB projects
+EHB_SOURCE_URLS = [
+    "https://replit.com/t/ehb-technologes-limited/repls/SecureVault",
+    "https://replit.com/t/ehb-technologes-limited/repls/EHB-TECHNOLOGIES",
+    "https://replit.com/t/ehb-technologes-limited/repls/EHB-PROJECT",
+    "https://replit.com/t/ehb-technologes-limited/repls/JPS-project"
+]
+
+# Fetch tuning: total worker threads, simultaneous requests per host, seconds per request
+MAX_WORKERS = 8
+PER_HOST_LIMIT = 4
+REQUEST_TIMEOUT = 30
+
+OUTPUT_DIR = "ehb_company_info"
+
+# Raw page bodies live outside all_info.json, one gzip file per project
+RAW_PAGES_DIR = "raw_pages"
+
+# Persistent HTTP cache location and how long an entry is served without revalidation
+HTTP_CACHE_DIR = os.path.join(OUTPUT_DIR, ".http_cache")
+HTTP_CACHE_TTL = 24 * 60 * 60
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+def create_session(pool_size=MAX_WORKERS):
+    """Create a keep-alive session whose connection pool matches the worker count."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+class HostLimiter:
+    """Caps the number of in-flight requests to any single host."""
+    
+    def __init__(self, per_host_limit=PER_HOST_LIMIT):
+        self.per_host_limit = per_host_limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+    
+    def for_url(self, url):
+        """Return the semaphore guarding the host of url."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._semaphores[host]
+
+class HttpCache:
+    """On-disk page cache that keeps ETag/Last-Modified validators for conditional requests.
+    
+    Each URL is stored as <sha256>.html (body) plus <sha256>.json (validators and fetch time).
+    Entries younger than ttl seconds are served without touching the network; older ones are
+    revalidated with If-None-Match/If-Modified-Since. In cache_only mode the network is never
+    used and stale entries are served as-is.
+    """
+    
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL, cache_only=False):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.cache_only = cache_only
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.html", f"{base}.json"
+    
+    def _write_atomic(self, path, text):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    
+    def load(self, url):
+        """Return (body, meta) for url, or (None, None) if it is not cached."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'r', encoding='utf-8') as f:
+                return f.read(), meta
+        except (OSError, ValueError):
+            return None, None
+    
+    def is_fresh(self, meta):
+        """Check whether a cache entry can be used without revalidation."""
+        return time.time() - meta.get('fetched_at', 0) < self.ttl
+    
+    def conditional_headers(self, meta):
+        """Build the revalidation headers for a cached entry."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+    
+    def store(self, url, response):
+        """Save a 200 response body and its validators."""
+        body_path, meta_path = self._paths(url)
+        self._write_atomic(body_path, response.text)
+        self._write_atomic(meta_path, json.dumps({
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time()
+        }))
+    
+    def refresh(self, url, meta, response):
+        """Mark a cached entry as revalidated after a 304 response."""
+        _, meta_path = self._paths(url)
+        meta = dict(meta, fetched_at=time.time())
+        meta['etag'] = response.headers.get('ETag') or meta.get('etag')
+        meta['last_modified'] = response.headers.get('Last-Modified') or meta.get('last_modified')
+        self._write_atomic(meta_path, json.dumps(meta))
+
+def fetch_website_content(url, session=None, timeout=REQUEST_TIMEOUT, limiter=None, cache=None):
+    """Fetch the content of a website and extract its text using trafilatura."""
+    cached_body, meta = cache.load(url) if cache else (None, None)
+    if cached_body is not None and (cache.cache_only or cache.is_fresh(meta)):
+        return trafilatura.extract(cached_body)
+    if cache and cache.cache_only:
+        print(f"No cached copy of {url} (cache-only mode)")
+        return None
+    
+    headers = cache.conditional_headers(meta) if cached_body is not None else {}
+    owns_session = session is None
+    session = session or create_session(pool_size=1)
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            return trafilatura.extract(downloaded)
+        if limiter:
+            with limiter.for_url(url):
+                response = session.get(url, headers=headers, timeout=timeout)
+        else:
+            response = session.get(url, headers=headers, timeout=timeout)
+        
+        if response.status_code == 304 and cached_body is not None:
+            cache.refresh(url, meta, response)
+            return trafilatura.extract(cached_body)
+        elif response.status_code == 200 and response.text:
+            if cache:
+                cache.store(url, response)
+            return trafilatura.extract(response.text)
         else:
             print(f"Failed to download content from {url}")
             return None
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return None
+    finally:
+        if owns_session:
+            session.close()
+
+def fetch_all(urls, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT, timeout=REQUEST_TIMEOUT, cache=None):
+    """Fetch several URLs concurrently over one shared session, returning contents in input order."""
+    if not urls:
+        return []
+    
+    session = create_session(pool_size=max_workers)
+    limiter = HostLimiter(per_host_limit)
+    
+    def fetch(url):
+        print(f"Fetching information from {url}")
+        return fetch_website_content(url, session=session, timeout=timeout, limiter=limiter, cache=cache)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+            # map() yields results in submission order regardless of completion order
+            return list(executor.map(fetch, urls))
+    finally:
+        session.close()
 
 def create_folder_if_not_exists(folder_path):
     """Create a folder if it doesn't exist."""
@@ -30,58 +198,124 @@ def write_to_file(content, file_path):
         f.write(content)
     print(f"Wrote content to {file_path}")
 
+def raw_page_path(project_name, output_dir=OUTPUT_DIR):
+    """Return the compressed raw-content file of a project."""
+    return os.path.join(output_dir, RAW_PAGES_DIR, f"{project_name}.txt.gz")
+
+def write_raw_page(project_name, content, output_dir=OUTPUT_DIR):
+    """Compress a page's raw content to its own file and return the reference stored in all_info.json."""
+    path = raw_page_path(project_name, output_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    data = content.encode('utf-8')
+    # mtime=0 keeps the file byte-identical when the content has not changed
+    with open(path, 'wb') as raw_file, gzip.GzipFile(fileobj=raw_file, mode='wb', mtime=0) as f:
+        f.write(data)
+    
+    return {
+        "path": os.path.relpath(path, output_dir).replace(os.sep, '/'),
+        "encoding": "gzip",
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "length": len(content)
+    }
+
+def load_raw_content(project_name, output_dir=OUTPUT_DIR):
+    """Read one project's raw page content without loading all_info.json."""
+    path = raw_page_path(project_name, output_dir)
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+def load_all_info(output_dir=OUTPUT_DIR):
+    """Load the extracted-info summary written by collect_ehb_info()."""
+    with open(os.path.join(output_dir, "all_info.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# Service names such as "EHB-Dashboard" or "JPS System"
+SERVICE_NAME = r'(?:EHB|JPS|OLS|WMS|HMS|HPS)[- ][A-Za-z]+(?: Service| System)?'
+
+COMPANY_NAME_RE = re.compile(r'(EHB[- ]Technologies(?:[ -]Limited)?)', re.IGNORECASE)
+SERVICE_RE = re.compile(f'({SERVICE_NAME})')
+SERVICE_DESCRIPTION_RE = re.compile(rf'({SERVICE_NAME})[^\n.]*[^A-Za-z]is[^A-Za-z]([^\n.]+)', re.IGNORECASE)
+
+# Every match of the three patterns above starts with a service prefix, matched case-insensitively.
+# The prefix is spelled out with character classes instead of re.IGNORECASE (the long s "ſ" is the
+# only extra letter IGNORECASE folds onto these codes) because that keeps the regex engine's
+# first-character prefilter, which makes this scan roughly twice as fast
+SERVICE_PREFIX_RE = re.compile(
+    r'[EeJjOoWwHh](?:(?<=[Ee])[Hh][Bb]|(?<=[Jj])[Pp][Ssſ]|(?<=[Oo])[Ll][Ssſ]'
+    r'|(?<=[Ww])[Mm][Ssſ]|(?<=[Hh])[MmPp][Ssſ])[- ]'
+)
+
 def extract_company_info(text):
     """Extract company information from text."""
     info = {}
     
-    # Extract company name
-    company_name_match = re.search(r'(EHB[- ]Technologies(?:[ -]Limited)?)', text, re.IGNORECASE)
-    if company_name_match:
-        info['company_name'] = company_name_match.group(1)
+    company_name = None
+    services = []
+    descriptions = {}
+    services_end = descriptions_end = 0
+    
+    # One scan finds every position where any pattern can match; each pattern is then tried
+    # only there and only past the end of its previous match, which reproduces the
+    # re.search/re.findall semantics of running the patterns separately
+    for prefix in SERVICE_PREFIX_RE.finditer(text):
+        pos = prefix.start()
+        
+        if company_name is None:
+            match = COMPANY_NAME_RE.match(text, pos)
+            if match:
+                company_name = match.group(1)
+        
+        if pos >= services_end:
+            match = SERVICE_RE.match(text, pos)
+            if match:
+                services.append(match.group(1))
+                services_end = match.end()
+        
+        if pos >= descriptions_end:
+            match = SERVICE_DESCRIPTION_RE.match(text, pos)
+            if match:
+                descriptions[match.group(1)] = match.group(2).strip()
+                descriptions_end = match.end()
+    
+    if company_name:
+        info['company_name'] = company_name
     
-    # Extract services
-    services = re.findall(r'((?:EHB|JPS|OLS|WMS|HMS|HPS)[- ][A-Za-z]+(?: Service| System)?)', text)
     if services:
         info['services'] = list(set(services))
     
-    # Extract descriptions
-    descriptions = {}
-    service_desc_matches = re.findall(r'((?:EHB|JPS|OLS|WMS|HMS|HPS)[- ][A-Za-z]+(?: Service| System)?)[^\n.]*[^A-Za-z]is[^A-Za-z]([^\n.]+)', text, re.IGNORECASE)
-    for service, desc in service_desc_matches:
-        descriptions[service] = desc.strip()
-    
     if descriptions:
         info['service_descriptions'] = descriptions
     
     return info
 
-def collect_ehb_info():
+def collect_ehb_info(urls=None, max_workers=MAX_WORKERS, cache=None):
     """Collect information about EHB from the provided links."""
-    urls = [
-        "https://replit.com/t/ehb-technologes-limited/repls/SecureVault",
-        "https://replit.com/t/ehb-technologes-limited/repls/EHB-TECHNOLOGIES",
-        "https://replit.com/t/ehb-technologes-limited/repls/EHB-PROJECT",
-        "https://replit.com/t/ehb-technologes-limited/repls/JPS-project"
-    ]
+    urls = urls or EHB_SOURCE_URLS
     
     all_info = {}
     
-    for url in urls:
-        print(f"Fetching information from {url}")
-        content = fetch_website_content(url)
+    raw_contents = {}
+    
+    # Create output directory
+    output_dir = OUTPUT_DIR
+    create_folder_if_not_exists(output_dir)
+    
+    contents = fetch_all(urls, max_workers=max_workers, cache=cache)
+    infos = [extract_company_info(content or '') for content in contents]
+    
+    for url, content, info in zip(urls, contents, infos):
         if content:
-            info = extract_company_info(content)
             project_name = url.split('/')[-1]
+            raw_contents[project_name] = content
             all_info[project_name] = {
                 "extracted_info": info,
-                "raw_content": content
+                "raw_content_ref": write_raw_page(project_name, content, output_dir)
             }
     
-    # Create output directory
-    output_dir = "ehb_company_info"
-    create_folder_if_not_exists(output_dir)
-    
-    # Write all information to a JSON file
+    # Write the extracted information to a JSON file; raw pages are referenced, not inlined
     write_to_file(json.dumps(all_info, indent=2), f"{output_dir}/all_info.json")
     
     # Create a summary markdown file
@@ -110,7 +344,7 @@ def collect_ehb_info():
         
         # Add some raw content as a reference
         summary += "**Content Excerpt:**\n\n"
-        content_excerpt = data.get('raw_content', '')[:500] + "..."
+        content_excerpt = raw_contents.get(project, '')[:500] + "..."
         summary += f"```\n{content_excerpt}\n```\n\n"
         summary += "---\n\n"
     
@@ -153,6 +387,21 @@ def collect_ehb_info():
     return all_info
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect EHB information from the Replit project pages")
+    parser.add_argument("--ttl", type=int, default=HTTP_CACHE_TTL,
+                        help="seconds a cached page is used without revalidation")
+    parser.add_argument("--cache-only", action="store_true",
+                        help="serve pages from the HTTP cache only, never touching the network")
+    parser.add_argument("--no-cache", action="store_true", help="disable the HTTP cache")
+    args = parser.parse_args()
+    
+    cache = None if args.no_cache else HttpCache(ttl=args.ttl, cache_only=args.cache_only)
+    
     print("Starting EHB information collection process...")
-    collect_ehb_info()
+    collect_ehb_info(cache=cache)
+    
+    # Index the new pages for ehb_search_index queries
+    from ehb_search_index import SearchIndex
+    with SearchIndex(OUTPUT_DIR) as index:
+        index.update()
     print("EHB information collection complete.")
\ No newline at end of file
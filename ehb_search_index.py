@@ -0,0 +1,374 @@
+"""
+EHB Search Index
+
+Full-text inverted index over everything the EHB scrapers collect in
+ehb_company_info/: saved ChatGPT conversations (chatgpt_content/), the snippet
+store (code_snippets/) and the per-project entries of all_info.json.
+
+The index is a SQLite database mapping each term to the documents that contain
+it and the token positions where it occurs, so phrase queries are answered from
+the index alone. update() is incremental: a document is re-tokenized only when
+its signature (file size and mtime, or content hash) has changed, and documents
+whose source disappeared are dropped.
+
+Usage:
+    python ehb_search_index.py update
+    python ehb_search_index.py query 'wallet "payment gateway"' --language python
+"""
+
+import os
+import re
+import json
+import gzip
+import math
+import sqlite3
+import logging
+import argparse
+import time
+from array import array
+from pathlib import Path
+from ehb_snippet_store import SnippetStore
+
+logger = logging.getLogger('EhbSearchIndex')
+
+DATA_DIR = Path("ehb_company_info")
+INDEX_FILENAME = "search_index.sqlite3"
+
+# Bump when tokenization or the schema changes, so existing indexes are rebuilt
+INDEX_VERSION = 1
+
+# Postings buffered before they are written, sorted by term so the B-tree is filled in order
+POSTINGS_BATCH = 500000
+
+TERM_RE = re.compile(r"[^\W_]+|_\w*", re.UNICODE)
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    source TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    language TEXT,
+    signature TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    term_ids BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term_id, doc_id)
+) WITHOUT ROWID;
+"""
+
+def tokenize(text):
+    """Lower-cased word terms of text, in order (their list index is the position)"""
+    return TERM_RE.findall(text.lower())
+
+def parse_query(query):
+    """Split a query into a list of phrases (lists of terms); quoted text is one phrase, other words one each"""
+    phrases = []
+    for quoted, word in QUERY_RE.findall(query):
+        terms = tokenize(quoted if quoted else word)
+        if quoted:
+            if terms:
+                phrases.append(terms)
+        else:
+            phrases.extend([term] for term in terms)
+    return phrases
+
+def _file_signature(path):
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+class SearchIndex:
+    """On-disk inverted index of the EHB data directory"""
+    
+    def __init__(self, data_dir=DATA_DIR, index_path=None):
+        self.data_dir = Path(data_dir)
+        self.index_path = Path(index_path) if index_path else self.data_dir / INDEX_FILENAME
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.index_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA cache_size=-65536")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or int(row[0]) != INDEX_VERSION:
+            with self.db:
+                for table in ("postings", "terms", "documents"):
+                    self.db.execute(f"DROP TABLE IF EXISTS {table}")
+                self.db.executescript(SCHEMA)
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+        self._pending = []
+    
+    def close(self):
+        self.db.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _sources(self):
+        """Yield (source, kind, language, signature, load) for every indexable document
+        
+        load() returns the document's text; it is only called for new or changed documents.
+        """
+        content_dir = self.data_dir / "chatgpt_content"
+        if content_dir.is_dir():
+            for path in sorted(content_dir.glob("*.txt")) + sorted(content_dir.glob("*.html")):
+                yield (path.relative_to(self.data_dir).as_posix(), 'conversation', None,
+                       _file_signature(path), lambda path=path: self._load_conversation(path))
+        
+        snippets_dir = self.data_dir / "code_snippets"
+        if snippets_dir.is_dir():
+            store = SnippetStore(snippets_dir)
+            for record in store.records():
+                yield (f"code_snippets/{record['file']}", 'snippet', self._language_for_file(record['file']),
+                       record['sha256'], lambda record=record: store.read(record))
+        
+        all_info_path = self.data_dir / "all_info.json"
+        if all_info_path.exists():
+            try:
+                with open(all_info_path, 'r', encoding='utf-8') as f:
+                    all_info = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not read {all_info_path}: {e}")
+                all_info = {}
+            
+            for project, data in sorted(all_info.items()):
+                ref = data.get('raw_content_ref') or {}
+                signature = json.dumps([data.get('extracted_info'), ref.get('sha256'),
+                                        len(data.get('raw_content') or '')], sort_keys=True)
+                yield (f"all_info.json#{project}", 'project', None, signature,
+                       lambda project=project, data=data: self._load_project(project, data))
+    
+    def _load_conversation(self, path):
+        text = path.read_text(encoding='utf-8', errors='replace')
+        if path.suffix == '.html':
+            from ehb_chatgpt_scraper import parse_conversation_html
+            text = parse_conversation_html(text)[0] or ''
+        return text
+    
+    def _load_project(self, project, data):
+        parts = [project, json.dumps(data.get('extracted_info') or {}, ensure_ascii=False)]
+        if data.get('raw_content'):
+            parts.append(data['raw_content'])
+        elif data.get('raw_content_ref'):
+            path = self.data_dir / data['raw_content_ref']['path']
+            if path.exists():
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    parts.append(f.read())
+        return '\n'.join(parts)
+    
+    @staticmethod
+    def _language_for_file(filename):
+        from ehb_chatgpt_scraper import LANGUAGE_EXTENSIONS
+        ext = os.path.splitext(filename)[1]
+        for language, language_ext in LANGUAGE_EXTENSIONS.items():
+            if language_ext == ext:
+                return language
+        return ext.lstrip('.').lower() or 'text'
+    
+    @staticmethod
+    def canonical_language(language):
+        """Canonical name of a language filter ('js' -> 'javascript', 'sh' -> 'bash')"""
+        from ehb_chatgpt_scraper import LANGUAGE_EXTENSIONS
+        ext = LANGUAGE_EXTENSIONS.get(language.lower())
+        return SearchIndex._language_for_file(f"x{ext}") if ext else language.lower()
+    
+    def update(self):
+        """Bring the index up to date with the data directory; returns counts of added, updated and removed documents"""
+        start = time.perf_counter()
+        known = {source: (doc_id, signature) for doc_id, source, signature in
+                 self.db.execute("SELECT id, source, signature FROM documents")}
+        term_ids = dict(self.db.execute("SELECT term, id FROM terms"))
+        seen = set()
+        counts = {'added': 0, 'updated': 0, 'removed': 0}
+        
+        with self.db:
+            for source, kind, language, signature, load in self._sources():
+                seen.add(source)
+                previous = known.get(source)
+                if previous and previous[1] == signature:
+                    continue
+                
+                try:
+                    text = load()
+                except (OSError, UnicodeDecodeError, ValueError) as e:
+                    logger.warning(f"Skipping {source}: {e}")
+                    continue
+                
+                if previous:
+                    self._delete(previous[0])
+                    counts['updated'] += 1
+                else:
+                    counts['added'] += 1
+                self._insert(source, kind, language, signature, text, term_ids)
+            
+            for source, (doc_id, _) in known.items():
+                if source not in seen:
+                    self._delete(doc_id)
+                    counts['removed'] += 1
+            self._flush()
+        
+        logger.info(f"Search index updated in {time.perf_counter() - start:.2f}s: {counts['added']} added, "
+                    f"{counts['updated']} updated, {counts['removed']} removed")
+        return counts
+    
+    def _delete(self, doc_id):
+        # Postings not yet written may belong to a document added earlier in this update
+        self._flush()
+        term_ids = array('I')
+        term_ids.frombytes(self.db.execute("SELECT term_ids FROM documents WHERE id = ?", (doc_id,)).fetchone()[0])
+        self.db.executemany("DELETE FROM postings WHERE term_id = ? AND doc_id = ?",
+                            [(term_id, doc_id) for term_id in term_ids])
+        self.db.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+    
+    def _flush(self):
+        if self._pending:
+            self._pending.sort()
+            self.db.executemany("INSERT INTO postings (term_id, doc_id, positions) VALUES (?, ?, ?)", self._pending)
+            self._pending = []
+    
+    def _insert(self, source, kind, language, signature, text, term_ids):
+        terms = tokenize(text)
+        positions = {}
+        for position, term in enumerate(terms):
+            positions.setdefault(term, array('I')).append(position)
+        
+        for term in positions:
+            if term not in term_ids:
+                term_ids[term] = self.db.execute("INSERT INTO terms (term) VALUES (?)", (term,)).lastrowid
+        
+        doc_term_ids = array('I', [term_ids[term] for term in positions])
+        doc_id = self.db.execute(
+            "INSERT INTO documents (source, kind, language, signature, length, term_ids) VALUES (?, ?, ?, ?, ?, ?)",
+            (source, kind, language, signature, len(terms), doc_term_ids.tobytes())).lastrowid
+        
+        self._pending.extend(zip(doc_term_ids, [doc_id] * len(doc_term_ids),
+                                 [term_positions.tobytes() for term_positions in positions.values()]))
+        if len(self._pending) >= POSTINGS_BATCH:
+            self._flush()
+    
+    def _postings(self, term):
+        """doc id -> positions of term"""
+        rows = self.db.execute(
+            "SELECT p.doc_id, p.positions FROM postings p JOIN terms t ON t.id = p.term_id WHERE t.term = ?", (term,))
+        postings = {}
+        for doc_id, blob in rows:
+            positions = array('I')
+            positions.frombytes(blob)
+            postings[doc_id] = positions
+        return postings
+    
+    def search(self, query, language=None, kind=None, limit=20):
+        """Documents matching every word and phrase of query, best first
+        
+        Each result is a dict of source, kind, language, hits (matched occurrences) and
+        score (hits weighted by how rare each word or phrase is, per document length).
+        """
+        phrases = parse_query(query)
+        if not phrases:
+            return []
+        
+        postings = {term: self._postings(term) for phrase in phrases for term in phrase}
+        total = self.db.execute("SELECT COUNT(*) FROM documents").fetchone()[0] or 1
+        
+        # Rarest words first, so the candidate set shrinks as early as possible; a phrase is
+        # at most as frequent as its rarest word
+        frequencies = [min(len(postings[term]) for term in phrase) for phrase in phrases]
+        order = sorted(range(len(phrases)), key=frequencies.__getitem__)
+        
+        candidates = set(postings[min(phrases[order[0]], key=lambda term: len(postings[term]))])
+        matches = []
+        for i in order:
+            term_postings = [postings[term] for term in phrases[i]]
+            for posting in term_postings:
+                candidates.intersection_update(posting)
+            
+            if len(term_postings) == 1:
+                hits = {doc_id: len(term_postings[0][doc_id]) for doc_id in candidates}
+            else:
+                # A phrase occurs where each word's position is the first word's plus its offset
+                hits = {}
+                for doc_id in candidates:
+                    starts = set(term_postings[0][doc_id])
+                    for offset, posting in enumerate(term_postings[1:], 1):
+                        starts.intersection_update(position - offset for position in posting[doc_id])
+                        if not starts:
+                            break
+                    if starts:
+                        hits[doc_id] = len(starts)
+            candidates = set(hits)
+            matches.append((hits, math.log(1 + total / max(frequencies[i], 1))))
+            if not candidates:
+                return []
+        
+        # Only the matching documents are read, and the filters applied to them
+        filters, params = [], []
+        if language:
+            filters.append("language = ?")
+            params.append(self.canonical_language(language))
+        if kind:
+            filters.append("kind = ?")
+            params.append(kind)
+        
+        documents = []
+        candidates = sorted(candidates)
+        for i in range(0, len(candidates), 500):
+            chunk = candidates[i:i + 500]
+            conditions = ' AND '.join([f"id IN ({','.join('?' * len(chunk))})"] + filters)
+            documents += self.db.execute(f"SELECT id, source, kind, language, length FROM documents WHERE {conditions}",
+                                         chunk + params).fetchall()
+        
+        results = []
+        for doc_id, source, doc_kind, doc_language, length in documents:
+            hits = sum(phrase_hits[doc_id] for phrase_hits, _ in matches)
+            score = sum(phrase_hits[doc_id] * weight for phrase_hits, weight in matches)
+            results.append({
+                'source': source,
+                'kind': doc_kind,
+                'language': doc_language,
+                'hits': hits,
+                'score': round(score / (1 + length) ** 0.5, 4)
+            })
+        
+        results.sort(key=lambda r: (-r['score'], r['source']))
+        return results[:limit]
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    parser = argparse.ArgumentParser(description="Search the content collected in ehb_company_info")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="EHB data directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("update", help="index new and changed content")
+    query = subparsers.add_parser("query", help="search the index (quote phrases)")
+    query.add_argument("query", help='words and "quoted phrases" that must all occur')
+    query.add_argument("--language", default=None, help="only snippets in this language (e.g. python, js)")
+    query.add_argument("--kind", choices=["conversation", "snippet", "project"], default=None,
+                       help="only this kind of document")
+    query.add_argument("--limit", type=int, default=20, help="maximum number of results")
+    query.add_argument("--no-update", action="store_true", help="search without updating the index first")
+    args = parser.parse_args()
+    
+    with SearchIndex(args.data_dir) as index:
+        if args.command == "update" or not args.no_update:
+            counts = index.update()
+            if args.command == "update":
+                print(f"{counts['added']} added, {counts['updated']} updated, {counts['removed']} removed")
+        
+        if args.command == "query":
+            start = time.perf_counter()
+            results = index.search(args.query, language=args.language, kind=args.kind, limit=args.limit)
+            elapsed = time.perf_counter() - start
+            
+            for result in results:
+                language = f" [{result['language']}]" if result['language'] else ""
+                print(f"{result['score']:8.4f}  {result['hits']:4d} hits  {result['source']}{language}")
+            print(f"{len(results)} results in {elapsed * 1000:.1f} ms")
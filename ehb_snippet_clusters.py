@@ -0,0 +1,158 @@
+"""
+EHB Snippet Clusters
+
+Groups near-duplicate code snippets from the EHB snippet store. Each snippet is
+split into overlapping token shingles and summarised by a MinHash signature;
+signatures are cut into bands and hashed into LSH buckets, so only snippets that
+share a bucket are ever compared. Pairs whose signatures agree on at least
+SIMILARITY_THRESHOLD of their positions are merged into one cluster, and each
+cluster is represented by its newest (or longest) snippet.
+
+NumPy is optional: it computes the signatures faster, and without it the same
+signatures are computed in pure Python.
+"""
+
+import re
+import zlib
+import random
+import logging
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+logger = logging.getLogger('EhbSnippetClusters')
+
+# Tokens per shingle
+SHINGLE_SIZE = 5
+
+# Signature length, split into BANDS bands of NUM_PERM // BANDS rows; with 16 bands of 8 rows,
+# pairs become candidates from a Jaccard similarity of about 0.7
+NUM_PERM = 128
+BANDS = 16
+
+# Estimated Jaccard similarity at which two candidates count as variants of one snippet
+SIMILARITY_THRESHOLD = 0.8
+
+# Hash family h(x) = ((a * x + b) mod 2**64) >> 32 (multiply-shift), which NumPy gets from uint64 wraparound
+HASH_MASK = (1 << 64) - 1
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+def shingles(code, size=SHINGLE_SIZE):
+    """Hashes of the overlapping size-token shingles of a snippet (whitespace and layout are ignored)"""
+    tokens = TOKEN_RE.findall(code)
+    if len(tokens) <= size:
+        return {zlib.crc32(' '.join(tokens).encode('utf-8'))}
+    return {zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8')) for i in range(len(tokens) - size + 1)}
+
+class MinHasher:
+    """MinHash signatures over NUM_PERM seeded hash functions
+    
+    NumPy computes all permutations of a snippet at once; the pure Python fallback
+    uses the same arithmetic, so both give identical signatures.
+    """
+    
+    def __init__(self, num_perm=NUM_PERM, seed=1, use_numpy=HAS_NUMPY):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.a = [rng.getrandbits(64) | 1 for _ in range(num_perm)]
+        self.b = [rng.getrandbits(64) for _ in range(num_perm)]
+        self.use_numpy = use_numpy and HAS_NUMPY
+        if self.use_numpy:
+            self.a_vector = np.array(self.a, dtype=np.uint64)[:, None]
+            self.b_vector = np.array(self.b, dtype=np.uint64)[:, None]
+    
+    def signature(self, hashes):
+        """MinHash signature (a tuple of num_perm ints) of a set of shingle hashes"""
+        if self.use_numpy:
+            values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            return tuple(((self.a_vector * values + self.b_vector) >> np.uint64(32)).min(axis=1).tolist())
+        
+        return tuple(min([(a * x + b) & HASH_MASK for x in hashes]) >> 32 for a, b in zip(self.a, self.b))
+
+def estimated_similarity(signature, other):
+    """Fraction of positions where two signatures agree (an estimate of the Jaccard similarity)"""
+    return sum(x == y for x, y in zip(signature, other)) / len(signature)
+
+class NearDuplicateIndex:
+    """LSH index that clusters near-duplicate snippets as they are added
+    
+    Keys are only compared with keys that share an LSH bucket and the same group
+    (the file extension, so a JavaScript variant never represents a Python one).
+    Clusters are kept in a union-find structure.
+    """
+    
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM, bands=BANDS, hasher=None):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = hasher or MinHasher(num_perm)
+        self.signatures = {}
+        self.buckets = {}
+        self.parent = {}
+        self.comparisons = 0
+    
+    def _find(self, key):
+        root = key
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[key] != root:
+            self.parent[key], key = root, self.parent[key]
+        return root
+    
+    def add(self, key, code, group=None):
+        """Index a snippet and merge it into the cluster of every similar snippet already indexed"""
+        signature = self.hasher.signature(shingles(code))
+        self.signatures[key] = signature
+        self.parent[key] = key
+        
+        for band in range(self.bands):
+            bucket_key = (group, band, signature[band * self.rows:(band + 1) * self.rows])
+            bucket = self.buckets.setdefault(bucket_key, [])
+            for other in bucket:
+                root, other_root = self._find(key), self._find(other)
+                if root == other_root:
+                    continue
+                self.comparisons += 1
+                if estimated_similarity(signature, self.signatures[other]) >= self.threshold:
+                    self.parent[other_root] = root
+            bucket.append(key)
+    
+    def clusters(self):
+        """Lists of keys that are near-duplicates of each other, in the order the keys were added"""
+        clusters = {}
+        for key in self.parent:
+            clusters.setdefault(self._find(key), []).append(key)
+        return list(clusters.values())
+
+def cluster_records(store, records, threshold=SIMILARITY_THRESHOLD):
+    """Group SnippetStore records into near-duplicate clusters (lists of records)"""
+    index = NearDuplicateIndex(threshold)
+    by_digest = {}
+    for record in records:
+        by_digest[record['sha256']] = record
+        index.add(record['sha256'], store.read(record), group=record['file'].rsplit('.', 1)[-1])
+    
+    logger.info(f"Compared {index.comparisons} candidate pairs for {len(records)} snippets")
+    return [[by_digest[digest] for digest in cluster] for cluster in index.clusters()]
+
+def representatives(store, records, keep='newest', threshold=SIMILARITY_THRESHOLD):
+    """One record per near-duplicate cluster, in the order of records
+    
+    keep='newest' picks the most recently first-seen variant, keep='longest' the longest one;
+    the other criterion breaks ties.
+    """
+    if keep == 'newest':
+        rank = lambda r: (r['first_seen'], r['length'])
+    elif keep == 'longest':
+        rank = lambda r: (r['length'], r['first_seen'])
+    else:
+        raise ValueError(f"Unknown keep policy: {keep}")
+    
+    chosen = {max(cluster, key=rank)['sha256'] for cluster in cluster_records(store, records, threshold)}
+    return [record for record in records if record['sha256'] in chosen]
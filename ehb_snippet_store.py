@@ -0,0 +1,125 @@
+"""
+EHB Snippet Store
+
+Content-addressed storage for code snippets collected by the EHB scrapers.
+Each snippet is saved once as <sha256><ext>, and index.json records its
+language, the URLs it was seen at and when it was first seen.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from datetime import datetime
+
+logger = logging.getLogger('EhbSnippetStore')
+
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 1
+
+def snippet_digest(code):
+    """Content address of a snippet"""
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+class SnippetStore:
+    """Hash-named snippet blobs plus a JSON index, so identical code is stored exactly once"""
+    
+    def __init__(self, store_dir):
+        """Open (or create) the store in store_dir"""
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.store_dir / INDEX_FILENAME
+        self.snippets = self._load_index()
+        self.dirty = False
+    
+    def _load_index(self):
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('snippets', {})
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read snippet index {self.index_path}: {e}")
+            return {}
+    
+    def path_for(self, record):
+        """Path of a snippet's blob"""
+        return self.store_dir / record['file']
+    
+    def add(self, code, language, ext, source_url=None, first_seen=None, labeled=None):
+        """Store a snippet unless identical code is already stored
+        
+        Returns (record, created). Existing snippets are never rewritten; only a new
+        source URL is added to their index entry. labeled records whether language came
+        from the code fence (True) or was guessed (False).
+        """
+        digest = snippet_digest(code)
+        record = self.snippets.get(digest)
+        
+        if record is None or not self.path_for(record).exists():
+            record = {
+                'sha256': digest,
+                'file': f"{digest}{ext}",
+                'language': language,
+                'length': len(code),
+                'sources': [],
+                'first_seen': first_seen or datetime.now().isoformat(timespec='seconds')
+            }
+            if labeled is not None:
+                record['labeled'] = labeled
+            with open(self.path_for(record), 'w', encoding='utf-8') as f:
+                f.write(code)
+            self.snippets[digest] = record
+            self.dirty = True
+            created = True
+        else:
+            created = False
+        
+        if source_url and source_url not in record['sources']:
+            record['sources'].append(source_url)
+            self.dirty = True
+        
+        return record, created
+    
+    def records(self):
+        """All index entries, oldest first (ties broken by hash so the order is stable)"""
+        return sorted(self.snippets.values(), key=lambda r: (r['first_seen'], r['sha256']))
+    
+    def read(self, record):
+        """Read a snippet's code"""
+        with open(self.path_for(record), 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def save(self):
+        """Write the index if anything changed"""
+        if not self.dirty:
+            return False
+        
+        tmp_path = self.index_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'snippets': self.snippets}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self.dirty = False
+        return True
+    
+    def migrate_legacy_files(self, language_for_suffix, pattern="snippet_*"):
+        """Move snippet_<timestamp>_<i><ext> files from older runs into the store, dropping duplicates"""
+        migrated = 0
+        for path in sorted(self.store_dir.glob(pattern)):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    code = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"Skipping unreadable legacy snippet {path}: {e}")
+                continue
+            
+            first_seen = datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec='seconds')
+            self.add(code, language_for_suffix(path.suffix), path.suffix, first_seen=first_seen)
+            path.unlink()
+            migrated += 1
+        
+        if migrated:
+            logger.info(f"Migrated {migrated} legacy snippet files into {self.store_dir}")
+            self.save()
+        return migrated
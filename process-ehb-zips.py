@@ -4,6 +4,7 @@ import shutil
 import zipfile
 import json
 import glob
+import hashlib
 import time
 from datetime import datetime
 
@@ -160,6 +161,53 @@ def run_post_integration_scripts(config_data, target_dir):
     except Exception as e:
         log_message(f"Error running post-integration scripts: {str(e)}")
 
+def manifest_path_for(zip_file_path):
+    """Return the path of the .manifest.json sidecar written by zip-ehb-modules.py --reproducible"""
+    return os.path.splitext(zip_file_path)[0] + ".manifest.json"
+
+def load_archive_manifest(zip_file_path):
+    """Load the sidecar manifest for a zip file, or None if there is no valid one"""
+    manifest_path = manifest_path_for(zip_file_path)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+        return manifest if manifest.get('archive_sha256') else None
+    except Exception as e:
+        log_message(f"Error reading manifest {manifest_path}: {str(e)}")
+        return None
+
+def archive_sha256(zip_file_path):
+    """Compute the SHA-256 of an archive without extracting it"""
+    digest = hashlib.sha256()
+    with open(zip_file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_unchanged_archive(zip_file_path):
+    """Check whether an identical archive (same manifest digest) was already processed"""
+    manifest = load_archive_manifest(zip_file_path)
+    if not manifest:
+        return False
+    
+    processed_manifest = load_archive_manifest(os.path.join(PROCESSED_DIR, os.path.basename(zip_file_path)))
+    if not processed_manifest or processed_manifest['archive_sha256'] != manifest['archive_sha256']:
+        return False
+    
+    # Guard against a stale sidecar that no longer describes the archive next to it
+    return archive_sha256(zip_file_path) == manifest['archive_sha256']
+
+def move_to_processed(zip_file_path, processed_dir):
+    """Move a zip file and its manifest sidecar (if any) to the processed directory"""
+    zip_file_name = os.path.basename(zip_file_path)
+    shutil.move(zip_file_path, os.path.join(processed_dir, zip_file_name))
+    
+    manifest_path = manifest_path_for(zip_file_path)
+    if os.path.exists(manifest_path):
+        shutil.move(manifest_path, os.path.join(processed_dir, os.path.basename(manifest_path)))
+
 def process_zip_file(zip_file_path):
     """Process a single zip file and integrate it into the EHB system"""
     try:
@@ -168,6 +216,12 @@ def process_zip_file(zip_file_path):
         module_name = os.path.splitext(zip_file_name)[0]
         log_message(f"Processing zip file: {zip_file_path}")
         
+        # Skip archives whose content digest matches one that was already integrated
+        if is_unchanged_archive(zip_file_path):
+            log_message(f"Skipping {zip_file_name}: archive digest unchanged since last processing")
+            move_to_processed(zip_file_path, PROCESSED_DIR)
+            return True
+        
         # Create a temporary extraction directory
         temp_extract_dir = f"temp/extract_{int(time.time())}"
         if not os.path.exists(temp_extract_dir):
@@ -228,7 +282,7 @@ def process_zip_file(zip_file_path):
             if not os.path.exists(processed_dir):
                 os.makedirs(processed_dir)
             
-            shutil.move(zip_file_path, os.path.join(processed_dir, zip_file_name))
+            move_to_processed(zip_file_path, processed_dir)
             log_message(f"Moved {zip_file_name} to {processed_dir}")
         else:
             log_message(f"Failed to integrate {module_name}")
@@ -0,0 +1,10 @@
+import sys
+import logging
+from pathlib import Path
+
+# The EHB modules live at the top of the repository, next to this directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# With a root handler in place, the modules' logging.basicConfig() calls do nothing, so
+# importing ehb_ai_integrator does not create ehb_ai_integration.log in the working directory
+logging.getLogger().addHandler(logging.NullHandler())
@@ -0,0 +1,74 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from ehb_ai_integrator import BudgetExceededError, CallMetrics
+from ehb_llm_backends import estimate_tokens
+
+# About 100 prompt tokens by estimate_tokens
+REQUEST = {"model": "stub", "messages": [{"role": "user", "content": "x" * 400}]}
+
+def response(prompt_tokens, completion_tokens):
+    return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens))
+
+def test_only_sent_calls_count_against_the_token_budget():
+    metrics = CallMetrics(token_budget=1000)
+    metrics.record("plan", REQUEST, response(300, 200), trace=metrics.begin("plan", REQUEST))
+    metrics.record("plan", REQUEST, response(300, 200), cached=True)
+    metrics.record("plan", REQUEST, response(300, 200), trace={"start": 0.0, "coalesced": True})
+    
+    assert metrics.tokens_used() == 500
+    assert metrics.reserved_tokens == 0
+
+def test_begin_reserves_tokens_for_calls_in_flight():
+    metrics = CallMetrics(token_budget=150)
+    trace = metrics.begin("first", REQUEST)
+    assert trace["reserved"] == estimate_tokens(REQUEST) == 100
+    
+    with pytest.raises(BudgetExceededError):
+        metrics.begin("second", REQUEST)
+    
+    metrics.record("first", REQUEST, response(20, 10), trace=trace)
+    assert metrics.reserved_tokens == 0
+    metrics.begin("third", REQUEST)
+
+def test_refused_calls_are_recorded_but_not_billed(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    metrics = CallMetrics(path, token_budget=50)
+    with pytest.raises(BudgetExceededError):
+        metrics.begin("architecture", REQUEST)
+    
+    [call] = metrics.calls
+    assert call["status"] == "budget"
+    assert "Token budget of 50" in call["error"]
+    assert [json.loads(line)["status"] for line in path.read_text().splitlines()] == ["budget"]
+    
+    table = metrics.table()
+    assert "architecture" in table and "budget" in table
+    assert table.splitlines()[-1].split()[:4] == ["total", "(sent)", "0", "calls"]
+
+def test_time_budget_sets_a_deadline():
+    metrics = CallMetrics(time_budget=60)
+    trace = metrics.begin("plan", REQUEST)
+    assert 59 < metrics.remaining() <= 60
+    assert trace["deadline"] == metrics.deadline()
+    trace["check_budget"]()
+    
+    metrics.time_budget = 0
+    with pytest.raises(BudgetExceededError):
+        trace["check_budget"]()
+    with pytest.raises(BudgetExceededError):
+        metrics.begin("plan", REQUEST)
+
+def test_without_budgets_nothing_is_refused():
+    metrics = CallMetrics()
+    for _ in range(3):
+        metrics.record("plan", REQUEST, response(10_000, 10_000), trace=metrics.begin("plan", REQUEST))
+    assert metrics.remaining() is None and metrics.deadline() is None
+    assert metrics.tokens_used() == 60_000
+
+def test_errors_are_recorded_with_their_status():
+    metrics = CallMetrics()
+    call = metrics.record("plan", REQUEST, trace=metrics.begin("plan", REQUEST), error=TimeoutError())
+    assert (call["status"], call["error"], call["prompt_tokens"]) == ("error", "TimeoutError", 0)
@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import ehb_chatgpt_scraper
+from ehb_chatgpt_scraper import (ConversationStreamParser, EhbChatGptScraper, ParseCache, SavedConversation,
+                                 content_fingerprint, extract_content, extract_messages, file_fingerprint,
+                                 parse_code_snippets, parse_conversation_html)
+
+MESSAGES = [
+    "Company Name: EHB Tech\n```python\nprint('hi')\n```\n",
+    "Here it is again:\n```python\nprint('hi')\n```\nand the client:\n```\nconst app = express();\n```\n",
+    "We store accounts in PostgreSQL and sessions in Redis.",
+]
+
+PAGE = ('<html><head><script id="__NEXT_DATA__" type="application/json">{}</script></head><body>'
+        '<div class="markdown prose"><p>Mission: build <b>things</b></p><div>nested</div></div>'
+        '<div class="avatar">skip me</div>'
+        '<div class="markdown"><script>ignored()</script><p>second</p></div></body></html>')
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # The scraper writes to ehb_company_info/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def test_parse_code_snippets_dedupes_and_guesses_languages():
+    snippets = parse_code_snippets("".join(MESSAGES))
+    assert snippets == [
+        {'language': 'python', 'content': "print('hi')", 'labeled': True},
+        {'language': 'javascript', 'content': "const app = express();", 'labeled': False},
+    ]
+
+def test_extract_messages_matches_extract_content():
+    whole = extract_content("\n\n".join(MESSAGES))
+    by_message = extract_messages(MESSAGES)
+    
+    assert by_message['code_snippets'] == whole['code_snippets']
+    assert by_message['company_info'] == whole['company_info'] == {'name': 'EHB Tech'}
+    assert by_message['system_architecture']['databases'] == whole['system_architecture']['databases']
+
+def test_saved_conversation_reads_message_spans(tmp_path):
+    path = tmp_path / "chatgpt_1.txt"
+    data = "\n\n".join(MESSAGES).encode('utf-8')
+    path.write_bytes(data)
+    spans, start = [], 0
+    for message in MESSAGES:
+        end = start + len(message.encode('utf-8'))
+        spans.append((start, end))
+        start = end + 2
+    
+    assert list(SavedConversation(path, spans).messages()) == MESSAGES
+    assert file_fingerprint(path, 'x') == content_fingerprint(data.decode('utf-8'), 'x')
+
+def test_stream_parser_matches_beautifulsoup():
+    blocks = []
+    parser = ConversationStreamParser(blocks.append)
+    for i in range(0, len(PAGE), 7):
+        parser.feed(PAGE[i:i + 7])
+    parser.close()
+    
+    content, source = parse_conversation_html(PAGE, 'html.parser')
+    assert source == 'markdown'
+    assert "\n\n".join(blocks) == content
+    assert blocks == ["Mission: build thingsnested", "second"]
+    assert parser.next_data == ["{}"]
+
+def test_stream_parser_flushes_a_truncated_message():
+    blocks = []
+    parser = ConversationStreamParser(blocks.append)
+    parser.feed('<div class="markdown"><p>first</p></div><div class="markdown"><p>cut off')
+    parser.close()
+    assert blocks == ["first", "cut off"]
+
+def test_conversation_from_next_data():
+    payload = {"props": {"pageProps": {"serverResponse": {"data": {"mapping": {
+        "a": {"message": {"author": {"role": "user"}, "content": {"parts": ["Hello"]}}},
+        "b": {"message": {"author": {"role": "assistant"}, "content": {"parts": ["Hi there"]}}},
+    }}}}}}
+    page = f'<html><script id="__NEXT_DATA__">{json.dumps(payload)}</script></html>'
+    assert parse_conversation_html(page, 'html.parser') == ("Hello\n\nHi there", 'next_data')
+
+def test_fingerprint_covers_settings_and_version(monkeypatch):
+    key = content_fingerprint("page", "lxml")
+    assert key == content_fingerprint("page", "lxml")
+    assert key != content_fingerprint("page", "html.parser")
+    assert key != content_fingerprint("page!", "lxml")
+    monkeypatch.setattr(ehb_chatgpt_scraper, 'EXTRACTOR_VERSION', ehb_chatgpt_scraper.EXTRACTOR_VERSION + 1)
+    assert key != content_fingerprint("page", "lxml")
+
+def test_parse_cache_round_trip(tmp_path):
+    cache = ParseCache(tmp_path / "cache")
+    assert cache.load("missing") is None
+    
+    cache.store("key", {'company_info': {'name': 'EHB'}})
+    cache.store("empty", None)
+    assert cache.load("key")['extracted'] == {'company_info': {'name': 'EHB'}}
+    assert cache.load("empty") == {'version': ehb_chatgpt_scraper.EXTRACTOR_VERSION, 'extracted': None}
+    assert not list((tmp_path / "cache").glob("*.tmp"))
+
+def test_replay_reuses_cached_extractions(workdir):
+    raw_dir = Path("ehb_company_info/chatgpt_content")
+    raw_dir.mkdir(parents=True)
+    (raw_dir / "chatgpt_1.txt").write_text(MESSAGES[0])
+    (raw_dir / "raw_html_2.html").write_text(PAGE)
+    
+    scraper = EhbChatGptScraper(processes=1)
+    results = scraper.replay()
+    assert [result['url'] for result in results] == [str(raw_dir / "chatgpt_1.txt"), str(raw_dir / "raw_html_2.html")]
+    assert results[0]['company_info'] == {'name': 'EHB Tech'}
+    assert [snippet['content'] for snippet in results[0]['code_snippets']] == ["print('hi')"]
+    assert scraper.pipeline_stats['cache_hits'] == 0
+    
+    replayed = EhbChatGptScraper(processes=1)
+    assert replayed.replay() == results
+    assert replayed.pipeline_stats['cache_hits'] == 2
+    
+    uncached = EhbChatGptScraper(processes=1)
+    assert uncached.replay(use_cache=False) == results
+    assert 'cache_hits' not in uncached.pipeline_stats
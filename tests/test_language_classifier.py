@@ -0,0 +1,37 @@
+import pytest
+
+from ehb_language_classifier import UNKNOWN_LANGUAGE, LanguageClassifier, classify_languages
+
+SAMPLES = [
+    ("python", "def main():\n    import os\n    print(os.getcwd())\n    return None"),
+    ("javascript", "const express = require('express');\nconst app = express();\n"
+                   "app.get('/', (req, res) => res.send('ok'));\nmodule.exports = app;"),
+    ("typescript", "interface User {\n  id: number;\n  name: string;\n}\n"
+                   "export function greet(user: User): string {\n  return user.name;\n}"),
+    ("jsx", "function App() {\n  return <div className=\"app\" onClick={handle}>Hello</div>;\n}"),
+    ("sql", "SELECT id, name FROM users WHERE id = 1;"),
+    ("css", ".header {\n  color: red;\n  margin: 0 auto;\n}"),
+    ("c", "#include <stdio.h>\nint main(void) {\n  printf(\"hi\");\n  return 0;\n}"),
+    ("bash", "npm install express\ncd frontend && npm run build"),
+]
+
+@pytest.mark.parametrize("language, code", SAMPLES, ids=[language for language, _ in SAMPLES])
+def test_classifies_typical_snippets(language, code):
+    assert classify_languages([code]) == [language]
+
+def test_batch_matches_single_snippets():
+    codes = [code for _, code in SAMPLES]
+    assert classify_languages(codes) == [classify_languages([code])[0] for code in codes]
+
+def test_plain_javascript_is_not_typescript():
+    code = "const user = { name: 'a' };\nfunction greet(user) {\n  return `Hello ${user.name}`;\n}"
+    assert classify_languages([code]) == ["javascript"]
+
+def test_fallback_when_nothing_scores():
+    assert classify_languages(["hello there", ""]) == [UNKNOWN_LANGUAGE, UNKNOWN_LANGUAGE]
+    assert classify_languages(["hello there"], fallback="javascript") == ["javascript"]
+
+def test_custom_weights_and_bias():
+    weights = {"alpha": {"foo": 2.0}, "beta": {"foo": 1.0, "bar": 2.0}}
+    assert LanguageClassifier(weights).classify(["foo foo", "bar bar", "baz"]) == ["alpha", "beta", UNKNOWN_LANGUAGE]
+    assert LanguageClassifier(weights, {"beta": -5.0}).classify(["bar bar"]) == [UNKNOWN_LANGUAGE]
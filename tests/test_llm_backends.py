@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ehb_llm_backends import (CALL_TRACE, RateLimitedBackend, RateLimits, SlotStream, StubBackend, create_backend,
+                              estimate_tokens, parse_duration, retry_after)
+
+REQUEST = {"model": "stub", "messages": [{"role": "user", "content": "Describe the EHB wallet"}]}
+
+class Throttled(Exception):
+    """A 429 whose response asks for a 1 ms wait"""
+    status_code = 429
+    code = None
+    response = SimpleNamespace(headers={"retry-after-ms": "1"})
+
+class FlakyBackend(StubBackend):
+    """StubBackend that fails the first failures requests"""
+    
+    def __init__(self, failures, error=Throttled):
+        super().__init__()
+        self.failures = failures
+        self.error = error
+    
+    def create(self, request, **options):
+        if self.failures:
+            self.failures -= 1
+            raise self.error("throttled")
+        return super().create(request, **options)
+
+def test_parse_duration_and_retry_after():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("soon") is None
+    assert retry_after({"retry-after-ms": "250", "retry-after": "9"}) == 0.25
+    assert retry_after({"retry-after": "2"}) == 2
+    assert retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) is None
+    assert retry_after(None) is None
+
+def test_estimate_tokens():
+    assert estimate_tokens({"messages": [{"content": "x" * 400}], "max_tokens": 50}) == 150
+
+def test_rate_limits_reserve_the_remaining_requests():
+    limits = RateLimits()
+    limits.update({"x-ratelimit-remaining-requests": "1", "x-ratelimit-reset-requests": "30s"})
+    assert limits.acquire(10) == 0
+    assert 29 < limits.acquire(10) <= 30
+
+def test_create_backend_drops_options_the_backend_does_not_take():
+    backend = create_backend("stub", max_concurrency=2, base_url="http://localhost", model="local")
+    assert isinstance(backend, RateLimitedBackend)
+    assert backend.backend.model == "local"
+    assert backend.create(REQUEST).choices[0].message.content == "Stub response to: Describe the EHB wallet"
+    with pytest.raises(ValueError):
+        create_backend("missing")
+
+def test_stream_holds_its_slot_until_closed():
+    backend = create_backend("stub", max_concurrency=1)
+    stream = backend.create(REQUEST, stream=True)
+    assert isinstance(stream, SlotStream)
+    
+    second = threading.Event()
+    thread = threading.Thread(target=lambda: (backend.create(REQUEST), second.set()))
+    thread.start()
+    assert not second.wait(0.2)
+    
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+    assert text == "Stub response to: Describe the EHB wallet"
+    assert not second.is_set()
+    
+    stream.close()
+    assert second.wait(5)
+    thread.join()
+    stream.close()  # a second close does not release another slot
+    assert backend._semaphore._value == 1
+
+def test_async_stream_releases_its_slot_on_exit():
+    async def run():
+        backend = create_backend("stub", max_concurrency=1)
+        async with await backend.acreate(REQUEST, stream=True) as stream:
+            pieces = [chunk.choices[0].delta.content async for chunk in stream if chunk.choices]
+            assert backend._async_semaphore.locked()
+        assert not backend._async_semaphore.locked()
+        await backend.aclose()
+        return "".join(piece or "" for piece in pieces)
+    
+    assert asyncio.run(run()) == "Stub response to: Describe the EHB wallet"
+
+def test_identical_requests_in_flight_share_one_response():
+    release = threading.Event()
+    
+    def respond(request):
+        release.wait(5)
+        return "shared"
+    
+    stub = StubBackend(respond)
+    backend = RateLimitedBackend(stub)
+    results, traces = [], []
+    
+    def call():
+        trace = {}
+        CALL_TRACE.set(trace)
+        results.append(backend.create(REQUEST).choices[0].message.content)
+        traces.append(trace)
+    
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert results == ["shared"] * 3
+    assert len(stub.requests) == 1
+    assert sum(bool(trace.get("coalesced")) for trace in traces) == 2
+
+def test_rate_limited_requests_are_retried():
+    backend = RateLimitedBackend(FlakyBackend(failures=2), max_retries=2)
+    assert backend.create(REQUEST).choices[0].message.content.startswith("Stub response")
+    
+    backend = RateLimitedBackend(FlakyBackend(failures=3), max_retries=2)
+    with pytest.raises(Throttled):
+        backend.create(REQUEST)
+
+def test_other_errors_are_not_retried():
+    stub = FlakyBackend(failures=1, error=ValueError)
+    with pytest.raises(ValueError):
+        RateLimitedBackend(stub).create(REQUEST)
+    assert stub.failures == 0 and not stub.requests
+
+def test_budget_check_stops_the_request():
+    def refuse():
+        raise RuntimeError("over budget")
+    
+    stub = StubBackend()
+    token = CALL_TRACE.set({"check_budget": refuse})
+    try:
+        with pytest.raises(RuntimeError):
+            RateLimitedBackend(stub).create(REQUEST)
+    finally:
+        CALL_TRACE.reset(token)
+    assert not stub.requests
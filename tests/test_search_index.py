@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from ehb_search_index import SearchIndex, parse_query, tokenize
+from ehb_snippet_store import SnippetStore
+
+@pytest.fixture
+def data_dir(tmp_path):
+    content_dir = tmp_path / "chatgpt_content"
+    content_dir.mkdir()
+    (content_dir / "chatgpt_1.txt").write_text("The wallet uses a payment gateway for every payment.")
+    (content_dir / "chatgpt_2.txt").write_text("The gateway of the payment service is a wallet.")
+    
+    store = SnippetStore(tmp_path / "code_snippets")
+    store.add("def pay(wallet):\n    return gateway.charge(wallet)", "python", ".py")
+    store.add("const wallet = gateway.open();", "javascript", ".js")
+    store.save()
+    
+    all_info = {"GoSellr": {"extracted_info": {"company_name": "GoSellr"}, "raw_content": "marketplace wallet"}}
+    (tmp_path / "all_info.json").write_text(json.dumps(all_info))
+    return tmp_path
+
+def test_tokenize_and_parse_query():
+    assert tokenize("Payment-Gateway v2_api") == ["payment", "gateway", "v2", "_api"]
+    assert parse_query('wallet "Payment gateway" ""') == [["wallet"], ["payment", "gateway"]]
+
+def test_update_is_incremental(data_dir):
+    with SearchIndex(data_dir) as index:
+        assert index.update() == {'added': 5, 'updated': 0, 'removed': 0}
+        assert index.update() == {'added': 0, 'updated': 0, 'removed': 0}
+        
+        (data_dir / "chatgpt_content" / "chatgpt_1.txt").write_text("Only a ledger now, nothing else here.")
+        (data_dir / "chatgpt_content" / "chatgpt_2.txt").unlink()
+        assert index.update() == {'added': 0, 'updated': 1, 'removed': 1}
+        
+        assert [r['source'] for r in index.search("ledger")] == ["chatgpt_content/chatgpt_1.txt"]
+        assert index.search('"payment gateway"') == []
+
+def test_phrase_search_needs_adjacent_words(data_dir):
+    with SearchIndex(data_dir) as index:
+        index.update()
+        words = {r['source'] for r in index.search("payment gateway", kind="conversation")}
+        phrase = index.search('"payment gateway"')
+    
+    assert words == {"chatgpt_content/chatgpt_1.txt", "chatgpt_content/chatgpt_2.txt"}
+    assert [(r['source'], r['hits']) for r in phrase] == [("chatgpt_content/chatgpt_1.txt", 1)]
+
+def test_language_and_kind_filters(data_dir):
+    with SearchIndex(data_dir) as index:
+        index.update()
+        snippets = index.search("wallet gateway", language="js")
+        projects = index.search("wallet", kind="project")
+    
+    assert [(r['kind'], r['language']) for r in snippets] == [("snippet", "javascript")]
+    assert [r['source'] for r in projects] == ["all_info.json#GoSellr"]
+
+def test_index_survives_reopening(data_dir):
+    with SearchIndex(data_dir) as index:
+        index.update()
+    with SearchIndex(data_dir) as index:
+        assert index.update() == {'added': 0, 'updated': 0, 'removed': 0}
+        assert len(index.search("wallet")) == 5
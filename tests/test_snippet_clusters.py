@@ -0,0 +1,51 @@
+import pytest
+
+import ehb_snippet_clusters
+from ehb_snippet_clusters import (MinHasher, NearDuplicateIndex, estimated_similarity, representatives,
+                                  shingles)
+from ehb_snippet_store import SnippetStore
+
+BASE = "\n".join(f"const value{i} = compute({i}, options.scale * {i});" for i in range(30))
+VARIANT = BASE + "\nconsole.log('done');"
+OTHER = "\n".join(f"def handler_{i}(request):\n    return respond(request, status={i})" for i in range(30))
+
+def test_shingles_ignore_layout():
+    assert shingles("a = b + c;\nd = e") == shingles("a  =  b +\n\tc; d = e")
+    assert len(shingles("x")) == 1
+
+def test_numpy_and_python_signatures_match():
+    if not ehb_snippet_clusters.HAS_NUMPY:
+        pytest.skip("numpy is not installed")
+    hashes = shingles(BASE)
+    assert MinHasher(use_numpy=True).signature(hashes) == MinHasher(use_numpy=False).signature(hashes)
+
+def test_similar_snippets_have_similar_signatures():
+    hasher = MinHasher()
+    base, variant, other = (hasher.signature(shingles(code)) for code in (BASE, VARIANT, OTHER))
+    assert estimated_similarity(base, variant) >= 0.8
+    assert estimated_similarity(base, other) < 0.2
+
+def test_index_clusters_near_duplicates_within_a_group():
+    index = NearDuplicateIndex()
+    index.add("base", BASE, group="js")
+    index.add("other", OTHER, group="py")
+    index.add("variant", VARIANT, group="js")
+    index.add("copy_in_py", BASE, group="py")
+    
+    assert sorted(map(sorted, index.clusters())) == [["base", "variant"], ["copy_in_py"], ["other"]]
+
+def test_index_rejects_uneven_bands():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=100, bands=16)
+
+def test_representatives_keep_policy(tmp_path):
+    store = SnippetStore(tmp_path)
+    base, _ = store.add(BASE, "javascript", ".js", first_seen="2024-02-01T00:00:00")
+    variant, _ = store.add(VARIANT, "javascript", ".js", first_seen="2024-01-01T00:00:00")
+    other, _ = store.add(OTHER, "python", ".py", first_seen="2024-03-01T00:00:00")
+    records = store.records()
+    
+    assert representatives(store, records, keep='newest') == [base, other]
+    assert representatives(store, records, keep='longest') == [variant, other]
+    with pytest.raises(ValueError):
+        representatives(store, records, keep='oldest')
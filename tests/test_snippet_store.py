@@ -0,0 +1,66 @@
+import json
+
+from ehb_snippet_store import INDEX_FILENAME, SnippetStore, snippet_digest
+
+def test_identical_code_is_stored_once(tmp_path):
+    store = SnippetStore(tmp_path)
+    record, created = store.add("print(1)", "python", ".py", source_url="https://a", first_seen="2024-01-01T00:00:00")
+    again, created_again = store.add("print(1)", "python", ".py", source_url="https://b")
+    
+    assert created and not created_again
+    assert again is record
+    assert record["file"] == f"{snippet_digest('print(1)')}.py"
+    assert record["sources"] == ["https://a", "https://b"]
+    assert record["first_seen"] == "2024-01-01T00:00:00"
+    assert store.read(record) == "print(1)"
+    assert sorted(path.name for path in tmp_path.iterdir()) == [record["file"]]
+
+def test_existing_blob_is_not_rewritten(tmp_path):
+    store = SnippetStore(tmp_path)
+    record, _ = store.add("x = 1", "python", ".py")
+    mtime = store.path_for(record).stat().st_mtime_ns
+    store.save()
+    
+    reopened = SnippetStore(tmp_path)
+    _, created = reopened.add("x = 1", "python", ".py")
+    
+    assert not created
+    assert not reopened.dirty
+    assert store.path_for(record).stat().st_mtime_ns == mtime
+
+def test_save_only_writes_when_dirty(tmp_path):
+    store = SnippetStore(tmp_path)
+    assert store.save() is False
+    assert not (tmp_path / INDEX_FILENAME).exists()
+    
+    store.add("x = 1", "python", ".py", labeled=True)
+    assert store.save() is True
+    assert store.save() is False
+    
+    index = json.loads((tmp_path / INDEX_FILENAME).read_text())
+    assert [record["labeled"] for record in index["snippets"].values()] == [True]
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_records_oldest_first(tmp_path):
+    store = SnippetStore(tmp_path)
+    store.add("b = 2", "python", ".py", first_seen="2024-02-01T00:00:00")
+    store.add("a = 1", "python", ".py", first_seen="2024-01-01T00:00:00")
+    store.add("c = 3", "python", ".py", first_seen="2024-01-01T00:00:00")
+    
+    records = store.records()
+    assert [record["first_seen"] for record in records] == \
+        ["2024-01-01T00:00:00", "2024-01-01T00:00:00", "2024-02-01T00:00:00"]
+    assert records[0]["sha256"] < records[1]["sha256"]
+
+def test_migrate_legacy_files_drops_duplicates(tmp_path):
+    (tmp_path / "snippet_20240101_0.py").write_text("x = 1")
+    (tmp_path / "snippet_20240101_1.py").write_text("x = 1")
+    (tmp_path / "snippet_20240101_2.js").write_text("let y = 2;")
+    
+    store = SnippetStore(tmp_path)
+    migrated = store.migrate_legacy_files({".py": "python", ".js": "javascript"}.get)
+    
+    assert migrated == 3
+    assert not list(tmp_path.glob("snippet_*"))
+    assert sorted(record["language"] for record in store.records()) == ["javascript", "python"]
+    assert (tmp_path / INDEX_FILENAME).exists()
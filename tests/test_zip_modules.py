@@ -0,0 +1,65 @@
+import importlib.util
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+MODULE_PATH = Path(__file__).resolve().parent.parent / "zip-ehb-modules.py"
+
+@pytest.fixture
+def zip_modules(tmp_path, monkeypatch):
+    # Importing the script creates ehb_zips/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location("zip_ehb_modules", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def make_tree(root):
+    (root / "src" / "node_modules").mkdir(parents=True)
+    (root / "src" / "index.js").write_text("console.log('hi');\n")
+    (root / "src" / "node_modules" / "dep.js").write_text("module.exports = 1;\n")
+    (root / "README.md").write_text("# Module\n")
+    script = root / "run.sh"
+    script.write_text("#!/bin/sh\necho run\n")
+    script.chmod(0o755)
+
+def test_collect_entries_sorted_and_excluding(zip_modules, tmp_path):
+    make_tree(tmp_path / "Module")
+    entries = zip_modules.collect_entries(str(tmp_path / "Module"), str(tmp_path), {"node_modules"})
+    
+    assert [arc_name for _, arc_name in entries] == ["Module/README.md", "Module/run.sh", "Module/src/index.js"]
+
+def test_reproducible_zip_is_byte_identical(zip_modules, tmp_path):
+    make_tree(tmp_path / "Module")
+    entries = zip_modules.collect_entries(str(tmp_path / "Module"), str(tmp_path), {"node_modules"})
+    first = zip_modules.write_reproducible_zip(str(tmp_path / "first.zip"), entries)
+    
+    # Different mtimes and the reverse entry order must not change the archive
+    for file_path, _ in entries:
+        os.utime(file_path, (1_700_000_000, 1_700_000_000))
+    second = zip_modules.write_reproducible_zip(str(tmp_path / "second.zip"), list(reversed(entries)))
+    
+    assert first == second
+    assert (tmp_path / "first.zip").read_bytes() == (tmp_path / "second.zip").read_bytes()
+    
+    with zipfile.ZipFile(tmp_path / "first.zip") as archive:
+        infos = {info.filename: info for info in archive.infolist()}
+    assert all(info.date_time == zip_modules.REPRODUCIBLE_DATE_TIME for info in infos.values())
+    assert infos["Module/run.sh"].external_attr >> 16 & 0o777 == 0o755
+    assert infos["Module/README.md"].external_attr >> 16 & 0o777 == 0o644
+
+def test_manifest_records_archive_and_files(zip_modules, tmp_path):
+    make_tree(tmp_path / "Module")
+    entries = zip_modules.collect_entries(str(tmp_path / "Module"), str(tmp_path), {"node_modules"})
+    zip_filename = str(tmp_path / "Module.zip")
+    records = zip_modules.write_reproducible_zip(zip_filename, entries)
+    zip_modules.write_manifest(zip_filename, "Module", records)
+    
+    manifest = json.loads((tmp_path / "Module.manifest.json").read_text())
+    assert manifest["archive_sha256"] == zip_modules.file_sha256(zip_filename)
+    assert manifest["file_count"] == 3
+    assert {record["path"]: record["sha256"] for record in manifest["files"]}["Module/src/index.js"] == \
+        zip_modules.file_sha256(str(tmp_path / "Module" / "src" / "index.js"))
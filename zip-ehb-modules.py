@@ -1,5 +1,9 @@
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo
+import argparse
+import hashlib
+import json
 import os
+import stat
 
 # Define folder paths for the modules to be zipped
 base_paths = [
@@ -41,9 +45,85 @@ base_paths = [
 if not os.path.exists('ehb_zips'):
     os.makedirs('ehb_zips')
 
-def zip_module(module_path):
+# Fixed timestamp used for every entry in reproducible mode (earliest date ZIP supports)
+REPRODUCIBLE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+def collect_entries(path, arc_base, exclude_dirs):
+    """
+    Collect (file_path, arc_name) pairs under path, sorted by arc_name.
+    """
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        for file in files:
+            file_path = os.path.join(root, file)
+            arc_name = os.path.relpath(file_path, arc_base) if arc_base is not None else file_path
+            entries.append((file_path, arc_name.replace(os.sep, '/')))
+    return sorted(entries, key=lambda entry: entry[1])
+
+def write_reproducible_zip(zip_filename, entries):
+    """
+    Write entries to zip_filename with normalized metadata so identical trees
+    produce byte-identical archives. Returns the per-file manifest records.
+    """
+    records = []
+    with ZipFile(zip_filename, 'w') as zipf:
+        for file_path, arc_name in sorted(entries, key=lambda entry: entry[1]):
+            mode = os.stat(file_path).st_mode
+            perms = 0o755 if mode & stat.S_IXUSR else 0o644
+
+            info = ZipInfo(arc_name, date_time=REPRODUCIBLE_DATE_TIME)
+            info.create_system = 3  # Unix, so external_attr is interpreted the same everywhere
+            info.external_attr = (stat.S_IFREG | perms) << 16
+
+            info.file_size = os.path.getsize(file_path)
+
+            digest = hashlib.sha256()
+            size = 0
+            with open(file_path, 'rb') as src, zipf.open(info, 'w') as dst:
+                for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    dst.write(chunk)
+
+            print(f"  Adding: {arc_name}")
+            records.append({"path": arc_name, "sha256": digest.hexdigest(), "size": size})
+    return records
+
+def file_sha256(file_path):
+    """
+    Compute the SHA-256 of a file without loading it into memory.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_manifest(zip_filename, module_name, records):
+    """
+    Write the <module>.manifest.json sidecar next to a reproducible archive.
+    """
+    manifest = {
+        "module": module_name,
+        "archive": os.path.basename(zip_filename),
+        "archive_sha256": file_sha256(zip_filename),
+        "file_count": len(records),
+        "files": records
+    }
+    manifest_filename = os.path.splitext(zip_filename)[0] + ".manifest.json"
+    with open(manifest_filename, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"  Manifest: {manifest_filename} (sha256 {manifest['archive_sha256']})")
+    return manifest
+
+def zip_module(module_path, reproducible=False):
     """
     Create a ZIP file for the given module path.
+
+    With reproducible=True entries are sorted, timestamps and permissions are
+    normalized, and a <module>.manifest.json sidecar is written.
     """
     if not os.path.exists(module_path):
         print(f"Warning: Module path '{module_path}' does not exist, skipping.")
@@ -57,6 +137,13 @@ def zip_module(module_path):
     # Directories to exclude
     exclude_dirs = ['node_modules', '.next', '.git', '__pycache__', 'dist', 'build']
     
+    if reproducible:
+        entries = collect_entries(module_path, os.path.dirname(module_path), exclude_dirs)
+        records = write_reproducible_zip(zip_filename, entries)
+        write_manifest(zip_filename, module_name, records)
+        print(f"✅ ZIP file created: {zip_filename}")
+        return
+    
     with ZipFile(zip_filename, 'w') as zipf:
         for root, dirs, files in os.walk(module_path):
             # Remove excluded directories from dirs to prevent os.walk from traversing them
@@ -70,19 +157,19 @@ def zip_module(module_path):
     
     print(f"✅ ZIP file created: {zip_filename}")
 
-def zip_all_modules():
+def zip_all_modules(reproducible=False):
     """
     Create ZIP files for all modules in base_paths.
     """
     for module_path in base_paths:
-        zip_module(module_path)
+        zip_module(module_path, reproducible=reproducible)
     
     # Create a complete system ZIP
-    create_complete_system_zip()
+    create_complete_system_zip(reproducible=reproducible)
     
     print("\nAll modules zipped successfully!")
 
-def create_complete_system_zip():
+def create_complete_system_zip(reproducible=False):
     """
     Create a comprehensive ZIP file of the entire EHB system.
     """
@@ -110,6 +197,21 @@ def create_complete_system_zip():
     # Directories to exclude
     exclude_dirs = ['node_modules', '.next', '.git', '__pycache__', 'dist', 'build']
     
+    if reproducible:
+        entries = {}
+        for path in docs_files + system_files + base_paths:
+            if not os.path.exists(path):
+                continue
+            if os.path.isdir(path):
+                for file_path, arc_name in collect_entries(path, None, exclude_dirs):
+                    entries[arc_name] = file_path
+            else:
+                entries[path.replace(os.sep, '/')] = path
+        records = write_reproducible_zip(zip_filename, [(p, a) for a, p in entries.items()])
+        write_manifest(zip_filename, "EHB-Complete-System", records)
+        print(f"✅ Complete system ZIP created: {zip_filename}")
+        return
+    
     with ZipFile(zip_filename, 'w') as zipf:
         # Add documentation files
         for doc_file in docs_files:
@@ -148,6 +250,11 @@ def create_complete_system_zip():
     print(f"✅ Complete system ZIP created: {zip_filename}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create ZIP archives of the EHB modules")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="sorted entries, normalized timestamps/permissions and a .manifest.json sidecar")
+    args = parser.parse_args()
+    
     print("EHB Module Zipper")
     print("=================")
-    zip_all_modules()
\ No newline at end of file
+    zip_all_modules(reproducible=args.reproducible)
\ No newline at end of file